@@ -0,0 +1,278 @@
+# adaptive.py - Tirage adaptatif : difficulté mesurée des questions et niveau du joueur
+# Usage : python adaptive.py --seed-from answers.qqa   (initialise les difficultés depuis le journal des réponses)
+
+import argparse
+import json
+import math
+import os
+import random
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RATINGS_FILE = "ratings.json"
+# probabilité de bonne réponse visée pour le joueur
+TARGET_SUCCESS = 0.7
+# niveaux de joueur pour lesquels un arbre de poids est tenu (pas de 0.5)
+BANDS = tuple(x / 2 for x in range(-6, 7))
+# difficulté initiale selon le niveau annoncé, tant qu'aucune mesure n'existe
+NIVEAU_PRIOR = {"facile": -1.0, "moyen": 0.0, "difficile": 1.0}
+# poids plancher : aucune question n'est jamais exclue
+MIN_WEIGHT = 0.02
+K_PLAYER = 0.3
+K_QUESTION = 0.4
+
+
+def _logit(p: float) -> float:
+    return math.log(p / (1 - p))
+
+
+def expected(skill: float, difficulty: float) -> float:
+    """Probabilité de bonne réponse (modèle logistique à un paramètre, comme Elo)."""
+    return 1 / (1 + math.exp(difficulty - skill))
+
+
+def weight(band: float, difficulty: float) -> float:
+    # maximal quand la réussite attendue vaut TARGET_SUCCESS
+    d = band - difficulty - _logit(TARGET_SUCCESS)
+    return math.exp(-d * d / 2) + MIN_WEIGHT
+
+
+class Fenwick:
+    """Arbre de Fenwick sur des poids : mise à jour et tirage pondéré en O(log n)."""
+
+    def __init__(self, weights: Iterable[float]):
+        self.weights = array("d", weights)
+        n = len(self.weights)
+        tree = array("d", [0.0]) * (n + 1)
+        for i, w in enumerate(self.weights, start=1):
+            tree[i] += w
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.total = sum(self.weights)
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def set(self, i: int, w: float):
+        delta = w - self.weights[i]
+        self.weights[i] = w
+        self.total += delta
+        n = len(self.weights)
+        i += 1
+        while i <= n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, u: float) -> int:
+        """Plus petit indice dont la somme cumulée dépasse u (0 <= u < total)."""
+        pos, step, n, tree = 0, self._top, len(self.weights), self.tree
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= u:
+                pos = nxt
+                u -= tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+
+class AdaptiveSampler:
+    """
+    Difficulté de chaque question (par id) et niveau de chaque joueur, mis à jour
+    après chaque partie comme un classement Elo. Pour chaque bucket (thème, niveau)
+    de la banque et chaque palier de niveau joueur utilisé, un arbre de Fenwick
+    garde le poids des questions : un tirage coûte O(buckets + log n) et une mise
+    à jour O(paliers x log n), quelle que soit la taille de la banque.
+    """
+
+    def __init__(self, bank, path: Optional[str] = RATINGS_FILE):
+        self.bank = bank
+        self.path = path
+        self.questions: Dict[int, List[float]] = {}   # id -> [difficulté, réponses]
+        self.players: Dict[str, List[float]] = {}     # nom -> [niveau, réponses]
+        self._trees: Dict[Tuple[float, tuple], Fenwick] = {}
+        self._where: Dict[int, List[Tuple[tuple, int]]] = {}
+        self._index = None
+        self._indexed = 0
+        if path and os.path.isfile(path):
+            self.load()
+
+    # -----------------------------
+    # Persistance
+    # -----------------------------
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.questions = {int(k): v for k, v in data.get("questions", {}).items()}
+            self.players = data.get("players", {})
+        except Exception as e:
+            print(f"[Warning] impossible de lire {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"questions": self.questions, "players": self.players}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    # -----------------------------
+    # Notes
+    # -----------------------------
+
+    def skill(self, player: str) -> float:
+        rec = self.players.get(player)
+        return rec[0] if rec else 0.0
+
+    def difficulty(self, pos: int) -> float:
+        store = self.bank.questions
+        rec = self.questions.get(store.ids[pos])
+        if rec:
+            return rec[0]
+        return NIVEAU_PRIOR.get(store.niveau_at(pos).lower(), 0.0)
+
+    def seed(self, stats: Dict[int, Dict[str, float]], prior_answers: int = 5):
+        """
+        Initialise les difficultés depuis les taux de réussite mesurés
+        (telemetry.aggregate), lissés vers 50 % par prior_answers réponses fictives.
+        """
+        for qid, s in stats.items():
+            n = s["reponses"]
+            rate = (s["bonnes"] + prior_answers / 2) / (n + prior_answers)
+            self.questions[int(qid)] = [-_logit(rate), n]
+        self._trees.clear()
+
+    def update(self, player: str, results: Iterable[Tuple[int, Optional[bool]]]):
+        """Met à jour le joueur et les questions d'une partie : results = [(id question, correct)]."""
+        self._check_index()
+        prec = self.players.setdefault(player, [0.0, 0])
+        changed = []
+        for qid, correct in results:
+            qrec = self.questions.get(qid)
+            if qrec is None:
+                where = self._where.get(qid)
+                prior = self.difficulty(self._index[where[0][0]][where[0][1]]) if where else 0.0
+                qrec = self.questions[qid] = [prior, 0]
+            y = 1.0 if correct else 0.0
+            err = y - expected(prec[0], qrec[0])
+            # les pas diminuent avec le nombre de réponses déjà vues
+            prec[0] += K_PLAYER * err
+            qrec[0] -= K_QUESTION / math.sqrt(1 + qrec[1]) * err
+            prec[1] += 1
+            qrec[1] += 1
+            changed.append(qid)
+        self._refresh(changed)
+
+    # -----------------------------
+    # Arbres de poids
+    # -----------------------------
+
+    def _check_index(self):
+        # la banque remplace son index à chaque rechargement ; add_question l'allonge
+        index = self.bank._index
+        if index is not self._index or self.bank._indexed != self._indexed:
+            self._index, self._indexed = index, self.bank._indexed
+            self._trees.clear()
+            ids = self.bank.questions.ids
+            where: Dict[int, List[Tuple[tuple, int]]] = {}
+            for key, bucket in index.items():
+                for j, pos in enumerate(bucket):
+                    where.setdefault(ids[pos], []).append((key, j))
+            self._where = where
+
+    def _tree(self, band: float, key: tuple) -> Fenwick:
+        tree = self._trees.get((band, key))
+        if tree is None:
+            tree = Fenwick(weight(band, self.difficulty(p)) for p in self._index[key])
+            self._trees[(band, key)] = tree
+        return tree
+
+    def _refresh(self, qids: Iterable[int]):
+        self._check_index()
+        for qid in qids:
+            for key, j in self._where.get(qid, ()):
+                d = self.difficulty(self._index[key][j])
+                for band in BANDS:
+                    tree = self._trees.get((band, key))
+                    if tree is not None:
+                        tree.set(j, weight(band, d))
+
+    def sample(self, player: str, count: int, keys: List[tuple], rng=random,
+               skip: Optional[Callable[[int], bool]] = None,
+               keep: Optional[Callable[[int], None]] = None) -> List[int]:
+        """
+        Tire jusqu'à count positions distinctes dans les buckets keys, pondérées
+        selon l'écart entre le niveau du joueur et la difficulté de chaque question.
+        Les positions pour lesquelles skip est vrai ne servent qu'à compléter ;
+        keep est appelé pour chaque position retenue, au moment où elle l'est.
+        """
+        self._check_index()
+        skill = self.skill(player)
+        band = min(BANDS, key=lambda b: abs(b - skill))
+        trees = [(key, self._tree(band, key)) for key in keys if self._index.get(key)]
+        picks, removed, spare = [], [], []
+        try:
+            while len(picks) < count:
+                total = sum(t.total for _, t in trees)
+                if total <= 1e-9:
+                    break
+                u = rng.random() * total
+                for key, tree in trees:
+                    if u < tree.total or tree is trees[-1][1]:
+                        break
+                    u -= tree.total
+                j = tree.find(min(u, tree.total))
+                w = tree.weights[j]
+                if w <= 0:
+                    # reliquat d'arrondi après retraits : on recale ce total
+                    tree.total = sum(tree.weights)
+                    continue
+                # sans remise : poids mis à zéro le temps du tirage
+                tree.set(j, 0.0)
+                removed.append((tree, j, w))
+                pos = self._index[key][j]
+                if skip is not None and skip(pos):
+                    # réserve pleine : la position écartée est abandonnée
+                    if len(spare) < 4 * count:
+                        spare.append(pos)
+                else:
+                    picks.append(pos)
+                    if keep is not None:
+                        keep(pos)
+        finally:
+            for tree, j, w in reversed(removed):
+                tree.set(j, w)
+        fill = spare[:count - len(picks)]
+        if keep is not None:
+            for pos in fill:
+                keep(pos)
+        return picks + fill
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notes de difficulté pour le tirage adaptatif")
+    parser.add_argument("--ratings", default=RATINGS_FILE)
+    parser.add_argument("--seed-from", default=None, help="journal des réponses (telemetry.py) à utiliser")
+    parser.add_argument("--folder", default="questions")
+    args = parser.parse_args()
+
+    from question_bank import QuestionBank
+    sampler = AdaptiveSampler(QuestionBank(folder=args.folder), args.ratings)
+    if args.seed_from:
+        from telemetry import aggregate
+        stats = aggregate(args.seed_from)
+        sampler.seed(stats)
+        sampler.save()
+        print(f"{len(stats)} difficulté(s) initialisée(s) depuis {args.seed_from}")
+    hardest = sorted(sampler.questions.items(), key=lambda kv: -kv[1][0])[:10]
+    print(f"{len(sampler.questions)} question(s) notée(s), {len(sampler.players)} joueur(s)")
+    for qid, (d, n) in hardest:
+        print(f"  question {qid:>6} : difficulté {d:+.2f} ({int(n)} réponses)")
+
+
+if __name__ == "__main__":
+    main()
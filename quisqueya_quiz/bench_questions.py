@@ -0,0 +1,128 @@
+# bench_questions.py - Banque de questions : mémoire (dataclasses vs colonnes) et temps de démarrage
+# Usage : python bench_questions.py [--count 100000] [--startup --files 50]
+
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional
+
+from question_bank import QuestionBank
+from question_store import QuestionStore
+
+THEMES = ["Histoire", "Géographie", "Sciences", "Culture générale", "Informatique", "Mathématiques"]
+NIVEAUX = ["Facile", "Moyen", "Difficile"]
+
+
+@dataclass
+class DictQuestion:
+    """Représentation d'origine : dataclass avec __dict__ par instance."""
+    id: int
+    theme: str
+    niveau: str
+    texte: str
+    options: List[str]
+    bonne_option: int
+
+
+def make_questions(n: int, seed: int = 0, themes: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Génère n entrées de questions synthétiques, au format des fichiers questions/*.json."""
+    rng = random.Random(seed)
+    themes = themes or THEMES
+    for i in range(n):
+        theme = rng.choice(themes)
+        yield {
+            "id": i + 1,
+            "theme": theme,
+            "niveau": rng.choice(NIVEAUX),
+            "texte": f"Question {i} sur le thème {theme} : quelle est la bonne réponse parmi ces choix ?",
+            "options": [f"Réponse {i}-{k}" for k in range(4)],
+            "bonne_option": rng.randrange(4),
+        }
+
+
+def _measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def run(count: int, seed: int = 0) -> Dict[str, int]:
+    def build_dataclasses():
+        # themes/niveaux issus de json.load ne sont pas internés : on recopie les chaînes
+        return [
+            DictQuestion(d["id"], "".join(d["theme"]), "".join(d["niveau"]), d["texte"], d["options"], d["bonne_option"])
+            for d in make_questions(count, seed)
+        ]
+
+    def build_store():
+        store = QuestionStore()
+        for d in make_questions(count, seed):
+            store.add(d["id"], d["theme"], d["niveau"], d["texte"], d["options"], d["bonne_option"])
+        store.textes[0], store.options[0]  # force la concaténation
+        return store
+
+    return {"count": count, "dataclass_bytes": _measure(build_dataclasses), "store_bytes": _measure(build_store)}
+
+
+def write_bank(folder: str, count: int, files: int, seed: int = 0, themes: Optional[List[str]] = None) -> List[str]:
+    """Écrit count questions synthétiques réparties dans files fichiers JSON."""
+    per_file = max(1, count // files)
+    it = make_questions(count, seed, themes)
+    paths = []
+    for k in range(files):
+        chunk = [d for _, d in zip(range(per_file), it)]
+        path = os.path.join(folder, f"theme_{k:04d}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(chunk, f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def run_startup(count: int, files: int, seed: int = 0) -> Dict[str, float]:
+    """Temps de chargement de QuestionBank : séquentiel sans cache, à froid (parallèle), à chaud."""
+    res = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_bank(tmp, count, files, seed)
+        for name, kwargs in (("serial_nocache", {"cache": False, "workers": 1}),
+                             ("cold", {"cache": True}),
+                             ("warm", {"cache": True})):
+            t0 = time.perf_counter()
+            qb = QuestionBank(folder=tmp, **kwargs)
+            res[name] = time.perf_counter() - t0
+            assert len(qb.questions) > 0
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banque de questions : mémoire et démarrage")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup", action="store_true", help="mesure le démarrage à froid / à chaud")
+    parser.add_argument("--files", type=int, default=50)
+    args = parser.parse_args()
+    if args.startup:
+        r = run_startup(args.count, args.files, args.seed)
+        print(f"{args.count} questions dans {args.files} fichiers")
+        for name, secs in r.items():
+            print(f"  {name:<15}: {secs * 1000:8.1f} ms")
+        return
+    r = run(args.count, args.seed)
+    per = 100_000 / r["count"]
+    print(f"{r['count']} questions")
+    print(f"  dataclass (__dict__) : {r['dataclass_bytes'] / 2**20:8.1f} Mo  ({r['dataclass_bytes'] * per / 2**20:.1f} Mo / 100k)")
+    print(f"  QuestionStore        : {r['store_bytes'] / 2**20:8.1f} Mo  ({r['store_bytes'] * per / 2**20:.1f} Mo / 100k)")
+    print(f"  ratio                : {r['dataclass_bytes'] / max(1, r['store_bytes']):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# bench_storage.py - Compare les backends de stockage des scores (JSON / SQLite / partitions)
+# Usage : python bench_storage.py [--sizes 10000 100000 1000000]
+#         python bench_storage.py --leaderboard [--sizes 1000000]   (tri complet vs flux + tas, RSS max)
+#         python bench_storage.py --writers 4 [--threads 8] [--saves 500]  (sauvegardes concurrentes, débit)
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from storage import Storage, open_storage, score_key
+from shard_storage import ShardedStorage
+from sqlite_storage import SQLiteStorage
+
+THEMES = ["Histoire", "Géographie", "Sciences", "Culture générale", "Informatique", "mix"]
+
+
+def make_scores(n: int, seed: int = 0, themes: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Génère n entrées de score synthétiques, au format de QuizGame.play."""
+    rng = random.Random(seed)
+    themes = themes or THEMES
+    start = datetime(2025, 1, 1)
+    for i in range(n):
+        total = 10
+        bonnes = rng.randint(0, total)
+        player = f"joueur{rng.randint(1, max(1, n // 20))}"
+        yield {
+            "id_partie": f"{player}_{i}",
+            "joueur_nom": player,
+            "date_heure": (start + timedelta(seconds=i * 37)).isoformat(),
+            "theme": rng.choice(themes),
+            "niveau": "mix",
+            "nombre_questions": total,
+            "bonnes": bonnes,
+            "mauvaises": total - bonnes,
+            "score_total": bonnes,
+            "pourcentage": round(bonnes / total * 100, 1),
+            "duree_seconds": rng.randint(20, 150),
+        }
+
+
+def write_json_scores(path: str, entries: Iterable[Dict[str, Any]]):
+    """Écrit une liste JSON au format de scores.json sans la garder en mémoire."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        first = True
+        for e in entries:
+            if not first:
+                f.write(",\n")
+            f.write(json.dumps(e, ensure_ascii=False, indent=2))
+            first = False
+        f.write("\n]")
+
+
+def _timed(fn, repeat: int) -> float:
+    """Durée moyenne d'un appel, en millisecondes."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def bench_backend(name: str, storage, n: int, saves: int, queries: int, seed: int) -> Dict[str, Any]:
+    extra = list(make_scores(saves, seed=seed + 1))
+    it = iter(extra)
+    save_ms = _timed(lambda: storage.save_score(next(it)), saves)
+    top_ms = _timed(lambda: storage.top_n(10), queries)
+    theme_ms = _timed(lambda: storage.top_n(10, "Histoire"), queries)
+    return {"backend": name, "rows": n, "save_ms": save_ms, "top_n_ms": top_ms, "top_n_theme_ms": theme_ms}
+
+
+def run(sizes: List[int], saves: int = 5, queries: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            # JSON : préchargement direct du fichier, puis mesures via l'API Storage
+            jpath = os.path.join(tmp, "scores.json")
+            write_json_scores(jpath, make_scores(n, seed))
+            js = Storage(jpath)
+            results.append(bench_backend("json", js, n, saves, queries, seed))
+            js.close()
+
+            spath = os.path.join(tmp, "scores.db")
+            sq = SQLiteStorage(spath, legacy_path=None)
+            sq.save_many(make_scores(n, seed))
+            results.append(bench_backend("sqlite", sq, n, saves, queries, seed))
+            sq.close()
+
+            # partitions par thème et par mois, mois clos compactés
+            sh = ShardedStorage(os.path.join(tmp, "scores"), legacy_path=None)
+            sh.import_from(jpath)
+            sh.compact()
+            results.append(bench_backend("sharded", sh, n, saves, queries, seed))
+    return results
+
+
+def _leaderboard_child(mode: str, path: str, out):
+    import resource
+    t0 = time.perf_counter()
+    if mode == "full":
+        # ancien chemin : chargement complet, copie filtrée, tri complet
+        with open(path, "r", encoding="utf-8") as f:
+            all_scores = json.load(f)
+        all_scores = [s for s in all_scores if s.get("theme") == "Histoire"]
+        all_scores.sort(key=score_key)
+        top = all_scores[:50]
+    else:
+        top = Storage(path).top_n(50, "Histoire")
+    ms = (time.perf_counter() - t0) * 1000
+    # ru_maxrss : kilo-octets sous Linux
+    out.put((ms, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(top)))
+
+
+def run_leaderboard(sizes: List[int], seed: int = 0) -> List[Dict[str, Any]]:
+    """top_n(50, thème) : tri complet en mémoire vs flux + tas, chacun dans un processus neuf."""
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scores.json")
+            write_json_scores(path, make_scores(n, seed))
+            for mode in ("full", "stream"):
+                q = ctx.Queue()
+                p = ctx.Process(target=_leaderboard_child, args=(mode, path, q))
+                p.start()
+                ms, rss_kb, _ = q.get()
+                p.join()
+                results.append({"mode": mode, "rows": n, "ms": ms, "peak_rss_mb": rss_kb / 1024})
+    return results
+
+
+def _writer_child(backend: str, path: str, writer: int, threads: int, saves: int, start, out):
+    storage = open_storage(backend, path)
+    entries = list(make_scores(threads * saves, seed=writer + 1))
+    for i, e in enumerate(entries):
+        e["id_partie"] = f"w{writer}_{i}"
+
+    def work(chunk):
+        for e in chunk:
+            storage.save_score(e)
+
+    workers = [threading.Thread(target=work, args=(entries[t::threads],)) for t in range(threads)]
+    start.wait()
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    seconds = time.perf_counter() - t0
+    journal = getattr(storage, "journal", None)
+    fsyncs = journal.fsyncs if journal is not None else None
+    if hasattr(storage, "close"):
+        storage.close()
+    out.put((seconds, fsyncs))
+
+
+def run_writers(writers: int, threads: int, saves: int, backends: List[str]) -> List[Dict[str, Any]]:
+    """
+    writers processus x threads threads sauvegardent chacun saves scores dans le
+    même fichier ; vérifie ensuite qu'aucune entrée n'est perdue ni dupliquée.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    names = {"json": "scores.json", "log": "scores.jsonl", "sqlite": "scores.db", "sharded": "scores"}
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, names[backend])
+            open_storage(backend, path).close()
+            start = ctx.Event()
+            q = ctx.Queue()
+            procs = [ctx.Process(target=_writer_child, args=(backend, path, w, threads, saves, start, q))
+                     for w in range(writers)]
+            for p in procs:
+                p.start()
+            # laisse les processus importer et ouvrir le stockage avant le départ
+            time.sleep(1.0)
+            t0 = time.perf_counter()
+            start.set()
+            done = [q.get() for _ in procs]
+            wall = time.perf_counter() - t0
+            for p in procs:
+                p.join()
+            storage = open_storage(backend, path)
+            ids = [s.get("id_partie") for s in storage.load_all()]
+            storage.close()
+            total = writers * threads * saves
+            fsyncs = [f for _, f in done if f is not None]
+            results.append({
+                "backend": backend, "writers": writers, "threads": threads, "saves": total,
+                "saves_per_s": total / wall, "fsyncs": sum(fsyncs) if fsyncs else None,
+                "stored": len(ids), "unique": len(set(ids)),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des backends de stockage des scores")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--saves", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--leaderboard", action="store_true", help="compare tri complet et flux + tas (RSS max)")
+    parser.add_argument("--writers", type=int, default=0, help="nombre de processus écrivains concurrents")
+    parser.add_argument("--threads", type=int, default=8, help="threads écrivains par processus (avec --writers)")
+    parser.add_argument("--backends", nargs="+", choices=["json", "log", "sqlite", "sharded"],
+                        default=["json", "log", "sqlite", "sharded"])
+    args = parser.parse_args()
+
+    if args.writers:
+        saves = args.saves if args.saves != parser.get_default("saves") else 200
+        print(f"{'backend':<8} {'écrivains':>10} {'sauvegardes':>12} {'débit':>12} {'fsync':>7} {'stockées':>9}")
+        for r in run_writers(args.writers, args.threads, saves, args.backends):
+            fsyncs = "-" if r["fsyncs"] is None else str(r["fsyncs"])
+            status = "" if r["stored"] == r["unique"] == r["saves"] else "  ← PERTE / DOUBLON"
+            print(f"{r['backend']:<8} {r['writers']:>4} x {r['threads']:<3} {r['saves']:>12} "
+                  f"{r['saves_per_s']:>8.0f} /s {fsyncs:>7} {r['stored']:>9}{status}")
+        return
+
+    if args.leaderboard:
+        print(f"{'mode':<8} {'lignes':>9} {'top_n(50, thème)':>18} {'RSS max':>10}")
+        for r in run_leaderboard(args.sizes, args.seed):
+            print(f"{r['mode']:<8} {r['rows']:>9} {r['ms']:>15.0f} ms {r['peak_rss_mb']:>7.0f} Mo")
+        return
+
+    print(f"{'backend':<8} {'lignes':>9} {'save_score':>12} {'top_n':>10} {'top_n thème':>12}   (ms)")
+    for r in run(args.sizes, args.saves, args.queries, args.seed):
+        print(f"{r['backend']:<8} {r['rows']:>9} {r['save_ms']:>12.2f} {r['top_n_ms']:>10.2f} {r['top_n_theme_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
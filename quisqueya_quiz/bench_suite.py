@@ -0,0 +1,228 @@
+# bench_suite.py - Suite de benchmarks reproductibles : banque, tirages, stockage, partie complète
+# Usage : python bench_suite.py [--preset small|medium|large] [--out bench_results.json]
+#         python bench_suite.py --baseline bench_baseline.json      (compare, code de sortie 1 si régression)
+#         python bench_suite.py --save-baseline bench_baseline.json
+# Les tailles d'un preset se remplacent par --questions / --files / --themes / --scores.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+from bench_questions import write_bank
+from bench_storage import make_scores, write_json_scores
+from question_bank import QuestionBank
+from quiz import QuizGame
+from render import FAST, HeadlessRenderer
+from storage import open_storage
+
+PRESETS = {
+    "small": {"questions": 1_000, "files": 10, "themes": 10, "scores": 1_000},
+    "medium": {"questions": 100_000, "files": 50, "themes": 50, "scores": 100_000},
+    "large": {"questions": 1_000_000, "files": 200, "themes": 200, "scores": 10_000_000},
+}
+# Storage (JSON) réécrit tout le fichier à chaque sauvegarde : historique plafonné
+JSON_MAX_SCORES = 200_000
+# écart relatif au-delà duquel un résultat est signalé comme régression
+THRESHOLD = 0.20
+
+
+class ScriptedReader:
+    """Entrée simulée pour QuizGame.play_async : une réponse au hasard, sans attente."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def attach(self):
+        pass
+
+    def detach(self):
+        pass
+
+    def discard_stale(self):
+        pass
+
+    async def readline(self) -> str:
+        return str(self.rng.randint(1, 4))
+
+
+def measure(fn: Callable[[], Any], number: Optional[int] = None, repeat: int = 5, target: float = 0.05) -> Dict[str, float]:
+    """
+    Durée d'un appel en ms : médiane et minimum sur repeat séries de number appels.
+    Sans number, chaque série dure au moins target secondes (comme timeit.autorange).
+    """
+    if number is None:
+        t0 = time.perf_counter()
+        fn()
+        number = max(1, min(100_000, int(target / max(time.perf_counter() - t0, 1e-7))))
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) * 1000 / number)
+    return {"ms": statistics.median(runs), "min_ms": min(runs), "calls": number * repeat}
+
+
+def bench_bank(folder: str, themes: List[str], seed: int) -> Dict[str, Dict[str, float]]:
+    res = {}
+    res["bank_load_nocache"] = measure(lambda: QuestionBank(folder=folder, cache=False, workers=1), repeat=1)
+    QuestionBank(folder=folder)  # écrit l'instantané
+    res["bank_load_warm"] = measure(lambda: QuestionBank(folder=folder), repeat=3)
+
+    qb = QuestionBank(folder=folder, seed=seed)
+    res["filter_theme"] = measure(lambda: qb.filter(themes=[themes[0]]))
+    res["filter_theme_niveau"] = measure(lambda: qb.filter(themes=themes[:3], niveaux=["Moyen"]))
+    res["sample_unbalanced"] = measure(lambda: qb.sample_questions(10))
+    res["sample_balanced"] = measure(lambda: qb.sample_questions(10, balanced=True))
+    res["sample_theme"] = measure(lambda: qb.sample_questions(10, themes=[themes[1]]))
+    res["list_themes"] = measure(qb.list_themes)
+    return res
+
+
+def bench_storage(tmp: str, scores: int, seed: int) -> Dict[str, Dict[str, float]]:
+    res = {}
+    for backend, name in (("json", "scores.json"), ("log", "scores.jsonl"), ("sqlite", "scores.db"),
+                          ("sharded", "scores")):
+        path = os.path.join(tmp, name)
+        rows = min(scores, JSON_MAX_SCORES) if backend == "json" else scores
+        if backend == "json":
+            write_json_scores(path, make_scores(rows, seed))
+        else:
+            s = open_storage(backend, path)
+            batch = []
+            for e in make_scores(rows, seed):
+                batch.append(e)
+                if len(batch) >= 50_000:
+                    s.save_many(batch)
+                    batch = []
+            s.save_many(batch)
+            if hasattr(s, "compact"):
+                s.compact()
+            s.close()
+        storage = open_storage(backend, path)
+        extra = make_scores(10 ** 9, seed + 1)
+        res[f"save_score_{backend}"] = dict(measure(lambda: storage.save_score(next(extra)), repeat=3), rows=rows)
+        res[f"top_n_{backend}"] = dict(measure(lambda: storage.top_n(10), repeat=3), rows=rows)
+        res[f"top_n_theme_{backend}"] = dict(measure(lambda: storage.top_n(10, "Histoire"), repeat=3), rows=rows)
+        if hasattr(storage, "close"):
+            storage.close()
+    return res
+
+
+def bench_game(folder: str, tmp: str, seed: int) -> Dict[str, Dict[str, float]]:
+    qb = QuestionBank(folder=folder)
+    storage = open_storage("log", os.path.join(tmp, "games.jsonl"))
+    rng = random.Random(seed)
+
+    def play():
+        # équivalent de QuizGame.play, avec une entrée simulée
+        game = QuizGame(qb.sample_questions(10), "bench", storage, renderer=HeadlessRenderer(), pacing=FAST)
+        asyncio.run(game.play_async(ScriptedReader(rng)))
+
+    res = {"game_e2e": measure(play, repeat=3, target=0.5)}
+    storage.close()
+    return res
+
+
+def run(params: Dict[str, int], seed: int = 0, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    themes = [f"Thème {i:03d}" for i in range(params["themes"])]
+    results: Dict[str, Dict[str, float]] = {}
+    groups = only or ["bank", "storage", "game"]
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "questions")
+        os.mkdir(folder)
+        if "bank" in groups or "game" in groups:
+            write_bank(folder, params["questions"], params["files"], seed, themes)
+        if "bank" in groups:
+            results.update(bench_bank(folder, themes, seed))
+        if "storage" in groups:
+            results.update(bench_storage(tmp, params["scores"], seed))
+        if "game" in groups:
+            results.update(bench_game(folder, tmp, seed))
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "params": params,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare aux résultats de référence. Le ratio porte sur les minimums, moins
+    sensibles que les médianes aux autres processus de la machine ;
+    ratio > 1 + threshold = régression.
+    """
+    rows = []
+    for name, r in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("min_ms"):
+            continue
+        ratio = r["min_ms"] / base["min_ms"]
+        rows.append({"name": name, "ms": r["min_ms"], "baseline_ms": base["min_ms"], "ratio": ratio,
+                     "regression": ratio > 1 + threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks du quiz")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--questions", type=int, default=None)
+    parser.add_argument("--files", type=int, default=None)
+    parser.add_argument("--themes", type=int, default=None)
+    parser.add_argument("--scores", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=["bank", "storage", "game"], default=None)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="résultats de référence à comparer")
+    parser.add_argument("--save-baseline", default=None, help="enregistre aussi les résultats comme référence")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    current = run(params, args.seed, args.only)
+    current["meta"]["preset"] = args.preset
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    print(f"{params['questions']} questions / {params['files']} fichiers / {params['themes']} thèmes, {params['scores']} scores")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("params") != params:
+            print("[Warning] la référence a été mesurée avec d'autres tailles")
+    rows = {r["name"]: r for r in compare(current, baseline, args.threshold)} if baseline else {}
+    for name, r in current["results"].items():
+        line = f"  {name:<22} {r['ms']:>12.3f} ms"
+        if name in rows:
+            c = rows[name]
+            line += f"   réf. {c['baseline_ms']:>10.3f} ms  x{c['ratio']:.2f}" + ("  ← RÉGRESSION" if c["regression"] else "")
+        print(line)
+    print(f"résultats : {args.out}")
+    if any(r["regression"] for r in rows.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
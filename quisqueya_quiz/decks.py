@@ -0,0 +1,167 @@
+# decks.py - Paquets de questions pré-mélangés par (thème, niveau), tirages à coût constant
+import os
+import random
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# sélections (filtres thèmes / niveaux) gardées en cache au plus
+MAX_SELECTIONS = 256
+
+
+class Deck:
+    """
+    Permutation des positions d'un bucket, distribuée carte par carte. Le mélange
+    (Fisher-Yates) avance avec le curseur : une carte ne coûte qu'un tirage et un
+    échange ; un paquet épuisé repart du début et se remélange de la même façon.
+    """
+    __slots__ = ("cards", "cursor", "rng", "rounds")
+
+    def __init__(self, bucket: List[int], rng: random.Random):
+        self.cards = list(bucket)
+        self.cursor = 0
+        self.rng = rng
+        self.rounds = 0
+
+    def sync(self, bucket: List[int]):
+        # questions ajoutées au bucket depuis (add_question) : à la fin, encore à distribuer
+        if len(bucket) > len(self.cards):
+            self.cards.extend(bucket[len(self.cards):])
+
+    def deal(self) -> int:
+        cards = self.cards
+        i = self.cursor
+        n = len(cards)
+        if i >= n:
+            i = 0
+            self.rounds += 1
+        j = self.rng.randrange(i, n)
+        cards[i], cards[j] = cards[j], cards[i]
+        self.cursor = i + 1
+        return cards[i]
+
+
+class _Selection:
+    """Paquets d'un filtre (thèmes, niveaux) et bornes cumulées de leurs tailles."""
+    __slots__ = ("decks", "bounds", "total")
+
+    def __init__(self, decks: List[Deck]):
+        self.decks = decks
+        self.bounds = []
+        total = 0
+        for d in decks:
+            total += len(d.cards)
+            self.bounds.append(total)
+        self.total = total
+
+
+class DeckSet:
+    """
+    Un paquet par bucket (thème, niveau) de l'index de QuestionBank, chacun avec
+    son propre random.Random dérivé de la graine : mêmes graine et suite de
+    tirages, mêmes parties, sans toucher au générateur global du module random.
+    Les paquets sont recréés quand la banque est rechargée.
+    """
+
+    def __init__(self, bank, seed: Optional[int] = None):
+        self.bank = bank
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None):
+        """Repart de paquets neufs ; seed None = graine aléatoire."""
+        self.seed = int.from_bytes(os.urandom(8), "little") if seed is None else seed
+        # tirage du bucket et ordre final des questions d'une partie
+        self.rng = random.Random(f"{self.seed}:*")
+        self._decks: Dict[Tuple[str, str], Deck] = {}
+        self._selections: Dict[tuple, _Selection] = {}
+        self._index = None
+        self._indexed = -1
+
+    def _check_index(self):
+        bank = self.bank
+        if bank._index is not self._index:
+            self._index = bank._index
+            self._decks.clear()
+            self._selections.clear()
+        elif bank._indexed != self._indexed:
+            # questions ajoutées sans rechargement : les paquets se complètent
+            for key, deck in self._decks.items():
+                deck.sync(self._index[key])
+            self._selections.clear()
+        self._indexed = bank._indexed
+
+    def deck(self, key: Tuple[str, str]) -> Deck:
+        d = self._decks.get(key)
+        if d is None:
+            d = self._decks[key] = Deck(self._index[key], random.Random(f"{self.seed}:{key[0]}:{key[1]}"))
+        return d
+
+    def _selection(self, themes: Optional[List[str]], niveaux: Optional[List[str]], level: Optional[str]) -> _Selection:
+        cache_key = (tuple(themes) if themes else None, tuple(niveaux) if niveaux else None, level)
+        sel = self._selections.get(cache_key)
+        if sel is None:
+            wanted_t = set(themes) if themes else None
+            wanted_n = set(niveaux) if niveaux else None
+            keys = [
+                key for key, bucket in self._index.items()
+                if bucket and (wanted_t is None or key[0] in wanted_t) and (wanted_n is None or key[1] in wanted_n)
+                and (level is None or key[1].lower() == level)
+            ]
+            if len(self._selections) >= MAX_SELECTIONS:
+                self._selections.clear()
+            sel = self._selections[cache_key] = _Selection([self.deck(k) for k in sorted(keys)])
+        return sel
+
+    def deal(self, k: int, themes: Optional[List[str]] = None, niveaux: Optional[List[str]] = None,
+             level: Optional[str] = None, skip: Optional[Callable[[int], bool]] = None,
+             taken: Optional[Set[int]] = None, keep: Optional[Callable[[int], None]] = None) -> List[int]:
+        """
+        Distribue jusqu'à k positions distinctes (hors taken) parmi les buckets
+        retenus, chacun choisi au prorata de sa taille. Les positions pour
+        lesquelles skip est vrai ne servent qu'à compléter si le reste ne suffit pas.
+        keep est appelé pour chaque position retenue, au moment où elle l'est.
+        """
+        self._check_index()
+        sel = self._selection(themes, niveaux, level.lower() if level else None)
+        taken = set() if taken is None else taken
+        want = min(k, sel.total)
+        if want <= 0:
+            return []
+        picks, spare = [], []
+        decks, bounds, total, rand = sel.decks, sel.bounds, sel.total, self.rng.random
+
+        def offer(pos: int):
+            if pos in taken:
+                return
+            taken.add(pos)
+            if skip is not None and skip(pos):
+                spare.append(pos)
+            else:
+                picks.append(pos)
+                if keep is not None:
+                    keep(pos)
+
+        tries = want * 4 + 8
+        while len(picks) < want and tries:
+            tries -= 1
+            offer(decks[bisect_right(bounds, int(rand() * total))].deal())
+        if len(picks) + len(spare) < want:
+            # petite sélection presque épuisée : on parcourt les paquets
+            for d in decks:
+                for pos in d.cards:
+                    if len(picks) >= want:
+                        break
+                    offer(pos)
+        if len(picks) < want:
+            fill = spare[:want - len(picks)]
+            picks += fill
+            if keep is not None:
+                for pos in fill:
+                    keep(pos)
+        # les questions écartées non retenues restent disponibles pour la suite de la partie
+        for pos in spare:
+            if pos not in picks:
+                taken.discard(pos)
+        return picks
+
+    def shuffle(self, items: list):
+        self.rng.shuffle(items)
@@ -0,0 +1,69 @@
+# frames.py - Cache des questions pré-rendues pour l'affichage
+import threading
+from collections import OrderedDict
+from typing import Iterable, Tuple
+
+# corps de questions gardés au plus (les moins récemment affichés sont évincés)
+MAX_FRAMES = 4096
+
+
+def render_body(q) -> str:
+    """Tout l'affichage d'une question sauf « Question i/n » : thème, niveau, texte, options."""
+    parts = [f" [{q.theme} - {q.niveau}]\n", q.texte, "\n"]
+    for i, opt in enumerate(q.options, start=1):
+        parts.append(f"  {i}) {opt}\n")
+    return "".join(parts)
+
+
+class QuestionFrames:
+    """
+    Corps pré-rendus des questions, par id, avec éviction LRU. Seul l'en-tête
+    index/total est reconstruit à chaque affichage. QuestionBank invalide les
+    ids rechargés ; chaque corps garde aussi sa source (thème, niveau, texte,
+    options), comparée à chaque lecture : une partie en cours qui affiche encore
+    l'ancienne version d'une question, ou deux questions de même id, ne
+    partagent jamais un corps périmé.
+    """
+
+    def __init__(self, max_size: int = MAX_FRAMES):
+        self.max_size = max_size
+        self._frames: "OrderedDict[int, Tuple[tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def body(self, q) -> str:
+        source = (q.theme, q.niveau, q.texte, tuple(q.options))
+        with self._lock:
+            cached = self._frames.get(q.id)
+            if cached is not None and cached[0] == source:
+                self._frames.move_to_end(q.id)
+                self.hits += 1
+                return cached[1]
+        body = render_body(q)
+        with self._lock:
+            self.misses += 1
+            self._frames[q.id] = (source, body)
+            self._frames.move_to_end(q.id)
+            while len(self._frames) > self.max_size:
+                self._frames.popitem(last=False)
+        return body
+
+    def frame(self, q, index: int, total: int) -> str:
+        return f"Question {index}/{total}{self.body(q)}"
+
+    def invalidate(self, ids: Iterable[int]):
+        with self._lock:
+            for qid in ids:
+                self._frames.pop(qid, None)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+# cache partagé du processus (Question.format_for_display)
+FRAMES = QuestionFrames()
@@ -0,0 +1,420 @@
+# ingest.py - Import hors ligne de gros fichiers de questions (liste JSON ou JSON Lines)
+# Usage : python ingest.py dump.json [autre.jsonl ...] [--out questions] [--shard-size 5000]
+#         python ingest.py dump.jsonl --dry-run --errors erreurs.jsonl
+#         python ingest.py dump.jsonl --near-dups   (quasi-doublons des fichiers écrits, voir neardup.py)
+#
+# Chaîne de générateurs : lecture en flux -> validation -> normalisation (thème, niveau)
+# -> dédoublonnage des ids (index de hachage) -> fichiers par thème de --shard-size questions.
+# La mémoire ne dépend pas de la taille des fichiers, seulement du nombre d'ids (index).
+# Les fichiers sont écrits en .part puis renommés à la fin : la banque ne voit jamais
+# de fichier à moitié écrit.
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from question_loader import FIELDS, parse_question_file
+from question_store import QuestionStore
+from storage import iter_json_array
+
+SHARD_SIZE = 5000
+# fichiers de sortie ouverts en même temps au plus (les autres sont rouverts au besoin)
+MAX_OPEN = 64
+ERRORS_FILE = "ingest_errors.jsonl"
+REPORT_FILE = "ingest_report.json"
+PART_SUFFIX = ".part"
+NIVEAUX = ("Facile", "Moyen", "Difficile")
+
+
+def _fold(text: str) -> str:
+    """Clé de comparaison : sans accents, casse ni espaces superflus."""
+    text = unicodedata.normalize("NFKD", text)
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).casefold().split())
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", _fold(text)).strip("_") or "sans_theme"
+
+
+class Record:
+    """Une entrée en cours de traitement : origine (fichier, position) et contenu."""
+    __slots__ = ("source", "position", "item")
+
+    def __init__(self, source: str, position: int, item: Any):
+        self.source = source
+        self.position = position
+        self.item = item
+
+
+class ErrorSink:
+    """Erreurs au format JSON Lines (une par ligne) et compteurs par code."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.counts: Counter = Counter()
+        self.sample: List[Dict[str, Any]] = []
+        self._f = open(path, "w", encoding="utf-8") if path else None
+
+    def add(self, code: str, message: str, rec: Optional[Record] = None, qid: Any = None):
+        err = {"code": code, "message": message}
+        if rec is not None:
+            err.update(source=rec.source, position=rec.position)
+        if qid is not None:
+            err["id"] = qid
+        self.counts[code] += 1
+        if len(self.sample) < 20:
+            self.sample.append(err)
+        if self._f is not None:
+            self._f.write(json.dumps(err, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+
+
+# -----------------------------
+# Étapes
+# -----------------------------
+
+def _is_jsonl(path: str) -> bool:
+    if path.endswith(".jsonl"):
+        return True
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            c = f.read(1)
+            if not c or not c.isspace():
+                return c != "["
+
+
+def parse(paths: Iterable[str], errors: ErrorSink) -> Iterator[Record]:
+    """Entrées des fichiers, une par une (liste JSON lue par blocs, ou une ligne JSON par entrée)."""
+    for path in paths:
+        try:
+            if _is_jsonl(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    for lineno, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        try:
+                            yield Record(path, lineno, json.loads(line))
+                        except ValueError as e:
+                            errors.add("json", f"ligne illisible: {e}", Record(path, lineno, None))
+            else:
+                n = 0
+                try:
+                    for n, item in enumerate(iter_json_array(path), start=1):
+                        yield Record(path, n, item)
+                except ValueError as e:
+                    # liste JSON corrompue : la suite du fichier est perdue
+                    errors.add("json", f"liste JSON illisible après l'entrée {n}: {e}", Record(path, n + 1, None))
+        except OSError as e:
+            errors.add("io", f"impossible de lire {path}: {e}", Record(path, 0, None))
+
+
+def validate(records: Iterable[Record], errors: ErrorSink) -> Iterator[Record]:
+    """Mêmes règles que question_loader ; l'entrée devient un dict aux types vérifiés."""
+    for rec in records:
+        item = rec.item
+        if not isinstance(item, dict):
+            errors.add("format", "l'entrée n'est pas un objet JSON", rec)
+            continue
+        missing = [k for k in FIELDS if k not in item]
+        if missing:
+            errors.add("champs", f"champ(s) manquant(s): {', '.join(missing)}", rec, item.get("id"))
+            continue
+        try:
+            qid = int(item["id"])
+            options = item["options"]
+            if not isinstance(options, list) or len(options) < 2:
+                raise ValueError("options doit être une liste d'au moins 2 choix")
+            options = [str(o) for o in options]
+            bonne_option = int(item["bonne_option"])
+        except (TypeError, ValueError) as e:
+            errors.add("type", str(e), rec, item.get("id"))
+            continue
+        if not (0 <= bonne_option < len(options)):
+            errors.add("bonne_option", f"bonne_option {bonne_option} hors des {len(options)} options", rec, qid)
+            continue
+        if len(options) > 255:
+            errors.add("options", "trop d'options (255 au plus)", rec, qid)
+            continue
+        if not str(item["texte"]).strip():
+            errors.add("texte", "texte vide", rec, qid)
+            continue
+        rec.item = {"id": qid, "theme": str(item["theme"]), "niveau": str(item["niveau"]),
+                    "texte": str(item["texte"]), "options": options, "bonne_option": bonne_option}
+        yield rec
+
+
+class Normalizer:
+    """
+    Espaces et forme Unicode (NFC) de tous les textes ; niveaux ramenés à
+    Facile / Moyen / Difficile ; un thème écrit de plusieurs façons (casse,
+    accents) prend la première orthographe rencontrée.
+    """
+
+    def __init__(self):
+        self.themes: Dict[str, str] = {}
+        self.niveaux = {_fold(n): n for n in NIVEAUX}
+
+    @staticmethod
+    def clean(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def __call__(self, records: Iterable[Record]) -> Iterator[Record]:
+        for rec in records:
+            q = rec.item
+            theme = self.clean(q["theme"]) or "Divers"
+            q["theme"] = self.themes.setdefault(_fold(theme), theme)
+            niveau = self.clean(q["niveau"])
+            q["niveau"] = self.niveaux.get(_fold(niveau), niveau)
+            q["texte"] = self.clean(q["texte"])
+            q["options"] = [self.clean(o) for o in q["options"]]
+            yield rec
+
+
+def _digest(q: Dict[str, Any]) -> bytes:
+    body = json.dumps([q["theme"], q["niveau"], q["texte"], q["options"], q["bonne_option"]], ensure_ascii=False)
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=8).digest()
+
+
+class Deduper:
+    """
+    Index id -> empreinte (8 octets) du contenu. Un id déjà vu avec le même
+    contenu est un doublon (écarté) ; avec un autre contenu, un conflit (signalé,
+    la première version est gardée).
+    """
+
+    def __init__(self):
+        self.index: Dict[int, bytes] = {}
+        self.duplicates = 0
+
+    def seed(self, records: Iterable[Record]) -> int:
+        """Ajoute à l'index des questions déjà en place (normalisées) ; retourne leur nombre."""
+        n = 0
+        for rec in records:
+            self.index.setdefault(rec.item["id"], _digest(rec.item))
+            n += 1
+        return n
+
+    def __call__(self, records: Iterable[Record], errors: ErrorSink) -> Iterator[Record]:
+        index = self.index
+        for rec in records:
+            q = rec.item
+            digest = _digest(q)
+            known = index.get(q["id"])
+            if known is None:
+                index[q["id"]] = digest
+                yield rec
+            elif known == digest:
+                self.duplicates += 1
+            else:
+                errors.add("conflit_id", "id déjà utilisé par une autre question", rec, q["id"])
+
+
+def existing(folder: str) -> Iterator[Record]:
+    """Questions valides des fichiers déjà présents dans folder, fichier par fichier."""
+    for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        store = QuestionStore()
+        store.extend_chunk(parse_question_file(path)["chunk"])
+        for i, q in enumerate(store, start=1):
+            yield Record(path, i, {"id": q.id, "theme": q.theme, "niveau": q.niveau, "texte": q.texte,
+                                   "options": list(q.options), "bonne_option": q.bonne_option})
+
+
+# -----------------------------
+# Écriture
+# -----------------------------
+
+class _Shard:
+    __slots__ = ("path", "count", "f")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.f = None
+
+
+class ShardWriter:
+    """
+    Fichiers <out>/<thème>_<NNN>.json d'au plus shard_size questions, écrits en
+    flux (liste JSON) sous le nom .part, renommés par close(). Au plus MAX_OPEN
+    fichiers ouverts : un fichier refermé est rouvert en retirant son « ] » final.
+    """
+
+    def __init__(self, out: str, shard_size: int = SHARD_SIZE, max_open: int = MAX_OPEN):
+        self.out = out
+        self.shard_size = shard_size
+        self.max_open = max_open
+        self.current: Dict[str, _Shard] = {}
+        self.done: List[str] = []
+        self._open: "OrderedDict[str, _Shard]" = OrderedDict()
+        self.written = 0
+        os.makedirs(out, exist_ok=True)
+
+    def _next_path(self, key: str) -> str:
+        n = 1
+        while True:
+            path = os.path.join(self.out, f"{key}_{n:03d}.json")
+            if not os.path.exists(path) and not os.path.exists(path + PART_SUFFIX) and path not in self.done:
+                return path
+            n += 1
+
+    def _close(self, shard: _Shard):
+        if shard.f is not None:
+            shard.f.write("\n]\n")
+            shard.f.close()
+            shard.f = None
+        self._open.pop(shard.path, None)
+
+    def _file(self, shard: _Shard):
+        if shard.f is None:
+            while len(self._open) >= self.max_open:
+                self._close(next(iter(self._open.values())))
+            part = shard.path + PART_SUFFIX
+            if shard.count:
+                shard.f = open(part, "r+", encoding="utf-8", newline="\n")
+                # retire "\n]\n" pour continuer la liste
+                shard.f.seek(0, os.SEEK_END)
+                shard.f.seek(shard.f.tell() - 3)
+                shard.f.truncate()
+            else:
+                shard.f = open(part, "w", encoding="utf-8", newline="\n")
+                shard.f.write("[")
+        self._open[shard.path] = shard
+        self._open.move_to_end(shard.path)
+        return shard.f
+
+    def write(self, q: Dict[str, Any]):
+        key = slug(q["theme"])
+        shard = self.current.get(key)
+        if shard is None or shard.count >= self.shard_size:
+            if shard is not None:
+                self._close(shard)
+                self.done.append(shard.path)
+            shard = self.current[key] = _Shard(self._next_path(key))
+        f = self._file(shard)
+        f.write(("\n  " if not shard.count else ",\n  ") + json.dumps(q, ensure_ascii=False))
+        shard.count += 1
+        self.written += 1
+
+    def close(self) -> List[str]:
+        """Termine les fichiers et les publie (renommage) ; retourne leurs chemins."""
+        for shard in self.current.values():
+            self._close(shard)
+            self.done.append(shard.path)
+        self.current.clear()
+        for path in self.done:
+            os.replace(path + PART_SUFFIX, path)
+        return list(self.done)
+
+
+# -----------------------------
+# Commande
+# -----------------------------
+
+def ingest(paths: List[str], out: str = "questions", shard_size: int = SHARD_SIZE, dry_run: bool = False,
+           errors_path: Optional[str] = ERRORS_FILE, check_existing: bool = True) -> Dict[str, Any]:
+    """Importe les fichiers paths dans out ; retourne le rapport (compteurs, erreurs, débit)."""
+    t0 = time.perf_counter()
+    errors = ErrorSink(errors_path)
+    counts = Counter()
+    normalize = Normalizer()
+    deduper = Deduper()
+    # les thèmes déjà en place fixent l'orthographe des nouveaux
+    known = deduper.seed(normalize(existing(out))) if check_existing and os.path.isdir(out) else 0
+
+    def counted(records: Iterable[Record], name: str) -> Iterator[Record]:
+        for rec in records:
+            counts[name] += 1
+            yield rec
+
+    pipeline = counted(parse(paths, errors), "lues")
+    pipeline = counted(validate(pipeline, errors), "valides")
+    pipeline = normalize(pipeline)
+    pipeline = counted(deduper(pipeline, errors), "uniques")
+    writer = None if dry_run else ShardWriter(out, shard_size)
+    files: List[str] = []
+    try:
+        for rec in pipeline:
+            if writer is not None:
+                writer.write(rec.item)
+    finally:
+        if writer is not None:
+            files = writer.close()
+        errors.close()
+    seconds = time.perf_counter() - t0
+    size = sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+    return {
+        "sources": paths,
+        "out": None if dry_run else out,
+        "files": files,
+        "stats": {
+            "lues": counts["lues"],
+            "valides": counts["valides"],
+            "ecrites": counts["uniques"] if not dry_run else 0,
+            "doublons": deduper.duplicates,
+            "deja_presentes": known,
+            "erreurs": sum(errors.counts.values()),
+            "secondes": round(seconds, 3),
+            "questions_par_s": round(counts["lues"] / seconds) if seconds else None,
+            "mo_par_s": round(size / 1e6 / seconds, 2) if seconds else None,
+        },
+        "erreurs_par_code": dict(errors.counts),
+        "exemples_erreurs": errors.sample,
+        "fichier_erreurs": errors_path,
+    }
+
+
+def near_duplicates(out: str) -> List[Dict[str, Any]]:
+    """
+    Quasi-doublons touchant les fichiers de out nouveaux ou modifiés depuis le
+    dernier passage (les signatures des autres sont reprises de neardup.CACHE_NAME).
+    """
+    from neardup import CACHE_NAME, NearDupIndex
+    from question_bank import QuestionBank
+    bank = QuestionBank(folder=out)
+    index = NearDupIndex(os.path.join(out, CACHE_NAME))
+    return [{"id": a, "proche_de": b, "similarite": s} for a, b, s in index.build(bank.questions, bank.file_entries())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en flux de fichiers de questions (liste JSON ou JSON Lines)")
+    parser.add_argument("paths", nargs="+", help="fichiers à importer")
+    parser.add_argument("--out", default="questions", help="dossier des questions (défaut : questions)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="questions par fichier écrit")
+    parser.add_argument("--dry-run", action="store_true", help="valide seulement, n'écrit aucun fichier de questions")
+    parser.add_argument("--errors", default=ERRORS_FILE, help="erreurs, une par ligne (JSON Lines)")
+    parser.add_argument("--report", default=REPORT_FILE, help="rapport final (JSON)")
+    parser.add_argument("--no-existing", action="store_true", help="n'indexe pas les ids déjà présents dans --out")
+    parser.add_argument("--near-dups", action="store_true", help="cherche ensuite les quasi-doublons des questions écrites")
+    args = parser.parse_args()
+
+    report = ingest(args.paths, args.out, max(1, args.shard_size), args.dry_run, args.errors, not args.no_existing)
+    if args.near_dups and report["files"]:
+        report["quasi_doublons"] = near_duplicates(args.out)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    s = report["stats"]
+    print(f"[Info] {s['lues']} lue(s), {s['valides']} valide(s), {s['ecrites']} écrite(s), "
+          f"{s['doublons']} doublon(s), {s['erreurs']} erreur(s)")
+    print(f"[Info] {s['secondes']} s — {s['questions_par_s']} questions/s, {s['mo_par_s']} Mo/s")
+    for code, n in sorted(report["erreurs_par_code"].items()):
+        print(f"   {code:<14} {n}")
+    if report["files"]:
+        print(f"[Info] {len(report['files'])} fichier(s) écrit(s) dans {args.out}/")
+    if "quasi_doublons" in report:
+        print(f"[Info] {len(report['quasi_doublons'])} paire(s) de quasi-doublons (détail dans le rapport)")
+    print(f"rapport : {args.report}, erreurs : {args.errors}")
+    sys.exit(1 if s["erreurs"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# journal.py - Journal d'écriture anticipée des scores (group commit, verrous fcntl)
+import glob
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
+
+try:
+    import fcntl
+except ImportError:  # Windows : un seul processus écrivain
+    fcntl = None
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def journal_paths(base: str) -> List[str]:
+    """Journaux de tous les écrivains (un par processus) du fichier de scores base."""
+    return sorted(glob.glob(glob.escape(base) + ".*" + JOURNAL_SUFFIX))
+
+
+def read_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Entrées complètes d'un journal ; une dernière ligne tronquée (arrêt brutal) est ignorée."""
+    try:
+        with open(path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool, blocking: bool = True):
+    """
+    Verrou inter-processus (flock) sur le fichier path ; produit False si
+    blocking=False et le verrou est pris. Un descripteur par acquisition : les
+    verrous d'un même processus s'excluent alors aussi entre threads.
+    """
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+
+def _writer_alive(path: str) -> bool:
+    # nom : <base>.<pid>-<suffixe>.journal
+    try:
+        pid = int(path[:-len(JOURNAL_SUFFIX)].rsplit(".", 1)[1].split("-", 1)[0])
+    except (IndexError, ValueError):
+        return True
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class ScoreJournal:
+    """
+    Journal JSON Lines propre à un processus écrivain, à côté du fichier de scores.
+
+    append() rend la main une fois les entrées sur disque (fsync). Les threads qui
+    écrivent en même temps sont regroupés : l'un d'eux écrit et synchronise tout
+    le lot en attente pendant que les autres attendent (group commit).
+    Les ajouts prennent le verrou partagé de <base>.lock, l'intégration des
+    journaux au fichier de scores (voir Storage.checkpoint) le verrou exclusif.
+    """
+
+    def __init__(self, base: str):
+        self.base = base
+        self.path = f"{base}.{os.getpid()}-{uuid.uuid4().hex[:8]}{JOURNAL_SUFFIX}"
+        self.lock_path = f"{base}.lock"
+        self._fd = None
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._seq = 0
+        self._synced = 0
+        self._syncing = False
+        self._failed = (0, 0, None)
+        # entrées écrites depuis la dernière intégration
+        self.unchecked = 0
+        self.fsyncs = 0
+
+    def locked(self, exclusive: bool, blocking: bool = True):
+        """Verrou de <base>.lock (voir file_lock)."""
+        return file_lock(self.lock_path, exclusive, blocking)
+
+    def append(self, lines: List[bytes]):
+        """Ajoute des lignes JSON (terminées par \\n) et attend qu'elles soient sur disque."""
+        with self._cond:
+            self._pending.extend(lines)
+            self._seq += 1
+            mine = self._seq
+            while self._synced < mine:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                # ce thread devient meneur : il écrit tout ce qui attend
+                self._syncing = True
+                batch, self._pending = self._pending, []
+                upto = self._seq
+                self._cond.release()
+                error = None
+                try:
+                    self._write(b"".join(batch))
+                except OSError as e:
+                    error = e
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                if error is not None:
+                    self._failed = (self._synced, upto, error)
+                else:
+                    self.unchecked += len(batch)
+                self._synced = upto
+                self._cond.notify_all()
+            lo, hi, error = self._failed
+            if error is not None and lo < mine <= hi:
+                raise error
+
+    def _write(self, data: bytes):
+        with self.locked(exclusive=False):
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, data)
+            os.fsync(self._fd)
+            self.fsyncs += 1
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Entrées de tous les journaux non encore intégrés (à lire sous verrou)."""
+        for p in journal_paths(self.base):
+            yield from read_journal(p)
+
+    def reset_all(self, paths: List[str]):
+        """
+        Vide les journaux intégrés (sous verrou exclusif). Ceux d'écrivains encore
+        vivants sont tronqués (leur descripteur O_APPEND repart de zéro), les autres supprimés.
+        """
+        for p in paths:
+            try:
+                if p != self.path and not _writer_alive(p):
+                    os.remove(p)
+                else:
+                    os.truncate(p, 0)
+            except FileNotFoundError:
+                pass
+        self.unchecked = 0
+
+    def close(self):
+        with self._cond:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            try:
+                if os.path.getsize(self.path) == 0:
+                    os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,228 @@
+# leaderboard.py - Classement global de plusieurs instances du quiz (fusion k-voies, dédoublonnage par id_partie)
+# Usage : python leaderboard.py noeud1/scores.json noeud2/scores.jsonl [--state leaderboard.json] [--top 10] [--theme Histoire]
+#
+# Chaque instance écrit ses propres scores (Storage : scores.json, LogStorage : scores.jsonl).
+# L'état (leaderboard.json) garde le top par thème et, par instance, la position déjà
+# fusionnée : une mise à jour ne lit que les entrées ajoutées depuis.
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from journal import journal_paths, read_journal
+from log_storage import ALL_THEMES, INDEX_DEPTH
+from storage import score_key
+
+LEADERBOARD_FILE = "leaderboard.json"
+# octets avant la position mémorisée servant à vérifier que le fichier n'a pas été remplacé
+TAIL_BYTES = 64
+
+
+def merge_sorted(streams: Iterable[Iterable[Dict[str, Any]]], n: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Fusion k-voies de flux déjà triés par score_key, sans doublon d'id_partie.
+    Deux copies d'une même partie ont la même clé de tri et se suivent donc :
+    seuls les ids de la clé courante sont mémorisés.
+    """
+    last = None
+    ids = set()
+    count = 0
+    for e in heapq.merge(*streams, key=score_key):
+        key = score_key(e)
+        if key != last:
+            last = key
+            ids.clear()
+        gid = e.get("id_partie")
+        if gid is not None:
+            if gid in ids:
+                continue
+            ids.add(gid)
+        yield e
+        count += 1
+        if n is not None and count >= n:
+            return
+
+
+def _tail(path: str, offset: int) -> str:
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_BYTES))
+        return hashlib.sha1(f.read(min(offset, TAIL_BYTES))).hexdigest()
+
+
+def read_json_array_from(path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Éléments d'une liste JSON (scores.json) situés après l'octet offset, qui doit
+    suivre un élément déjà lu (ou valoir 0). Retourne (entrées, nouvel offset).
+    Storage ne fait qu'ajouter en fin de liste : les octets avant offset ne changent pas.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        text = f.read().decode("utf-8")
+    decoder = json.JSONDecoder()
+    entries = []
+    pos = 0
+    consumed = 0
+    started = offset > 0
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        if not started:
+            if text[pos] != "[":
+                raise ValueError(f"{path} ne contient pas une liste JSON")
+            started = True
+            pos += 1
+            continue
+        obj, pos = decoder.raw_decode(text, pos)
+        entries.append(obj)
+        consumed = pos
+    return entries, offset + len(text[:consumed].encode("utf-8"))
+
+
+def read_lines_from(path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """Lignes complètes d'un journal JSON Lines (scores.jsonl) après l'octet offset."""
+    entries = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                entries.append(json.loads(raw))
+            except ValueError:
+                continue
+    return entries, offset
+
+
+class GlobalLeaderboard:
+    """
+    Top depth par thème (et tous thèmes confondus) des scores de plusieurs instances.
+    update() lit chez chaque instance les entrées ajoutées depuis sa position
+    mémorisée (high-water mark), les trie, puis les fusionne avec le classement
+    courant (merge_sorted). Les journaux non intégrés d'un Storage sont relus à
+    chaque fois : leurs entrées sont dédoublonnées quand elles arrivent dans scores.json.
+    """
+
+    def __init__(self, state_path: Optional[str] = LEADERBOARD_FILE, depth: int = INDEX_DEPTH):
+        self.state_path = state_path
+        self.depth = depth
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.themes: Dict[str, List[Dict[str, Any]]] = {}
+        if state_path and os.path.isfile(state_path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Warning] état du classement illisible ({self.state_path}), reconstruction: {e}")
+            return
+        self.nodes = state.get("nodes", {})
+        if state.get("depth") == self.depth:
+            self.themes = state.get("themes", {})
+        else:
+            # profondeur changée : tout relire
+            for node in self.nodes.values():
+                node.update(offset=0, count=0, tail=None)
+
+    def save(self):
+        if not self.state_path:
+            return
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"depth": self.depth, "nodes": self.nodes, "themes": self.themes}, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def add_node(self, path: str, name: Optional[str] = None) -> str:
+        name = name or path
+        if name not in self.nodes:
+            self.nodes[name] = {"path": path, "offset": 0, "count": 0, "tail": None}
+        else:
+            self.nodes[name]["path"] = path
+        return name
+
+    def _read_node(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        path = node["path"]
+        offset = node["offset"]
+        try:
+            if offset and (os.path.getsize(path) < offset or _tail(path, offset) != node["tail"]):
+                # fichier remplacé ou tronqué : relecture complète (les doublons sont écartés)
+                print(f"[Warning] {path} a été remplacé, relecture complète")
+                offset = node["offset"] = node["count"] = 0
+            if path.endswith(".jsonl"):
+                entries, offset = read_lines_from(path, offset)
+            else:
+                entries, offset = read_json_array_from(path, offset)
+        except FileNotFoundError:
+            entries = []
+        except (OSError, ValueError) as e:
+            print(f"[Warning] instance {path} ignorée: {e}")
+            return []
+        node["count"] += len(entries)
+        node["offset"] = offset
+        node["tail"] = _tail(path, offset) if offset else None
+        if not path.endswith(".jsonl"):
+            for p in journal_paths(path):
+                entries.extend(read_journal(p))
+        return entries
+
+    def update(self) -> Dict[str, int]:
+        """Fusionne les nouvelles entrées de chaque instance ; retourne leur nombre par instance."""
+        stats = {}
+        by_theme: Dict[str, List[List[Dict[str, Any]]]] = {}
+        for name, node in self.nodes.items():
+            entries = [e for e in self._read_node(node) if isinstance(e, dict)]
+            stats[name] = len(entries)
+            if not entries:
+                continue
+            # flux trié de l'instance, par thème
+            entries.sort(key=score_key)
+            groups: Dict[str, List[Dict[str, Any]]] = {ALL_THEMES: entries[:self.depth]}
+            for e in entries:
+                theme = e.get("theme")
+                if theme is not None:
+                    top = groups.setdefault(theme, [])
+                    if len(top) < self.depth:
+                        top.append(e)
+            for theme, top in groups.items():
+                by_theme.setdefault(theme, []).append(top)
+        for theme, streams in by_theme.items():
+            self.themes[theme] = list(merge_sorted([self.themes.get(theme, [])] + streams, self.depth))
+        return stats
+
+    def top_n(self, n: int = 10, theme: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Les n meilleurs scores de toutes les instances (n au plus depth)."""
+        return [dict(s) for s in self.themes.get(theme or ALL_THEMES, [])[:n]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classement global de plusieurs instances")
+    parser.add_argument("nodes", nargs="*", help="fichiers de scores des instances (scores.json ou .jsonl)")
+    parser.add_argument("--state", default=LEADERBOARD_FILE, help="état du classement fusionné")
+    parser.add_argument("--depth", type=int, default=INDEX_DEPTH, help="scores gardés par thème")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--theme", default=None)
+    args = parser.parse_args()
+
+    board = GlobalLeaderboard(args.state, args.depth)
+    for path in args.nodes:
+        board.add_node(path)
+    if not board.nodes:
+        print("[Error] aucune instance : indiquez au moins un fichier de scores")
+        return
+    for name, n in board.update().items():
+        print(f"[Info] {name} : {n} nouvelle(s) entrée(s)")
+    board.save()
+    print(f"\n🏆 {args.theme or 'Tous les thèmes'}")
+    for i, s in enumerate(board.top_n(args.top, args.theme), start=1):
+        print(f"{i:>3}. {s.get('joueur_nom'):<20} {s.get('score_total'):>4} pts  {s.get('pourcentage')}%  {s.get('date_heure', '')[:10]}  {s.get('theme')}")
+
+
+if __name__ == "__main__":
+    main()
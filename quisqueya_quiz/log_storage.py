@@ -0,0 +1,225 @@
+# log_storage.py
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+from storage import SCORES_FILE, score_filter, score_key, top_n_stream
+import metrics
+
+LOG_FILE = "scores.jsonl"
+# profondeur de l'index du classement (show_leaderboard plafonne à 50)
+INDEX_DEPTH = 50
+# clé de l'index regroupant tous les thèmes
+ALL_THEMES = "*"
+
+
+def migrate_json_scores(src: str, dst: str) -> int:
+    """
+    Migration unique : convertit l'ancien scores.json (liste JSON) en journal
+    JSON Lines. Le fichier source n'est pas modifié. Retourne le nombre d'entrées.
+    """
+    with open(src, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{src} ne contient pas une liste de scores")
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for entry in data:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, dst)
+    return len(data)
+
+
+class LogStorage:
+    """
+    Stockage des scores en journal append-only (une entrée JSON par ligne).
+
+    Chaque sauvegarde ajoute une seule ligne au journal ; le fsync est groupé
+    (toutes les fsync_every entrées, et au plus fsync_interval secondes après
+    une entrée : une minuterie s'en charge si aucune sauvegarde ne suit).
+    Un index sur disque garde le top INDEX_DEPTH par thème ; il mémorise la
+    position du journal qu'il couvre et ne relit que les lignes ajoutées depuis,
+    y compris celles écrites par d'autres processus.
+    """
+
+    def __init__(self, path: str = LOG_FILE, legacy_path: Optional[str] = SCORES_FILE,
+                 fsync_every: int = 8, fsync_interval: float = 2.0, index_depth: int = INDEX_DEPTH):
+        self.path = path
+        self.index_path = f"{path}.index"
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = fsync_interval
+        self.index_depth = index_depth
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # fsync différé des entrées en attente (serveur inactif)
+        self._timer: Optional[threading.Timer] = None
+        if not os.path.isfile(self.path) and legacy_path and os.path.isfile(legacy_path):
+            try:
+                n = migrate_json_scores(legacy_path, self.path)
+                print(f"[Info] {n} score(s) migré(s) de {legacy_path} vers {self.path}")
+            except Exception as e:
+                print(f"[Warning] migration de {legacy_path} impossible: {e}")
+        self._fh = open(self.path, "ab")
+        self._index = self._load_index()
+        atexit.register(self.close)
+
+    # -----------------------------
+    # Journal
+    # -----------------------------
+
+    def save_score(self, entry: Dict[str, Any]):
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            # une seule écriture O_APPEND : les écrivains concurrents ne s'écrasent pas
+            self._fh.write(line)
+            self._fh.flush()
+            metrics.inc("storage_bytes_written", len(line))
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+            if self._catch_up():
+                self._write_index()
+
+    def save_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute un lot d'entrées en une seule écriture, suivie d'un fsync."""
+        lines = [json.dumps(e, ensure_ascii=False) + "\n" for e in entries]
+        data = "".join(lines).encode("utf-8")
+        with self._lock:
+            self._fh.write(data)
+            self._fh.flush()
+            metrics.inc("storage_bytes_written", len(data))
+            self._sync()
+            if self._catch_up():
+                self._write_index()
+        return len(lines)
+
+    def flush(self):
+        """Force le fsync des entrées en attente."""
+        with self._lock:
+            if self._pending:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fh.closed:
+                return
+            if self._pending:
+                self._sync()
+            self._fh.close()
+
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            if self._pending and not self._fh.closed:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def iter_entries(self, start: int = 0):
+        """
+        Parcourt le journal à partir de l'octet start.
+        Produit (offset_fin_de_ligne, entrée) ; une dernière ligne incomplète est ignorée.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                pos = start
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    pos += len(raw)
+                    try:
+                        yield pos, json.loads(raw)
+                    except ValueError:
+                        # ligne corrompue : ignorée mais on avance
+                        continue
+        except FileNotFoundError:
+            return
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        return [entry for _, entry in self.iter_entries()]
+
+    def iter_scores(self):
+        """Parcourt les scores un par un (même interface que Storage.iter_scores)."""
+        self.flush()
+        for _, entry in self.iter_entries():
+            yield entry
+
+    # -----------------------------
+    # Index du classement
+    # -----------------------------
+
+    def _empty_index(self) -> Dict[str, Any]:
+        return {"offset": 0, "depth": self.index_depth, "themes": {}}
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                idx = json.load(f)
+            if idx.get("depth") != self.index_depth or idx.get("offset", 0) > os.path.getsize(self.path):
+                # profondeur changée ou journal remplacé : reconstruction
+                return self._empty_index()
+            return idx
+        except Exception:
+            return self._empty_index()
+
+    def _write_index(self):
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+        except Exception as e:
+            print(f"[Warning] impossible d'écrire l'index {self.index_path}: {e}")
+
+    def _insert(self, entry: Dict[str, Any]):
+        themes = self._index["themes"]
+        for key in (ALL_THEMES, entry.get("theme")):
+            if key is None:
+                continue
+            top = themes.setdefault(key, [])
+            if len(top) >= self.index_depth and score_key(entry) >= score_key(top[-1]):
+                continue
+            top.append(entry)
+            top.sort(key=score_key)
+            del top[self.index_depth:]
+
+    def _catch_up(self) -> bool:
+        """Intègre dans l'index les lignes ajoutées depuis sa dernière position."""
+        changed = False
+        for pos, entry in self.iter_entries(self._index["offset"]):
+            if isinstance(entry, dict):
+                self._insert(entry)
+            self._index["offset"] = pos
+            changed = True
+        return changed
+
+    def top_n(self, n: int = 10, theme: Optional[str] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Les n meilleurs scores, depuis l'index pour un filtre par thème seul.
+        Autres filtres (niveau, player, since, until) ou n au-delà de la profondeur
+        de l'index : parcours du journal ligne à ligne avec un tas de taille n.
+        """
+        if n > self.index_depth or any(filters.values()):
+            entries = (entry for _, entry in self.iter_entries())
+            return top_n_stream(entries, n, score_filter(theme, **filters))
+        with self._lock:
+            if self._catch_up():
+                self._write_index()
+            top = self._index["themes"].get(theme or ALL_THEMES, [])
+            return [dict(s) for s in top[:n]]
@@ -1,57 +1,285 @@
 # main.py - Point d'entrée principal du Quisqueya Système Quiz
 # Ce fichier gère l'interface utilisateur et la navigation dans les menus
+# Usage : python main.py [--countdown 10] [--startup-report] [--startup-budget 300 --startup-only]
+#
+# Démarrage rapide : la banque de questions et le stockage des scores se chargent
+# en arrière-plan pendant l'écran d'accueil ; les modules qui ne servent pas au
+# premier menu (banque, parties, stockage, télémétrie) sont importés à ce moment-là.
+
+import time
+_T0 = time.perf_counter()
 
-from question_bank import QuestionBank
-from storage import Storage
-from quiz import QuizGame
 from utils import clear, safe_input, safe_int, choose_from_list
+import metrics
+import argparse
+import importlib
 import os
-import time
+import sys
 import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from question_bank import QuestionBank
+    from storage import Storage
+    from telemetry import AnswerLog
+
+# durée du compte à rebours de l'écran d'accueil (0 = pas d'écran d'accueil)
+COUNTDOWN_ENV = "QUISQUEYA_COUNTDOWN"
+COUNTDOWN = 10
+# dossier de questions de repli si questions/ est vide
+FALLBACK_FOLDER = "/mnt/data/quisqueya_questions_by_theme"
 
 # -----------------------------
-# Fonctions utilitaires
+# Cadres fixes (construits une seule fois)
 # -----------------------------
 
-def welcome_and_countdown(seconds: int = 10):
-    clear()
-    print("\n╔" + "═" * 60 + "╗")
-    print("║" + " " * 60 + "║")
-    print("║" + "    🎓 BIENVENUE DANS QUISQUEYA SYSTÈME QUIZ 🎓    ".center(57) + "║")
-    print("║" + " " * 60 + "║")
-    print("╚" + "═" * 60 + "╝")
-    print("\n📌 Appuyez sur [ENTRÉE] pour accéder immédiatement au menu")
-    print("⏱️  Sinon, le menu apparaîtra après le compte à rebours...\n")
-
-    skip = {"pressed": False}
-    def wait_enter():
-        try:
-            input()
-            skip["pressed"] = True
-        except:
-            skip["pressed"] = False
+RULE = "─" * 60
+
+
+def _banner(*titles: str) -> str:
+    return "\n" + "═" * 60 + "\n" + "".join(t.center(60) + "\n" for t in titles) + "═" * 60 + "\n"
+
+
+def _box(title: str) -> str:
+    return "\n╔" + "═" * 58 + "╗\n║" + title.center(58) + "║\n╚" + "═" * 58 + "╝\n\n"
+
+
+WELCOME_FRAME = "\n".join([
+    "\n╔" + "═" * 60 + "╗",
+    "║" + " " * 60 + "║",
+    "║" + "    🎓 BIENVENUE DANS QUISQUEYA SYSTÈME QUIZ 🎓    ".center(57) + "║",
+    "║" + " " * 60 + "║",
+    "╚" + "═" * 60 + "╝",
+    "\n📌 Appuyez sur [ENTRÉE] pour accéder immédiatement au menu",
+    "⏱️  Sinon, le menu apparaîtra après le compte à rebours...\n",
+])
+THEMES_BANNER = "\n" + RULE + "\n" + "📚 THÈMES DISPONIBLES".center(60) + "\n" + RULE + "\n"
+QUICK_BANNER = _banner("⚡ MODE RAPIDE - 10 QUESTIONS")
+ADAPTIVE_BANNER = _banner("🧠 MODE ADAPTATIF - 10 QUESTIONS À VOTRE NIVEAU")
+CUSTOM_BANNER = _banner("⚙️  MODE PERSONNALISÉ")
+LEADERBOARD_BANNER = _banner("🏆 CLASSEMENT DES MEILLEURS SCORES")
+STATS_BANNER = _banner("📊 STATISTIQUES")
+MAIN_MENU_FRAME = _box("🎓 QUISQUEYA SYSTÈME QUIZ - MENU PRINCIPAL 🎓") + "\n".join(
+    f"   {i}) {opt}" for i, opt in enumerate([
+        "🎮 Jouer",
+        "🏆 Classement / Scores",
+        "📊 Statistiques",
+        "📖 Instructions / Aide",
+        "🚪 Quitter"
+    ], start=1)) + "\n\n" + RULE
+PLAY_MENU_FRAME = _box("🎮 MENU JOUER") + "\n".join([
+    "   1) ⚡ Mode rapide (10 questions)",
+    "   2) ⚙️  Mode personnalisé",
+    "   3) 🧠 Mode adaptatif (questions à votre niveau)",
+    "   0) ← Retour au menu principal\n",
+    RULE,
+])
+CUSTOM_MENU_FRAME = "\n".join([
+    "   1) 🎯 Jouer par thème",
+    "   2) 🔧 Mode personnalisé classique (tous thèmes)",
+    "   0) ← Retour\n",
+])
+INSTRUCTIONS_FRAME = _banner("📖 INSTRUCTIONS & AIDE") + "\n" + "\n".join([
+    "🎮 COMMENT JOUER ?\n",
+    "   • Une partie contient jusqu'à 10 questions",
+    "   • Chaque bonne réponse vaut 1 point",
+    "   • Choisissez votre réponse en tapant le numéro correspondant\n",
+    "⏱️  MINUTERIE\n",
+    "   • Si activée, vous avez un temps limité par question",
+    "   • Pas de réponse avant la fin = réponse incorrecte\n",
+    "🏆 SCORES\n",
+    "   • Vos scores sont sauvegardés automatiquement",
+    "   • Consultez le classement et vos statistiques dans le menu principal\n",
+    "📚 MODES DE JEU\n",
+    "   • Mode Rapide : 10 questions, configuration simple",
+    "   • Mode Personnalisé : choisissez tout en détail",
+    "   • Mode Adaptatif : les questions suivent votre niveau\n",
+    "⚙️  NAVIGATION\n",
+    "   • Tapez le numéro de l'option souhaitée",
+    "   • '0' permet généralement de revenir en arrière\n",
+    "💡 ASTUCES\n",
+    "   • Lisez bien chaque question avant de répondre",
+    "   • Vos statistiques sont suivies dans le menu Statistiques\n",
+    "═" * 60,
+])
+GOODBYE_FRAME = _banner("👋 Merci d'avoir joué à Quisqueya Système Quiz !", "À bientôt ! 🎓")
+
+
+# -----------------------------
+# Démarrage
+# -----------------------------
+
+# durées du démarrage (ms), pour --startup-report
+STARTUP: Dict[str, float] = {}
+# messages des chargements en arrière-plan (banque, rechargements du watcher),
+# affichés sous le menu suivant plutôt que par-dessus une saisie ou une partie
+NOTICES: "deque[str]" = deque()
+
+
+def _elapsed_ms() -> float:
+    return (time.perf_counter() - _T0) * 1000
 
-    t = threading.Thread(target=wait_enter, daemon=True)
-    t.start()
+
+def timed_import(name: str):
+    """importlib.import_module, avec sa durée (import cumulé, comme -X importtime) dans STARTUP."""
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    STARTUP.setdefault(f"import {name}", (time.perf_counter() - t0) * 1000)
+    return module
+
+
+class Background:
+    """Exécute fn dans un thread dès la création ; result() attend la fin et relance l'erreur éventuelle."""
+
+    def __init__(self, name: str, fn: Callable[[], Any]):
+        self.name = name
+        self._fn = fn
+        self._value = None
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            self._value = self._fn()
+        except BaseException as e:
+            self._error = e
+        STARTUP[f"{self.name} (arrière-plan)"] = (time.perf_counter() - t0) * 1000
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def result(self, message: Optional[str] = None):
+        if not self.done and message:
+            print(message)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def load_bank(near_dups: bool = False) -> "QuestionBank":
+    # appelé depuis un thread (Background) : analyse séquentielle, car un pool de
+    # processus créé par fork hors du thread principal peut bloquer ses fils ;
+    # les avertissements attendent la fin du chargement (show_notices)
+    QuestionBank = timed_import("question_bank").QuestionBank
+    qb = QuestionBank(folder="questions", workers=1, near_dups=near_dups, quiet=True)
+    warnings = qb.load_warnings
+    if not qb.questions and os.path.isdir(FALLBACK_FOLDER):
+        qb = QuestionBank(folder=FALLBACK_FOLDER, workers=1, near_dups=near_dups, quiet=True)
+        warnings += qb.load_warnings
+    NOTICES.extend(warnings)
+    # recharge les fichiers de questions modifiés sans redémarrer
+    timed_import("question_watcher").QuestionWatcher(qb, on_reload=_reloaded).start()
+    return qb
+
+
+def _reloaded(stats: dict):
+    NOTICES.append(f"[Info] questions rechargées : {stats['changed']} fichier(s) modifié(s), {stats['removed']} supprimé(s)")
+    NOTICES.extend(stats["warnings"])
+    if stats["near_dups"]:
+        NOTICES.append(f"[Warning] {stats['near_dups']} paire(s) de questions quasi identiques (voir neardup.py)")
+
+
+def show_notices():
+    while NOTICES:
+        print(NOTICES.popleft())
+
+
+def open_scores():
+    storage = timed_import("storage").open_storage(stats=True)
+    # réponses question par question (écrites en arrière-plan)
+    telemetry = timed_import("telemetry").AnswerLog()
+    timed_import("quiz")
+    return storage, telemetry
+
+
+def _wait_enter(timeout: float) -> bool:
+    """Attend [ENTRÉE] au plus timeout secondes, sans thread qui garderait la main sur stdin."""
+    if os.name == "nt":
+        import msvcrt
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if msvcrt.kbhit() and msvcrt.getwch() in "\r\n":
+                return True
+            time.sleep(0.05)
+        return False
+    import select
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    if ready:
+        sys.stdin.readline()
+        return True
+    return False
+
+
+def welcome_and_countdown(seconds: int = COUNTDOWN):
+    try:
+        interactive = sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        interactive = False
+    if seconds <= 0 or not interactive:
+        # entrée redirigée : rien à attendre, la première ligne est pour le menu
+        return
+    clear()
+    print(WELCOME_FRAME)
 
     for i in range(seconds, 0, -1):
-        if skip["pressed"]:
+        print(f"⏳ Démarrage dans {i} seconde(s)...".ljust(40), end="\r", flush=True)
+        if _wait_enter(1):
             break
-        print(f"⏳ Démarrage dans {i} seconde(s)...".ljust(40), end="\r")
-        time.sleep(1)
 
     clear()
 
 
-def select_theme_interactive(qb: QuestionBank):
+def _process_age_ms() -> Optional[float]:
+    # Linux : âge du processus depuis son lancement (interpréteur compris), au centième de seconde
+    try:
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def startup_report(menu_ms: float, budget_ms: Optional[float] = None, tasks: tuple = ()) -> bool:
+    """Affiche le détail du démarrage ; retourne False si le premier menu dépasse budget_ms."""
+    age = _process_age_ms()
+    print("\n⏱️  Démarrage (ms) :")
+    if age is not None:
+        print(f"   {'processus lancé -> maintenant':<34} {age:>8.0f}")
+    print(f"   {'imports de main.py':<34} {STARTUP.get('imports main', 0):>8.1f}")
+    print(f"   {'premier menu (depuis main.py)':<34} {menu_ms:>8.1f}")
+    for name, ms in sorted(STARTUP.items(), key=lambda kv: -kv[1]):
+        if name != "imports main":
+            print(f"   {name:<34} {ms:>8.1f}")
+    for task in tasks:
+        if not task.done:
+            print(f"   {task.name + ' (arrière-plan)':<34} {'en cours':>8}")
+    print("   (détail module par module : python -X importtime main.py)")
+    metrics.observe("startup_menu_ms", menu_ms)
+    if budget_ms is not None and menu_ms > budget_ms:
+        print(f"[Warning] premier menu en {menu_ms:.0f} ms, au-delà du budget de {budget_ms:.0f} ms")
+        return False
+    return True
+
+
+# -----------------------------
+# Fonctions utilitaires
+# -----------------------------
+
+
+def select_theme_interactive(qb: "QuestionBank"):
     themes = qb.list_themes()
     if not themes:
         print("❌ Aucun thème disponible pour le moment.")
-        input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
+        safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
         return None
-    print("\n" + "─" * 60)
-    print("📚 THÈMES DISPONIBLES".center(60))
-    print("─" * 60 + "\n")
+    print(THEMES_BANNER)
     idx = choose_from_list(
         themes,
         prompt="\n➤ Entrez le numéro du thème choisi (ou 0 pour revenir) : ",
@@ -66,33 +294,54 @@ def select_theme_interactive(qb: QuestionBank):
 # Modes de jeu
 # -----------------------------
 
-def play_quick_mode(qb: QuestionBank, storage: Storage):
+def play_quick_mode(qb: "QuestionBank", storage: "Storage", telemetry: Optional["AnswerLog"] = None):
     clear()
-    print("\n" + "═" * 60)
-    print("⚡ MODE RAPIDE - 10 QUESTIONS".center(60))
-    print("═" * 60 + "\n")
+    print(QUICK_BANNER)
     player = safe_input("👤 Entrez votre nom ou pseudo : ").strip() or "Joueur"
     timer_val = 15
     print(f"\n⏱️  Minuterie activée : {timer_val} secondes par question")
-    qlist = qb.sample_questions(count=10, themes=None)
+    qlist = qb.sample_questions(count=10, themes=None, player=player)
     if not qlist:
         print("\n❌ Aucune question disponible.")
-        input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
+        safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
         return
     print(f"\n🎮 Démarrage de la partie avec {len(qlist)} questions aléatoires...")
     time.sleep(1)
-    game = QuizGame(qlist, player, storage, timer_per_question=timer_val)
+    from quiz import QuizGame
+    game = QuizGame(qlist, player, storage, timer_per_question=timer_val, telemetry=telemetry)
     game.play()
 
 
-def play_theme_mode(qb: QuestionBank, storage: Storage):
+def play_adaptive_mode(qb: "QuestionBank", storage: "Storage", telemetry: Optional["AnswerLog"] = None):
+    clear()
+    print(ADAPTIVE_BANNER)
+    player = safe_input("👤 Entrez votre nom ou pseudo : ").strip() or "Joueur"
+    timer_val = 15
+    qlist = qb.sample_adaptive(player, count=10)
+    if not qlist:
+        print("\n❌ Aucune question disponible.")
+        safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
+        return
+    print(f"\n⏱️  Minuterie activée : {timer_val} secondes par question")
+    from quiz import QuizGame
+    game = QuizGame(qlist, player, storage, timer_per_question=timer_val, telemetry=telemetry)
+    game.play()
+    # le niveau du joueur et la difficulté des questions suivent chaque partie
+    qb.record_results(player, game.results)
+    try:
+        qb.adaptive.save()
+    except OSError as e:
+        print(f"[Warning] notes non sauvegardées: {e}")
+
+
+def play_theme_mode(qb: "QuestionBank", storage: "Storage", telemetry: Optional["AnswerLog"] = None):
     """
     Permet de jouer un quiz sur un thème choisi par l'utilisateur.
     """
     themes = qb.list_themes()
     if not themes:
         print("❌ Aucun thème disponible.")
-        input("Appuyez sur [ENTRÉE] pour revenir...")
+        safe_input("Appuyez sur [ENTRÉE] pour revenir...")
         return
     print("\nSélection du thème du quiz")
     idx = choose_from_list(themes, prompt="➤ Choisissez un thème : ", allow_zero_return=True)
@@ -101,41 +350,39 @@ def play_theme_mode(qb: QuestionBank, storage: Storage):
     player = safe_input("👤 Entrez votre nom ou pseudo : ").strip() or "Joueur"
     timer_val = 15
     print(f"\n⏱️  Minuterie activée : {timer_val} secondes par question")
-    qlist = qb.sample_questions(count=10, themes=[themes[idx]])
+    qlist = qb.sample_questions(count=10, themes=[themes[idx]], player=player)
     if not qlist:
         print("❌ Aucune question disponible pour ce thème.")
-        input("Appuyez sur [ENTRÉE] pour revenir...")
+        safe_input("Appuyez sur [ENTRÉE] pour revenir...")
         return
-    game = QuizGame(qlist, player, storage, timer_per_question=timer_val)
+    from quiz import QuizGame
+    game = QuizGame(qlist, player, storage, timer_per_question=timer_val, telemetry=telemetry)
     game.play()
 
 
-def play_custom_mode(qb: QuestionBank, storage: Storage):
+def play_custom_mode(qb: "QuestionBank", storage: "Storage", telemetry: Optional["AnswerLog"] = None):
     clear()
-    print("\n" + "═" * 60)
-    print("⚙️  MODE PERSONNALISÉ".center(60))
-    print("═" * 60 + "\n")
+    print(CUSTOM_BANNER)
     while True:
-        print("   1) 🎯 Jouer par thème")
-        print("   2) 🔧 Mode personnalisé classique (tous thèmes)")
-        print("   0) ← Retour\n")
+        print(CUSTOM_MENU_FRAME)
         sub = safe_int("➤ Votre choix : ", min_val=0, max_val=2, default=0)
         if sub == 0:
             break
         elif sub == 1:
-            play_theme_mode(qb, storage)
+            play_theme_mode(qb, storage, telemetry)
         elif sub == 2:
             player = safe_input("👤 Entrez votre nom ou pseudo : ").strip() or "Joueur"
             timer_val = 15
-            qlist = qb.sample_questions(count=10, themes=None, balanced=False)
+            qlist = qb.sample_questions(count=10, themes=None, balanced=False, player=player)
             if not qlist:
                 print("\n❌ Aucune question disponible.")
-                input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
+                safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir...")
                 return
             print("\nConfiguration terminée !")
             print(f"Joueur : {player}, Questions : {len(qlist)}, Minuterie : {timer_val}s")
-            input("\nAppuyez sur [ENTRÉE] pour commencer...")
-            game = QuizGame(qlist, player, storage, timer_per_question=timer_val)
+            safe_input("\nAppuyez sur [ENTRÉE] pour commencer...")
+            from quiz import QuizGame
+            game = QuizGame(qlist, player, storage, timer_per_question=timer_val, telemetry=telemetry)
             game.play()
 
 
@@ -143,11 +390,9 @@ def play_custom_mode(qb: QuestionBank, storage: Storage):
 # Leaderboard
 # -----------------------------
 
-def show_leaderboard(storage: Storage):
+def show_leaderboard(storage: "Storage"):
     clear()
-    print("\n" + "═" * 60)
-    print("🏆 CLASSEMENT DES MEILLEURS SCORES".center(60))
-    print("═" * 60 + "\n")
+    print(LEADERBOARD_BANNER)
     n = safe_int(
         "📊 Combien de scores voulez-vous voir ? (1-50, défaut: 10) : ",
         min_val=1, max_val=50, default=10
@@ -158,9 +403,9 @@ def show_leaderboard(storage: Storage):
         print("\n❌ Aucun score enregistré pour le moment.")
         print("   Jouez une partie pour apparaître dans le classement !")
     else:
-        print("\n" + "─" * 60)
+        print("\n" + RULE)
         print(f"📚 Thème : {theme}" if theme else "📚 Tous les thèmes")
-        print("─" * 60 + "\n")
+        print(RULE + "\n")
         for i, s in enumerate(top, start=1):
             pourc_str = f"{s.get('pourcentage','N/A')}%"
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
@@ -169,8 +414,41 @@ def show_leaderboard(storage: Storage):
             print(f"   Réussite : {s.get('bonnes')}/{s.get('nombre_questions')} ({pourc_str})")
             print(f"   Date : {s.get('date_heure')[:10]}")
             print(f"   Thème : {s.get('theme')}\n")
-    print("─" * 60)
-    input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu principal...")
+    print(RULE)
+    safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu principal...")
+
+
+# -----------------------------
+# Statistiques
+# -----------------------------
+
+def show_stats(storage: "Storage"):
+    clear()
+    print(STATS_BANNER)
+    player = safe_input("👤 Nom du joueur (vide pour les statistiques par thème) : ").strip()
+    print("\n" + RULE)
+    if player:
+        s = storage.player_stats(player)
+        if s is None:
+            print(f"\n❌ Aucune partie enregistrée pour {player}.")
+        else:
+            print(f"👤 Joueur : {player}\n")
+            print(f"   Parties jouées : {s['parties']}")
+            print(f"   Réussite moyenne : {s['pourcentage_moyen']}%")
+            print(f"   Meilleure réussite : {s['meilleur_pourcentage']}%")
+            print(f"   Temps de jeu total : {s['duree_totale_seconds']} s\n")
+            print("📚 Réussite par thème :")
+            for theme, t in s["themes"].items():
+                print(f"   • {theme} : {t['bonnes']}/{t['questions']} ({t['reussite']}%) en {t['parties']} partie(s)")
+    else:
+        themes = storage.theme_stats()
+        if not themes:
+            print("\n❌ Aucun score enregistré pour le moment.")
+        for t in themes:
+            print(f"📚 {t['theme']}")
+            print(f"   Parties : {t['parties']}  —  Réussite : {t['reussite']}%  —  Meilleure : {t['meilleur_pourcentage']}%\n")
+    print(RULE)
+    safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu principal...")
 
 
 # -----------------------------
@@ -179,30 +457,8 @@ def show_leaderboard(storage: Storage):
 
 def instructions():
     clear()
-    print("\n" + "═" * 60)
-    print("📖 INSTRUCTIONS & AIDE".center(60))
-    print("═" * 60 + "\n")
-    print("🎮 COMMENT JOUER ?\n")
-    print("   • Une partie contient jusqu'à 10 questions")
-    print("   • Chaque bonne réponse vaut 1 point")
-    print("   • Choisissez votre réponse en tapant le numéro correspondant\n")
-    print("⏱️  MINUTERIE\n")
-    print("   • Si activée, vous avez un temps limité par question")
-    print("   • Pas de réponse avant la fin = réponse incorrecte\n")
-    print("🏆 SCORES\n")
-    print("   • Vos scores sont sauvegardés automatiquement")
-    print("   • Consultez le classement dans le menu principal\n")
-    print("📚 MODES DE JEU\n")
-    print("   • Mode Rapide : 10 questions, configuration simple")
-    print("   • Mode Personnalisé : choisissez tout en détail\n")
-    print("⚙️  NAVIGATION\n")
-    print("   • Tapez le numéro de l'option souhaitée")
-    print("   • '0' permet généralement de revenir en arrière\n")
-    print("💡 ASTUCES\n")
-    print("   • Lisez bien chaque question avant de répondre")
-    print("   • Vos statistiques sont suivies dans le classement\n")
-    print("═" * 60)
-    input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu...")
+    print(INSTRUCTIONS_FRAME)
+    safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu...")
 
 
 # -----------------------------
@@ -210,72 +466,78 @@ def instructions():
 # -----------------------------
 
 def main():
-    qb = QuestionBank(folder="questions")
-    if not qb.questions:
-        alt = "/mnt/data/quisqueya_questions_by_theme"
-        if os.path.isdir(alt):
-            qb = QuestionBank(folder=alt)
-    storage = Storage()
-    welcome_and_countdown(10)
-
+    STARTUP["imports main"] = _elapsed_ms()
+    parser = argparse.ArgumentParser(description="Quisqueya Système Quiz")
+    parser.add_argument("--countdown", type=int, default=int(os.environ.get(COUNTDOWN_ENV, COUNTDOWN)),
+                        help=f"secondes de l'écran d'accueil, 0 pour l'ignorer (défaut {COUNTDOWN} ou {COUNTDOWN_ENV})")
+    parser.add_argument("--startup-report", action="store_true", help="affiche le détail du démarrage après le premier menu")
+    parser.add_argument("--startup-budget", type=float, default=None, help="budget du premier menu (ms), signalé s'il est dépassé")
+    parser.add_argument("--startup-only", action="store_true",
+                        help="quitte après le premier menu (code 1 si le budget est dépassé)")
+    parser.add_argument("--near-dups", action="store_true",
+                        help="jamais deux questions quasi identiques dans une partie (voir neardup.py)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup(args.metrics, args.profile)
+
+    # chargements en arrière-plan pendant l'écran d'accueil et le premier menu
+    bank = Background("banque de questions", lambda: load_bank(args.near_dups))
+    scores = Background("stockage des scores", open_scores)
+    welcome_and_countdown(args.countdown)
+
+    first = True
     while True:
         try:
             clear()
-            print("\n" + "╔" + "═" * 58 + "╗")
-            print("║" + "🎓 QUISQUEYA SYSTÈME QUIZ - MENU PRINCIPAL 🎓".center(58) + "║")
-            print("╚" + "═" * 58 + "╝\n")
-
-            options = [
-                "🎮 Jouer",
-                "🏆 Classement / Scores",
-                "📖 Instructions / Aide",
-                "🚪 Quitter"
-            ]
-
-            for i, opt in enumerate(options, start=1):
-                print(f"   {i}) {opt}")
-            print("\n" + "─" * 60)
-
-            choice = safe_int("➤ Votre choix (1-4) : ", min_val=1, max_val=4)
-
+            print(MAIN_MENU_FRAME)
+            show_notices()
+            if first:
+                first = False
+                menu_ms = _elapsed_ms()
+                if args.startup_report or args.startup_budget is not None or args.startup_only:
+                    ok = startup_report(menu_ms, args.startup_budget, (bank, scores))
+                    if args.startup_only:
+                        sys.exit(0 if ok else 1)
+
+            choice = safe_int("➤ Votre choix (1-5) : ", min_val=1, max_val=5)
+
+            if choice in (1, 2, 3):
+                storage, telemetry = scores.result("⏳ Ouverture des scores...")
             if choice == 1:
+                qb = bank.result("⏳ Chargement des questions...")
                 while True:
                     clear()
-                    print("\n" + "╔" + "═" * 58 + "╗")
-                    print("║" + "🎮 MENU JOUER".center(58) + "║")
-                    print("╚" + "═" * 58 + "╝\n")
-                    print("   1) ⚡ Mode rapide (10 questions)")
-                    print("   2) ⚙️  Mode personnalisé")
-                    print("   0) ← Retour au menu principal\n")
-                    print("─" * 60)
-
-                    sub = safe_int("➤ Votre choix : ", min_val=0, max_val=2, default=0)
+                    print(PLAY_MENU_FRAME)
+                    show_notices()
+
+                    sub = safe_int("➤ Votre choix : ", min_val=0, max_val=3, default=0)
                     if sub == 0:
                         break
                     elif sub == 1:
-                        play_quick_mode(qb, storage)
+                        play_quick_mode(qb, storage, telemetry)
                     elif sub == 2:
-                        play_custom_mode(qb, storage)
+                        play_custom_mode(qb, storage, telemetry)
+                    elif sub == 3:
+                        play_adaptive_mode(qb, storage, telemetry)
 
             elif choice == 2:
                 show_leaderboard(storage)
             elif choice == 3:
-                instructions()
+                show_stats(storage)
             elif choice == 4:
+                instructions()
+            elif choice == 5:
                 sure = safe_input("❓ Êtes-vous sûr de vouloir quitter ? (O/N) : ").strip().lower().startswith("o")
                 if sure:
                     clear()
-                    print("\n" + "═" * 60)
-                    print("👋 Merci d'avoir joué à Quisqueya Système Quiz !".center(60))
-                    print("À bientôt ! 🎓".center(60))
-                    print("═" * 60 + "\n")
+                    print(GOODBYE_FRAME)
                     break
 
         except Exception as e:
-            print("\n" + "─" * 60)
+            print("\n" + RULE)
             print(f"❌ [Erreur inattendue] {e}")
-            print("─" * 60)
-            input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu principal...")
+            print(RULE)
+            safe_input("\n📌 Appuyez sur [ENTRÉE] pour revenir au menu principal...")
 
 
 if __name__ == "__main__":
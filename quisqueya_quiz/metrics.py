@@ -0,0 +1,255 @@
+# metrics.py - Mesures optionnelles : compteurs, histogrammes et profilage
+#
+# Désactivé par défaut. Activation :
+#   QUISQUEYA_METRICS=quisqueya_metrics.json   (ou .prom pour le format texte Prometheus ; "1" = nom par défaut)
+#   QUISQUEYA_PROFILE=cprofile | tracemalloc | all
+# ou, pour main.py / quiz_server.py / simulate.py : --metrics [FICHIER] --profile MODE
+# Les fichiers sont écrits à la sortie du programme (ou par export()).
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Tuple
+
+METRICS_ENV = "QUISQUEYA_METRICS"
+PROFILE_ENV = "QUISQUEYA_PROFILE"
+METRICS_FILE = "quisqueya_metrics.json"
+PROFILE_FILE = "quisqueya_profile"
+PROFILE_MODES = ("cprofile", "tracemalloc", "all")
+PREFIX = "quisqueya_"
+# bornes des histogrammes, en millisecondes
+BUCKETS_MS: Tuple[float, ...] = (0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, math.inf)
+
+_NULL = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, b in enumerate(self.bounds):
+            if value <= b:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "buckets": {("+Inf" if math.isinf(b) else str(b)): c for b, c in zip(self.bounds, self.counts)},
+        }
+
+
+class Registry:
+    """Compteurs et histogrammes nommés, partagés par tous les threads."""
+
+    def __init__(self, path: str = METRICS_FILE):
+        self.path = path
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram()
+            h.observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "counters": dict(self.counters),
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name}_total counter")
+                lines.append(f"{PREFIX}{name}_total {value}")
+            for name, h in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                cumul = 0
+                for b, c in zip(h.bounds, h.counts):
+                    cumul += c
+                    le = "+Inf" if math.isinf(b) else repr(float(b))
+                    lines.append(f'{PREFIX}{name}_bucket{{le="{le}"}} {cumul}')
+                lines.append(f"{PREFIX}{name}_sum {h.sum}")
+                lines.append(f"{PREFIX}{name}_count {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Optional[str] = None):
+        path = path or self.path
+        text = self.prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "t0")
+
+    def __init__(self, registry: Registry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, (time.perf_counter() - self.t0) * 1000)
+        return False
+
+
+# registre actif, None tant que les mesures sont désactivées
+_registry: Optional[Registry] = None
+_profiler = None
+_profile_mode: Optional[str] = None
+
+
+def enabled() -> bool:
+    return _registry is not None
+
+
+def timer(name: str):
+    """Contexte qui mesure sa durée (ms) dans l'histogramme name ; ne fait rien si désactivé."""
+    return _NULL if _registry is None else _Timer(_registry, name)
+
+
+def observe(name: str, value: float):
+    if _registry is not None:
+        _registry.observe(name, value)
+
+
+def inc(name: str, value: float = 1):
+    if _registry is not None:
+        _registry.inc(name, value)
+
+
+def snapshot() -> Optional[Dict[str, Any]]:
+    return _registry.snapshot() if _registry is not None else None
+
+
+def export(path: Optional[str] = None):
+    if _registry is not None:
+        _registry.export(path)
+
+
+def enable(path: Optional[str] = None) -> Registry:
+    """Active les mesures ; le fichier path (JSON ou .prom) est écrit à la sortie."""
+    global _registry
+    if _registry is None:
+        _registry = Registry(path or METRICS_FILE)
+        atexit.register(_export_at_exit)
+    elif path:
+        _registry.path = path
+    return _registry
+
+
+def _export_at_exit():
+    try:
+        export()
+    except OSError as e:
+        print(f"[Warning] mesures non exportées: {e}")
+
+
+def start_profile(mode: str, path: str = PROFILE_FILE):
+    """
+    Profilage jusqu'à la sortie : cProfile (path.prof + path.txt, 40 fonctions les
+    plus coûteuses), tracemalloc (path.mem.txt, 40 lignes qui allouent le plus) ou les deux.
+    """
+    global _profiler, _profile_mode
+    mode = mode.lower()
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"mode de profilage inconnu: {mode}")
+    if _profile_mode is not None:
+        return
+    _profile_mode = mode
+    if mode in ("tracemalloc", "all"):
+        import tracemalloc
+        tracemalloc.start(25)
+    if mode in ("cprofile", "all"):
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_write_profile, path)
+
+
+def _write_profile(path: str):
+    try:
+        if _profiler is not None:
+            _profiler.disable()
+        # instantané mémoire avant l'écriture du rapport cProfile, qui alloue lui-même
+        if _profile_mode in ("tracemalloc", "all"):
+            import tracemalloc
+            snap = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(f"{path}.mem.txt", "w", encoding="utf-8") as f:
+                f.write(f"mémoire suivie : {current / 1e6:.1f} Mo, pic : {peak / 1e6:.1f} Mo\n\n")
+                for stat in snap.statistics("lineno")[:40]:
+                    f.write(f"{stat}\n")
+        if _profiler is not None:
+            import pstats
+            _profiler.dump_stats(f"{path}.prof")
+            with open(f"{path}.txt", "w", encoding="utf-8") as f:
+                pstats.Stats(_profiler, stream=f).sort_stats("cumulative").print_stats(40)
+    except OSError as e:
+        print(f"[Warning] rapport de profilage non écrit: {e}")
+
+
+def add_arguments(parser):
+    parser.add_argument("--metrics", nargs="?", const=METRICS_FILE, default=None,
+                        help=f"active les mesures, exportées à la sortie (JSON, ou .prom) ; défaut {METRICS_FILE}")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None, help="profilage écrit à la sortie")
+
+
+def setup(metrics_path: Optional[str] = None, profile: Optional[str] = None):
+    """Applique les options --metrics / --profile (les variables d'environnement sont lues à l'import)."""
+    if metrics_path:
+        enable(metrics_path)
+    if profile:
+        start_profile(profile)
+
+
+def _setup_from_env():
+    path = os.environ.get(METRICS_ENV, "").strip()
+    if path and path != "0":
+        enable(METRICS_FILE if path == "1" else path)
+    mode = os.environ.get(PROFILE_ENV, "").strip()
+    if mode:
+        try:
+            start_profile(mode)
+        except ValueError as e:
+            print(f"[Warning] {PROFILE_ENV}: {e}")
+
+
+_setup_from_env()
@@ -1,9 +1,13 @@
 # models.py
 from dataclasses import dataclass
 from typing import List
+from frames import FRAMES
 
 @dataclass
 class Question:
+    # pas de __dict__ par instance
+    __slots__ = ("id", "theme", "niveau", "texte", "options", "bonne_option")
+
     id: int
     theme: str
     niveau: str
@@ -14,9 +18,6 @@ class Question:
     def format_for_display(self, index: int, total: int) -> str:
         """
         Retourne une chaîne formatée pour affichage
+        (corps pré-rendu une fois par question, voir frames.py)
         """
-        s = f"Question {index}/{total} [{self.theme} - {self.niveau}]\n"
-        s += f"{self.texte}\n"
-        for i, opt in enumerate(self.options, start=1):
-            s += f"  {i}) {opt}\n"
-        return s
+        return FRAMES.frame(self, index, total)
@@ -0,0 +1,313 @@
+# neardup.py - Index des quasi-doublons de la banque (MinHash / LSH sur texte et options)
+# Usage : python neardup.py [--folder questions] [--threshold 0.75] [--top 20] [--json quasi_doublons.json]
+#
+# Chaque question devient un ensemble de fragments de 5 caractères (texte et options
+# normalisés : sans accents, casse ni ponctuation ; options dans n'importe quel ordre),
+# résumé par une signature MinHash de NUM_PERM valeurs. Les signatures sont découpées
+# en BANDS bandes : deux questions partageant une bande sont candidates, et seules les
+# candidates sont comparées (Jaccard exact). Les signatures sont gardées par fichier
+# dans <dossier>/.neardup.cache avec les paires déjà vérifiées : seuls les fichiers
+# nouveaux ou modifiés sont recalculés, et seules leurs candidates sont comparées.
+
+import argparse
+import json
+import os
+import pickle
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from zlib import crc32
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+CACHE_NAME = ".neardup.cache"
+CACHE_VERSION = 2
+SHINGLE = 5
+# MinHash à une permutation : NUM_PERM cases (puissance de 2), remplies en un passage
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# similarité de Jaccard (fragments) à partir de laquelle deux questions sont des quasi-doublons
+THRESHOLD = 0.75
+# au-delà de MAX_BUCKET questions dans une même case de bande, les suivantes ne sont
+# comparées qu'à la première (évite un coût quadratique sur une banque très répétitive)
+MAX_BUCKET = 16
+
+_MASK = 0xFFFFFFFF
+_BIN_SHIFT = 32 - (NUM_PERM.bit_length() - 1)
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_ACCENTS = re.compile("[\u0300-\u036f]")
+# tout sauf lettres, chiffres et le séparateur des parties (|)
+_PUNCT = re.compile(r"(?:[^\w|]|_)+")
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces simples."""
+    text = _ACCENTS.sub("", unicodedata.normalize("NFKD", text)).casefold()
+    return " ".join(_PUNCT.sub(" ", text).split())
+
+
+def shingles(texte: str, options: Iterable[str]) -> Set[bytes]:
+    """Fragments de SHINGLE caractères du texte et de chaque option (l'ordre des options ne compte pas)."""
+    out = set()
+    # une seule normalisation pour toutes les parties, séparées par « | »
+    joined = "|".join([texte.replace("|", " "), *(o.replace("|", " ") for o in options)])
+    for part in normalize(joined).split("|"):
+        s = part.strip().encode("utf-8")
+        if len(s) <= SHINGLE:
+            if s:
+                out.add(s)
+            continue
+        out.update(s[i:i + SHINGLE] for i in range(len(s) - SHINGLE + 1))
+    return out
+
+
+def signature(frags: Set[bytes]) -> List[int]:
+    """
+    Signature MinHash à une permutation : un seul hachage par fragment, dont les
+    bits de poids fort choisissent la case et le reste la valeur gardée (minimum).
+    Les cases vides reprennent la case non vide suivante, rehachée avec la distance.
+    """
+    sig = [_MASK] * NUM_PERM
+    for s in frags:
+        h = (crc32(s) * 0x9E3779B1) & _MASK
+        b = h >> _BIN_SHIFT
+        v = h & _VALUE_MASK
+        if v < sig[b]:
+            sig[b] = v
+    if _MASK in sig and len(set(sig)) > 1:
+        filled = list(sig)
+        for i in range(NUM_PERM):
+            if sig[i] == _MASK:
+                d = 1
+                while sig[(i + d) % NUM_PERM] == _MASK:
+                    d += 1
+                filled[i] = (sig[(i + d) % NUM_PERM] * 0x85EBCA77 + d * 0xC2B2AE3D) & _MASK
+        sig = filled
+    return sig
+
+
+def band_keys(sig: List[int]) -> List[int]:
+    """Une clé de 32 bits par bande de ROWS valeurs (deux questions qui la partagent sont candidates)."""
+    raw = array("I", sig).tobytes()
+    width = ROWS * 4
+    return [crc32(raw[o:o + width]) for o in range(0, len(raw), width)]
+
+
+def jaccard(a: Set[bytes], b: Set[bytes]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDupIndex:
+    """
+    Quasi-doublons d'un QuestionStore. build() reprend les signatures des fichiers
+    inchangés (même sha1), calcule les autres, puis regroupe les questions proches :
+    cluster_of associe l'id de chaque question qui a au moins un quasi-doublon au
+    plus petit id de son groupe. Les questions ajoutées par add_question ne sont
+    prises en compte qu'au rechargement suivant.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, threshold: float = THRESHOLD):
+        self.cache_path = cache_path
+        self.threshold = threshold
+        # nom du fichier -> (sha1, signatures concaténées, clés de bandes concaténées)
+        self._files: Dict[str, Tuple[str, bytes, bytes]] = {}
+        # paires (id, id) -> similarité vérifiées au dernier build (None : inconnues)
+        self._known: Optional[Dict[Tuple[int, int], float]] = None
+        if cache_path:
+            self._read()
+        self._dirty = False
+        # signatures (NUM_PERM valeurs par question, dans l'ordre du store)
+        self.signatures = array("I")
+        self.cluster_of: Dict[int, int] = {}
+        self.pairs: List[Tuple[int, int, float]] = []
+        self.computed = 0
+
+    def _read(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            return
+        if data.get("version") != CACHE_VERSION or data.get("params") != (SHINGLE, NUM_PERM):
+            return
+        self._files = data["files"]
+        if data.get("threshold") == self.threshold:
+            self._known = data["pairs"]
+
+    def save(self):
+        if not self.cache_path or not self._dirty:
+            return
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump({"version": CACHE_VERSION, "params": (SHINGLE, NUM_PERM), "files": self._files,
+                             "threshold": self.threshold, "pairs": self._known or {}},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[Warning] impossible d'écrire le cache {self.cache_path}: {e}")
+
+    def build(self, store, files: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[int, int, float]]:
+        """
+        Indexe store, dont les questions viennent des fichiers files dans l'ordre
+        (chemin, résultat de parse_question_file), puis éventuellement d'ajouts.
+        Retourne les paires (id, id, similarité) touchant une question dont la
+        signature vient d'être calculée : les nouveaux quasi-doublons.
+        """
+        sigs = array("I")
+        keys = array("I")
+
+        def compute(start: int, end: int):
+            for i in range(start, end):
+                q = store[i]
+                sig = signature(shingles(q.texte, q.options))
+                sigs.extend(sig)
+                keys.extend(band_keys(sig))
+
+        fresh = []
+        pos = 0
+        keep = {}
+        for path, entry in files:
+            n = len(entry["chunk"]["ids"])
+            name = os.path.basename(path)
+            cached = self._files.get(name)
+            if cached is not None and cached[0] == entry.get("sha1") and len(cached[1]) == n * NUM_PERM * 4:
+                sigs.frombytes(cached[1])
+                keys.frombytes(cached[2])
+            else:
+                cached = None
+                compute(pos, pos + n)
+                fresh.append((pos, pos + n))
+                if entry.get("sha1"):
+                    cached = (entry["sha1"], sigs[pos * NUM_PERM:].tobytes(), keys[pos * BANDS:].tobytes())
+                    self._dirty = True
+            if cached is not None:
+                keep[name] = cached
+            pos += n
+        # questions ajoutées hors fichiers
+        compute(pos, len(store))
+        if pos < len(store):
+            fresh.append((pos, len(store)))
+        self._dirty |= keep.keys() != self._files.keys()
+        self._files = keep
+        self.computed = sum(b - a for a, b in fresh)
+
+        is_fresh = bytearray(len(store))
+        for a, b in fresh:
+            is_fresh[a:b] = b"\x01" * (b - a)
+        pairs = self._pairs(store, keys, is_fresh)
+        cluster_of = self._clusters(pairs)
+        self.signatures, self.pairs, self.cluster_of = sigs, pairs, cluster_of
+        known = {(a, b): s for a, b, s in pairs}
+        self._dirty |= known != self._known
+        self._known = known
+        self.save()
+        ids = store.ids
+        new = {ids[i] for a, b in fresh for i in range(a, b)}
+        return [p for p in pairs if p[0] in new or p[1] in new]
+
+    def _pairs(self, store, keys: array, is_fresh: bytearray) -> List[Tuple[int, int, float]]:
+        # bande par bande : une seule table en mémoire à la fois ; la colonne
+        # de la bande est extraite et comptée en C (tranche d'array, Counter)
+        candidates = set()
+        for band in range(BANDS):
+            column = keys[band::BANDS]
+            shared = {k for k, c in Counter(column).items() if c > 1}
+            if not shared:
+                continue
+            groups: Dict[int, List[int]] = {}
+            for i, k in enumerate(column):
+                if k in shared:
+                    group = groups.setdefault(k, [])
+                    if len(group) < MAX_BUCKET:
+                        candidates.update((g, i) for g in group)
+                    else:
+                        candidates.add((group[0], i))
+                    group.append(i)
+        # vérification exacte des candidates ; entre deux questions de fichiers
+        # inchangés, le résultat du build précédent est repris tel quel
+        known = self._known
+        frags: Dict[int, Set[bytes]] = {}
+
+        def frags_of(i: int) -> Set[bytes]:
+            s = frags.get(i)
+            if s is None:
+                q = store[i]
+                s = frags[i] = shingles(q.texte, q.options)
+            return s
+
+        ids = store.ids
+        pairs = []
+        for a, b in sorted(candidates):
+            if ids[a] == ids[b]:
+                continue
+            if known is not None and not is_fresh[a] and not is_fresh[b]:
+                sim = known.get((ids[a], ids[b]), known.get((ids[b], ids[a])))
+                if sim is not None:
+                    pairs.append((ids[a], ids[b], sim))
+                continue
+            sim = round(jaccard(frags_of(a), frags_of(b)), 3)
+            if sim >= self.threshold:
+                pairs.append((ids[a], ids[b], sim))
+        return pairs
+
+    @staticmethod
+    def _clusters(pairs: List[Tuple[int, int, float]]) -> Dict[int, int]:
+        parent: Dict[int, int] = {}
+
+        def find(x: int) -> int:
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        members = set()
+        for a, b, _ in pairs:
+            members.update((a, b))
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+        return {x: find(x) for x in members}
+
+    def groups(self) -> List[List[int]]:
+        """Groupes de quasi-doublons (ids triés), les plus grands d'abord."""
+        by_root: Dict[int, List[int]] = {}
+        for qid, root in self.cluster_of.items():
+            by_root.setdefault(root, []).append(qid)
+        return sorted((sorted(g) for g in by_root.values()), key=lambda g: (-len(g), g[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quasi-doublons de la banque de questions")
+    parser.add_argument("--folder", default="questions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="similarité minimale (0..1)")
+    parser.add_argument("--top", type=int, default=20, help="groupes affichés")
+    parser.add_argument("--json", default=None, help="écrit les paires trouvées dans ce fichier")
+    args = parser.parse_args()
+
+    from question_bank import QuestionBank
+    bank = QuestionBank(folder=args.folder)
+    index = NearDupIndex(os.path.join(args.folder, CACHE_NAME) if os.path.isdir(args.folder) else None, args.threshold)
+    index.build(bank.questions, bank.file_entries())
+    groups = index.groups()
+    print(f"{len(bank.questions)} question(s), {index.computed} signature(s) calculée(s), "
+          f"{len(index.pairs)} paire(s) proches, {len(groups)} groupe(s)")
+    by_id = {bank.questions.ids[i]: i for i in range(len(bank.questions))}
+    for g in groups[:args.top]:
+        print(f"\n— {len(g)} questions")
+        for qid in g:
+            q = bank.questions[by_id[qid]]
+            print(f"  [{qid}] {q.texte}  ({' / '.join(q.options)})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{"id": a, "proche_de": b, "similarite": s} for a, b, s in index.pairs], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,343 @@
 # question_bank.py
-import json
 import glob
 import os
-import random
-from typing import List, Optional
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from decks import DeckSet
+from frames import FRAMES
 from models import Question
+from neardup import CACHE_NAME as NEARDUP_CACHE, NearDupIndex
+from question_store import QuestionStore
+from question_loader import CACHE_NAME, load_question_files, parse_question_file
+from seen import SeenSets
+import metrics
+
+class _GameFilter:
+    """
+    Positions à écarter pendant le tirage d'une partie : questions vues récemment
+    par le joueur, ou quasi-doublon d'une question déjà retenue. L'appel ne fait
+    que tester ; keep() enregistre une position effectivement retenue.
+    """
+    __slots__ = ("ids", "seen", "cluster_of", "used")
+
+    def __init__(self, ids, seen: Optional[Callable[[int], bool]], cluster_of: Dict[int, int]):
+        self.ids = ids
+        self.seen = seen
+        self.cluster_of = cluster_of
+        self.used = set()
+
+    def __call__(self, pos: int) -> bool:
+        qid = self.ids[pos]
+        if self.seen is not None and self.seen(qid):
+            return True
+        group = self.cluster_of.get(qid)
+        return group is not None and group in self.used
+
+    def keep(self, pos: int):
+        group = self.cluster_of.get(self.ids[pos])
+        if group is not None:
+            self.used.add(group)
+
+
+def _index_range(store: QuestionStore, index: Dict[Tuple[str, str], List[int]], start: int) -> bool:
+    """Ajoute à l'index (theme, niveau) -> positions les questions de store à partir de start."""
+    new_key = False
+    for pos in range(start, len(store)):
+        key = (store.theme_at(pos), store.niveau_at(pos))
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = index[key] = []
+            new_key = True
+        bucket.append(pos)
+    return new_key
+
 
 class QuestionBank:
-    def __init__(self, folder: str = "questions"):
+    def __init__(self, folder: str = "questions", cache: bool = True, workers: Optional[int] = None,
+                 seed: Optional[int] = None, near_dups: bool = False, quiet: bool = False):
         """
         Charge les questions depuis tous les fichiers JSON du dossier donné,
         ou depuis 'questions.json' s'il existe.
+        Les fichiers inchangés sont repris de l'instantané du dossier (cache=True) ;
+        les autres sont analysés en parallèle (workers=1 pour du séquentiel).
+        seed rend les tirages reproductibles (voir decks.py).
+        near_dups=True : les quasi-doublons (voir neardup.py) sont repérés au
+        chargement et jamais distribués ensemble dans une même partie (coût au
+        démarrage, signatures en cache dans le dossier : désactivé par défaut).
+        Les avertissements du chargement sont gardés dans load_warnings ;
+        quiet=True ne les affiche pas (chargement depuis un autre thread).
         """
-        self.questions: List[Question] = []
+        # stockage en colonnes ; les Question sont créées à la demande
+        self.questions = QuestionStore()
         self.folder = folder
+        self.cache = cache
+        self.workers = workers
+        self.quiet = quiet
+        self.load_warnings: List[str] = []
+        # index (theme, niveau) -> positions dans self.questions
+        self._index: Dict[Tuple[str, str], List[int]] = {}
+        self._indexed = 0
+        self._themes: Optional[List[str]] = None
+        # fichiers chargés (chemin -> résultat de parse_question_file) et nombre de questions qui en viennent
+        self._files: Dict[str, dict] = {}
+        self._file_count = 0
+        # protège l'échange de (questions, index) lors d'un rechargement
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self.last_reload: Optional[dict] = None
+        # tirage adaptatif (adaptive.AdaptiveSampler), créé au premier usage
+        self._adaptive = None
+        # questions vues récemment par joueur (ids), écartées des tirages suivants
+        self.seen = SeenSets()
+        # paquets pré-mélangés par (thème, niveau) pour sample_questions
+        self.decks = DeckSet(self, seed)
+        # groupes de questions quasi identiques (neardup.NearDupIndex)
+        self.near_dups: Optional[NearDupIndex] = None
+        if near_dups:
+            cache_path = os.path.join(folder, NEARDUP_CACHE) if cache and os.path.isdir(folder) else None
+            self.near_dups = NearDupIndex(cache_path)
         self._load_questions()
 
-    def _load_questions(self):
+    def _source_files(self) -> List[str]:
         # Si dossier existe, charge tous les json dedans
         if os.path.isdir(self.folder):
-            pattern = os.path.join(self.folder, "*.json")
-            files = sorted(glob.glob(pattern))
-            for f in files:
-                self._load_file(f)
+            return sorted(glob.glob(os.path.join(self.folder, "*.json")))
         # Fallback: fichier unique questions.json dans le répertoire courant
-        elif os.path.isfile("questions.json"):
-            self._load_file("questions.json")
-
-    def _load_file(self, path: str):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not isinstance(data, list):
-                print(f"[Warning] {path} ne contient pas une liste de questions — ignoré.")
-                return
-            for item in data:
-                if not all(k in item for k in ("id","theme","niveau","texte","options","bonne_option")):
-                    # ignore malformed entries but continue
-                    print(f"[Warning] entrée mal formée dans {path}, id approximatif: {item.get('id')}")
-                    continue
-                try:
-                    q = Question(
-                        id=int(item["id"]),
-                        theme=str(item["theme"]),
-                        niveau=str(item["niveau"]),
-                        texte=str(item["texte"]),
-                        options=list(item["options"]),
-                        bonne_option=int(item["bonne_option"])
-                    )
-                    # Basic validation
-                    if not (0 <= q.bonne_option < len(q.options)):
-                        print(f"[Warning] mauvaise bonne_option pour id {q.id} dans {path} — ignorée.")
-                        continue
-                    self.questions.append(q)
-                except Exception as e:
-                    print(f"[Warning] impossible de créer Question depuis entrée {item.get('id')}: {e}")
-        except Exception as e:
-            print(f"[Warning] impossible de lire {path}: {e}")
+        if os.path.isfile("questions.json"):
+            return ["questions.json"]
+        return []
+
+    def _load_questions(self):
+        with metrics.timer("bank_load_ms"):
+            self._load_files()
+        metrics.inc("questions_loaded", len(self.questions))
+
+    def _load_files(self):
+        files = self._source_files()
+        cache_path = os.path.join(self.folder, CACHE_NAME) if self.cache and os.path.isdir(self.folder) else None
+        for path, entry in zip(files, load_question_files(files, cache_path, self.workers)):
+            for w in entry["warnings"]:
+                self._warn(w)
+            self._files[path] = entry
+            self.questions.extend_chunk(entry["chunk"])
+        self._file_count = len(self.questions)
+        self._sync_index()
+        self._check_near_dups()
+
+    def _warn(self, message: str):
+        self.load_warnings.append(message)
+        if not self.quiet:
+            print(message)
+
+    def file_entries(self) -> List[Tuple[str, dict]]:
+        """Fichiers chargés (chemin, résultat de parse_question_file), dans l'ordre des questions."""
+        return [(p, self._files[p]) for p in sorted(self._files)]
+
+    def _check_near_dups(self, report: bool = True) -> List[Tuple[int, int, float]]:
+        # seules les signatures des fichiers nouveaux ou modifiés sont calculées ;
+        # report=False (rechargement) : rien n'est affiché, l'appelant lit le compte
+        if self.near_dups is None:
+            return []
+        with metrics.timer("near_dups_ms"):
+            new = self.near_dups.build(self.questions, self.file_entries())
+        if not report:
+            return new
+        for a, b, sim in new[:5]:
+            self._warn(f"[Warning] questions {a} et {b} quasi identiques (similarité {sim})")
+        if len(new) > 5:
+            self._warn(f"[Warning] ... {len(new) - 5} autre(s) paire(s) de quasi-doublons (voir neardup.py)")
+        return new
+
+    def reload_changed(self) -> Optional[dict]:
+        """
+        Recharge les fichiers ajoutés, modifiés ou supprimés depuis le dernier chargement.
+        Seuls les fichiers changés sont ré-analysés ; la banque et son index sont
+        reconstruits à part puis échangés d'un coup. Les questions déjà tirées
+        (parties en cours) ne sont pas touchées.
+        Retourne les statistiques du rechargement, ou None si rien n'a changé.
+        """
+        with self._reload_lock:
+            return self._reload_changed()
+
+    def _reload_changed(self) -> Optional[dict]:
+        t0 = time.perf_counter()
+        files = self._source_files()
+        current = set(files)
+        removed = [p for p in self._files if p not in current]
+        changed = []
+        for p in files:
+            entry = self._files.get(p)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            if entry is None or (entry["mtime_ns"], entry["size"]) != (st.st_mtime_ns, st.st_size):
+                changed.append(p)
+        if not changed and not removed:
+            return None
+
+        new_files = {p: e for p, e in self._files.items() if p in current}
+        stale = [self._files[p]["chunk"]["ids"] for p in removed + changed if p in self._files]
+        touched = sum(len(ids) for ids in stale)
+        warnings = []
+        for p in changed:
+            entry = parse_question_file(p)
+            warnings += entry["warnings"]
+            new_files[p] = entry
+            stale.append(entry["chunk"]["ids"])
+            touched += len(entry["chunk"]["ids"])
+
+        store = QuestionStore()
+        for p in files:
+            if p in new_files:
+                store.extend_chunk(new_files[p]["chunk"])
+        file_count = len(store)
+        index: Dict[Tuple[str, str], List[int]] = {}
+        with self._lock:
+            # conserve les questions ajoutées hors fichiers (add_question)
+            old = self.questions
+            for i in range(self._file_count, len(old)):
+                store.append(old[i])
+            _index_range(store, index, 0)
+            self.questions, self._index, self._indexed = store, index, len(store)
+            self._themes = None
+            self._files, self._file_count = new_files, file_count
+        # affichages pré-rendus des questions modifiées
+        for ids in stale:
+            FRAMES.invalidate(ids)
+        near = self._check_near_dups(report=False)
+        stats = {
+            "changed": len(changed),
+            "removed": len(removed),
+            "questions_touched": touched,
+            "questions_total": len(store),
+            "latency_ms": (time.perf_counter() - t0) * 1000,
+            "warnings": warnings,
+            "near_dups": len(near),
+        }
+        self.last_reload = stats
+        metrics.observe("bank_reload_ms", stats["latency_ms"])
+        return stats
+
+    def add_question(self, q: Question):
+        """Ajoute une question à la banque et à l'index."""
+        with self._lock:
+            self.questions.append(q)
+            self._sync_index()
+
+    def _sync_index(self):
+        # indexe les questions ajoutées depuis la dernière synchronisation
+        # (y compris celles ajoutées directement à self.questions)
+        with self._lock:
+            if _index_range(self.questions, self._index, self._indexed):
+                self._themes = None
+            self._indexed = len(self.questions)
+
+    def _buckets(self, themes: Optional[List[str]] = None, niveaux: Optional[List[str]] = None) -> List[List[int]]:
+        self._sync_index()
+        themes = set(themes) if themes else None
+        niveaux = set(niveaux) if niveaux else None
+        return [
+            bucket for (theme, niveau), bucket in self._index.items()
+            if (themes is None or theme in themes) and (niveaux is None or niveau in niveaux)
+        ]
+
+    def _skip_seen(self, player: Optional[str]) -> Optional[Callable[[int], bool]]:
+        """
+        Prédicat sur les positions, propre à une partie : question vue récemment
+        par le joueur, ou (avec near_dups) quasi-doublon d'une question déjà
+        retenue, auquel cas il a une méthode keep (voir _GameFilter).
+        """
+        seen = self.seen.excluder(player)
+        cluster_of = self.near_dups.cluster_of if self.near_dups is not None else None
+        ids = self.questions.ids
+        if cluster_of:
+            return _GameFilter(ids, seen, cluster_of)
+        if seen is None:
+            return None
+        return lambda pos: seen(ids[pos])
+
+    def _remember(self, player: Optional[str], questions: List[Question]) -> List[Question]:
+        if player:
+            self.seen.add(player, (q.id for q in questions), len(self.questions))
+        return questions
 
     def list_themes(self) -> List[str]:
-        return sorted({q.theme for q in self.questions})
+        with self._lock:
+            self._sync_index()
+            if self._themes is None:
+                self._themes = sorted({theme for theme, _ in self._index})
+            return list(self._themes)
 
     def filter(self, themes: Optional[List[str]] = None, niveaux: Optional[List[str]] = None) -> List[Question]:
-        res = self.questions
-        if themes:
-            res = [q for q in res if q.theme in themes]
-        if niveaux:
-            res = [q for q in res if q.niveau in niveaux]
-        return res
-
-    def sample_questions(self, count: int = 10, themes: Optional[List[str]] = None, niveaux: Optional[List[str]] = None, balanced: bool = False) -> List[Question]:
+        with self._lock:
+            positions = sorted(p for b in self._buckets(themes, niveaux) for p in b)
+            return [self.questions[p] for p in positions]
+
+    def sample_questions(self, count: int = 10, themes: Optional[List[str]] = None, niveaux: Optional[List[str]] = None, balanced: bool = False,
+                         player: Optional[str] = None) -> List[Question]:
         """
         Retourne jusqu'à count questions (max 10). Si balanced True et niveaux None,
         tente une répartition 4 Facile / 4 Moyen / 2 Difficile (si possible).
+        Les questions sont distribuées depuis des paquets pré-mélangés par
+        (thème, niveau) : coût constant par partie, générateurs propres à la banque.
+        Avec player, les questions qu'il a vues récemment sont évitées (voir seen.py).
         """
         # impose la limite globale à 10
         count = min(int(count), 10)
+        with metrics.timer("sample_ms"), self._lock:
+            return self._remember(player, self._sample(count, themes, niveaux, balanced, self._skip_seen(player)))
 
-        pool = self.filter(themes, niveaux)
-        if not pool:
-            return []
-
+    def _sample(self, count: int, themes: Optional[List[str]], niveaux: Optional[List[str]], balanced: bool,
+                skip: Optional[Callable[[int], bool]] = None) -> List[Question]:
+        self._sync_index()
+        decks = self.decks
+        keep = getattr(skip, "keep", None)
         if balanced and not niveaux:
-            by_level = {
-                "Facile": [q for q in pool if q.niveau.lower() == "facile"],
-                "Moyen": [q for q in pool if q.niveau.lower() == "moyen"],
-                "Difficile": [q for q in pool if q.niveau.lower() == "difficile"],
-            }
             picks = []
+            taken = set()
             want = {"Facile":4, "Moyen":4, "Difficile":2}
             for lvl, n in want.items():
-                candidates = by_level.get(lvl, [])
-                take = min(n, len(candidates))
-                if take > 0:
-                    picks += random.sample(candidates, take)
+                picks += decks.deal(n, themes, level=lvl, skip=skip, taken=taken, keep=keep)
             if len(picks) < count:
-                remaining = [q for q in pool if q not in picks]
-                if remaining:
-                    picks += random.sample(remaining, min(count - len(picks), len(remaining)))
-            random.shuffle(picks)
-            return picks[:count]
+                # complète avec le reste du pool
+                picks += decks.deal(count - len(picks), themes, skip=skip, taken=taken, keep=keep)
+            decks.shuffle(picks)
+            return [self.questions[p] for p in picks[:count]]
 
         # général : échantillonnage simple
-        if len(pool) <= count:
-            random.shuffle(pool)
-            return pool[:count]
-        return random.sample(pool, count)
+        return [self.questions[p] for p in decks.deal(count, themes, niveaux, skip=skip, keep=keep)]
+
+    @property
+    def adaptive(self):
+        """Notes de difficulté et de niveau des joueurs (voir adaptive.py)."""
+        if self._adaptive is None:
+            from adaptive import AdaptiveSampler
+            self._adaptive = AdaptiveSampler(self)
+        return self._adaptive
+
+    def sample_adaptive(self, player: str, count: int = 10, themes: Optional[List[str]] = None,
+                        niveaux: Optional[List[str]] = None) -> List[Question]:
+        """
+        Comme sample_questions, mais pondéré par la difficulté mesurée de chaque
+        question et le niveau actuel du joueur (réussite visée : adaptive.TARGET_SUCCESS).
+        Les questions vues récemment par le joueur sont évitées.
+        """
+        count = min(int(count), 10)
+        with metrics.timer("sample_adaptive_ms"), self._lock:
+            self._sync_index()
+            wanted_t = set(themes) if themes else None
+            wanted_n = set(niveaux) if niveaux else None
+            keys = [
+                key for key in self._index
+                if (wanted_t is None or key[0] in wanted_t) and (wanted_n is None or key[1] in wanted_n)
+            ]
+            skip = self._skip_seen(player)
+            picks = self.adaptive.sample(player, count, keys, rng=self.decks.rng, skip=skip, keep=getattr(skip, "keep", None))
+            return self._remember(player, [self.questions[p] for p in picks])
+
+    def record_results(self, player: str, results: List[Tuple[int, Optional[bool]]]):
+        """Met à jour les notes après une partie : results = [(id question, correct)]."""
+        with self._lock:
+            self.adaptive.update(player, results)
@@ -0,0 +1,182 @@
+# question_loader.py
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+from question_store import compile_records
+import metrics
+
+# instantané des fichiers déjà analysés, placé dans le dossier des questions
+CACHE_NAME = ".questions.cache"
+CACHE_VERSION = 1
+# en dessous de ce nombre de fichiers à analyser, le pool de processus coûte plus qu'il ne rapporte
+PARALLEL_MIN_FILES = 4
+
+FIELDS = ("id", "theme", "niveau", "texte", "options", "bonne_option")
+
+
+def parse_question_file(path: str) -> Dict[str, Any]:
+    """
+    Lit et valide un fichier de questions.
+    Retourne un dict avec les métadonnées du fichier (mtime_ns, size, sha1),
+    les questions valides compilées en colonnes (chunk), les avertissements
+    et la durée de l'analyse (parse_ms).
+    """
+    t0 = time.perf_counter()
+    result = _parse_question_file(path)
+    result["parse_ms"] = (time.perf_counter() - t0) * 1000
+    return result
+
+
+def _parse_question_file(path: str) -> Dict[str, Any]:
+    result = {"mtime_ns": 0, "size": 0, "sha1": None, "chunk": compile_records([]), "warnings": []}
+    warnings = result["warnings"]
+    try:
+        st = os.stat(path)
+        result["mtime_ns"], result["size"] = st.st_mtime_ns, st.st_size
+        with open(path, "rb") as f:
+            raw = f.read()
+        result["sha1"] = hashlib.sha1(raw).hexdigest()
+        data = json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        warnings.append(f"[Warning] impossible de lire {path}: {e}")
+        return result
+    if not isinstance(data, list):
+        warnings.append(f"[Warning] {path} ne contient pas une liste de questions — ignoré.")
+        return result
+    records = []
+    for item in data:
+        if not isinstance(item, dict) or not all(k in item for k in FIELDS):
+            # ignore malformed entries but continue
+            approx = item.get("id") if isinstance(item, dict) else None
+            warnings.append(f"[Warning] entrée mal formée dans {path}, id approximatif: {approx}")
+            continue
+        try:
+            qid = int(item["id"])
+            options = [str(o) for o in item["options"]]
+            bonne_option = int(item["bonne_option"])
+            # Basic validation
+            if not (0 <= bonne_option < len(options)):
+                warnings.append(f"[Warning] mauvaise bonne_option pour id {qid} dans {path} — ignorée.")
+                continue
+            if len(options) > 255:
+                warnings.append(f"[Warning] trop d'options pour id {qid} dans {path} — ignorée.")
+                continue
+            records.append((qid, str(item["theme"]), str(item["niveau"]), str(item["texte"]), options, bonne_option))
+        except Exception as e:
+            warnings.append(f"[Warning] impossible de créer Question depuis entrée {item.get('id')}: {e}")
+    result["chunk"] = compile_records(records)
+    return result
+
+
+def _sha1_of(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class QuestionSnapshot:
+    """
+    Instantané compilé (pickle) des fichiers de questions déjà validés.
+    Une entrée est réutilisée si mtime et taille correspondent, ou, à taille égale,
+    si le sha1 du contenu est identique.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = self._read()
+        self.dirty = False
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = pickle.loads(mm)
+            if data.get("version") != CACHE_VERSION:
+                return {}
+            return data["files"]
+        except Exception:
+            return {}
+
+    def lookup(self, path: str) -> Optional[Dict[str, Any]]:
+        name = os.path.basename(path)
+        entry = self.files.get(name)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry
+        if entry["size"] == st.st_size and entry["sha1"] and _sha1_of(path) == entry["sha1"]:
+            # fichier touché mais contenu identique
+            entry["mtime_ns"] = st.st_mtime_ns
+            self.dirty = True
+            return entry
+        return None
+
+    def store(self, path: str, entry: Dict[str, Any]):
+        self.files[os.path.basename(path)] = entry
+        self.dirty = True
+
+    def prune(self, paths: List[str]):
+        keep = {os.path.basename(p) for p in paths}
+        for name in list(self.files):
+            if name not in keep:
+                del self.files[name]
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump({"version": CACHE_VERSION, "files": self.files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except Exception as e:
+            print(f"[Warning] impossible d'écrire le cache {self.path}: {e}")
+
+
+def load_question_files(paths: List[str], cache_path: Optional[str] = None, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Charge les fichiers donnés, dans l'ordre. Les fichiers inchangés sont repris
+    de l'instantané ; les autres sont analysés, en parallèle (processus) s'ils sont
+    assez nombreux. workers=1 force l'analyse séquentielle.
+    """
+    snapshot = QuestionSnapshot(cache_path) if cache_path else None
+    results: List[Optional[Dict[str, Any]]] = [None] * len(paths)
+    todo = []
+    for i, p in enumerate(paths):
+        cached = snapshot.lookup(p) if snapshot else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    workers = workers or os.cpu_count() or 1
+    if len(todo) >= PARALLEL_MIN_FILES and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(parse_question_file, [paths[i] for i in todo], chunksize=4))
+    else:
+        parsed = [parse_question_file(paths[i]) for i in todo]
+    metrics.inc("question_files_cached", len(paths) - len(todo))
+    for i, entry in zip(todo, parsed):
+        results[i] = entry
+        # mesurée dans le processus qui a analysé le fichier
+        metrics.observe("question_file_parse_ms", entry.get("parse_ms", 0.0))
+        if snapshot and entry["sha1"]:
+            snapshot.store(paths[i], entry)
+
+    if snapshot:
+        snapshot.prune(paths)
+        snapshot.save()
+    return results
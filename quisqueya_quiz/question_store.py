@@ -0,0 +1,159 @@
+# question_store.py
+from array import array
+from itertools import accumulate, islice
+from typing import Dict, Any, Iterable, Iterator, List
+from models import Question
+
+
+class StringTable:
+    """
+    Table de chaînes contiguës : toutes les chaînes vivent dans un seul str,
+    retrouvées par leurs offsets. Les ajouts sont concaténés au premier accès.
+    """
+
+    def __init__(self):
+        self._blob = ""
+        self._pending: List[str] = []
+        self._offsets = array("Q", [0])
+
+    def add(self, s: str) -> int:
+        self._pending.append(s)
+        self._offsets.append(self._offsets[-1] + len(s))
+        return len(self._offsets) - 2
+
+    def extend_blob(self, blob: str, lengths: Iterable[int]):
+        """Ajoute des chaînes déjà concaténées dans blob, de longueurs données."""
+        self._pending.append(blob)
+        self._offsets.extend(islice(accumulate(lengths, initial=self._offsets[-1]), 1, None))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if self._pending:
+            self._blob += "".join(self._pending)
+            self._pending = []
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+
+class _Interner:
+    """Associe chaque valeur distincte (thème, niveau) à un petit code entier."""
+
+    def __init__(self, max_codes: int):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._max = max_codes
+
+    def code(self, value: str) -> int:
+        c = self._codes.get(value)
+        if c is None:
+            c = len(self.values)
+            if c >= self._max:
+                raise ValueError(f"trop de valeurs distinctes (max {self._max})")
+            self._codes[value] = c
+            self.values.append(value)
+        return c
+
+
+def compile_records(records: List[tuple]) -> Dict[str, Any]:
+    """
+    Compile des enregistrements validés (id, theme, niveau, texte, options, bonne_option)
+    en un bloc de colonnes, picklable, que QuestionStore.extend_chunk ajoute en bloc.
+    """
+    themes, niveaux = _Interner(1 << 16), _Interner(1 << 8)
+    options = [o for r in records for o in r[4]]
+    return {
+        "ids": array("q", [r[0] for r in records]),
+        "themes": themes.values,
+        "theme_codes": array("H", [themes.code(r[1]) for r in records]),
+        "niveaux": niveaux.values,
+        "niveau_codes": array("B", [niveaux.code(r[2]) for r in records]),
+        "textes": "".join(r[3] for r in records),
+        "texte_lengths": array("Q", [len(r[3]) for r in records]),
+        "options": "".join(options),
+        "option_lengths": array("Q", [len(o) for o in options]),
+        "opt_count": array("B", [len(r[4]) for r in records]),
+        "bonne_option": bytes(r[5] for r in records),
+    }
+
+
+class QuestionStore:
+    """
+    Stockage en colonnes des questions de la banque.
+
+    Thèmes et niveaux sont internés en codes (array), textes et options sont
+    dans des tables de chaînes contiguës, bonne_option dans un bytearray.
+    Les objets Question ne sont créés qu'à l'accès (store[i]).
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.theme_codes = array("H")
+        self.niveau_codes = array("B")
+        self.textes = StringTable()
+        self.options = StringTable()
+        self.opt_start = array("Q")
+        self.opt_count = array("B")
+        self.bonne_option = bytearray()
+        self._themes = _Interner(1 << 16)
+        self._niveaux = _Interner(1 << 8)
+
+    def add(self, id: int, theme: str, niveau: str, texte: str, options: List[str], bonne_option: int) -> int:
+        """Ajoute une question (déjà validée) et retourne sa position."""
+        if not (0 <= bonne_option < len(options) <= 255):
+            raise ValueError(f"options/bonne_option invalides pour id {id}")
+        theme_code = self._themes.code(theme)
+        niveau_code = self._niveaux.code(niveau)
+        self.ids.append(id)
+        self.theme_codes.append(theme_code)
+        self.niveau_codes.append(niveau_code)
+        self.textes.add(texte)
+        self.opt_start.append(len(self.options))
+        for opt in options:
+            self.options.add(str(opt))
+        self.opt_count.append(len(options))
+        self.bonne_option.append(bonne_option)
+        return len(self.ids) - 1
+
+    def extend_chunk(self, chunk: Dict[str, Any]):
+        """Ajoute un bloc produit par compile_records (codes locaux remappés)."""
+        theme_map = [self._themes.code(t) for t in chunk["themes"]]
+        niveau_map = [self._niveaux.code(n) for n in chunk["niveaux"]]
+        self.ids.extend(chunk["ids"])
+        self.theme_codes.extend(map(theme_map.__getitem__, chunk["theme_codes"]))
+        self.niveau_codes.extend(map(niveau_map.__getitem__, chunk["niveau_codes"]))
+        self.textes.extend_blob(chunk["textes"], chunk["texte_lengths"])
+        counts = chunk["opt_count"]
+        self.opt_start.extend(islice(accumulate(counts, initial=len(self.options)), len(counts)))
+        self.options.extend_blob(chunk["options"], chunk["option_lengths"])
+        self.opt_count.extend(counts)
+        self.bonne_option.extend(chunk["bonne_option"])
+
+    def append(self, q: Question):
+        self.add(q.id, q.theme, q.niveau, q.texte, q.options, q.bonne_option)
+
+    def theme_at(self, i: int) -> str:
+        return self._themes.values[self.theme_codes[i]]
+
+    def niveau_at(self, i: int) -> str:
+        return self._niveaux.values[self.niveau_codes[i]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> Question:
+        if i < 0:
+            i += len(self.ids)
+        start = self.opt_start[i]
+        return Question(
+            id=self.ids[i],
+            theme=self.theme_at(i),
+            niveau=self.niveau_at(i),
+            texte=self.textes[i],
+            options=[self.options[j] for j in range(start, start + self.opt_count[i])],
+            bonne_option=self.bonne_option[i],
+        )
+
+    def __iter__(self) -> Iterator[Question]:
+        for i in range(len(self.ids)):
+            yield self[i]
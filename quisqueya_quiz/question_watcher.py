@@ -0,0 +1,125 @@
+# question_watcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import time
+from typing import Callable, Optional
+
+# événements inotify utiles (voir <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class _Inotify:
+    """Accès minimal à inotify (Linux) via ctypes ; lève OSError si indisponible."""
+
+    def __init__(self, folder: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify indisponible")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), _MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, "inotify_add_watch")
+
+    def wait(self, timeout: float) -> bool:
+        """Attend un événement au plus timeout secondes ; vide la file et retourne True si reçu."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        self._drain()
+        return True
+
+    def _drain(self):
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class QuestionWatcher:
+    """
+    Surveille le dossier des questions dans un thread d'arrière-plan et appelle
+    QuestionBank.reload_changed() quand un fichier change.
+
+    Par défaut : inotify si disponible, sinon scrutation des mtimes toutes les
+    interval secondes. Le thread est daemon et ne touche pas au terminal ;
+    les statistiques de chaque rechargement sont passées à on_reload et
+    cumulées dans self.stats.
+    """
+
+    def __init__(self, bank, interval: float = 2.0, use_inotify: Optional[bool] = None,
+                 on_reload: Optional[Callable[[dict], None]] = None, debounce: float = 0.2):
+        self.bank = bank
+        self.interval = interval
+        self.on_reload = on_reload
+        self.debounce = debounce
+        self.stats = {"reloads": 0, "questions_touched": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0, "errors": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify is not False and os.path.isdir(bank.folder):
+            try:
+                self._inotify = _Inotify(bank.folder)
+            except (OSError, AttributeError):
+                if use_inotify:
+                    raise
+                self._inotify = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def start(self) -> "QuestionWatcher":
+        self._thread = threading.Thread(target=self._run, name="question-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify:
+                if not self._inotify.wait(self.interval):
+                    continue
+                # laisse l'écrivain terminer (plusieurs événements par sauvegarde)
+                time.sleep(self.debounce)
+                self._inotify._drain()
+            elif self._stop.wait(self.interval):
+                break
+            self.check()
+
+    def check(self) -> Optional[dict]:
+        """Lance un rechargement incrémental maintenant ; retourne ses statistiques."""
+        try:
+            stats = self.bank.reload_changed()
+        except Exception:
+            self.stats["errors"] += 1
+            return None
+        if stats:
+            self.stats["reloads"] += 1
+            self.stats["questions_touched"] += stats["questions_touched"]
+            self.stats["latency_ms_total"] += stats["latency_ms"]
+            self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], stats["latency_ms"])
+            if self.on_reload:
+                self.on_reload(stats)
+        return stats
@@ -1,106 +1,118 @@
 # quiz.py
+import asyncio
+import itertools
+import os
 import time
-import threading
-from typing import List, Optional
+import uuid
+from typing import List, Optional, Tuple
 from models import Question
 from storage import Storage
 from datetime import datetime
+from utils import StdinLines
+from render import Pacing, TerminalRenderer, default_pacing
+import metrics
 
-def input_with_timeout(prompt: str, timeout: Optional[float]) -> Optional[str]:
+# nom de l'instance (variable QUISQUEYA_NODE, sinon aléatoire) et compteur de parties du processus
+NODE_ENV = "QUISQUEYA_NODE"
+_NODE = os.environ.get(NODE_ENV) or uuid.uuid4().hex[:8]
+_game_seq = itertools.count(1)
+
+
+def new_game_id(player_name: str, ts: float) -> str:
     """
-    Lit un input avec timeout en utilisant un thread.
-    Limitation : si timeout atteint, le thread input reste bloqué en arrière-plan.
-    Retourne None si timeout atteint, sinon la chaîne entrée.
+    Identifiant de partie unique entre processus et instances :
+    <joueur>_<horodatage>_<instance>-<pid>-<compteur>. Deux parties d'un même
+    joueur commencées dans la même seconde ne se confondent plus.
     """
-    if timeout is None or timeout <= 0:
-        try:
-            return input(prompt)
-        except (KeyboardInterrupt, EOFError):
-            return ""
-    result = {"answer": None}
-    def target():
-        try:
-            result["answer"] = input(prompt)
-        except Exception:
-            result["answer"] = None
-
-    thread = threading.Thread(target=target, daemon=True)
-    thread.start()
-    thread.join(timeout)
-    if thread.is_alive():
-        # Timeout
-        return None
-    return result["answer"]
-
-class QuizGame:
-    def __init__(self, questions: List[Question], player_name: str, storage: Storage, timer_per_question: Optional[int] = None):
+    return f"{player_name}_{int(ts)}_{_NODE}-{os.getpid()}-{next(_game_seq)}"
+
+
+class QuizState:
+    """
+    État et score d'une partie, sans aucune entrée/sortie.
+    Utilisé par QuizGame (terminal) et par le serveur réseau.
+    telemetry (telemetry.AnswerLog, optionnel) reçoit chaque réponse avec sa latence.
+    """
+    def __init__(self, questions: List[Question], player_name: str, timer_per_question: Optional[int] = None,
+                 telemetry=None):
         self.questions = questions
         self.player_name = player_name
-        self.storage = storage
         self.timer_per_question = timer_per_question
+        self.telemetry = telemetry
+        self.game_id = None
         self.score = 0
         self.bonnes = 0
         self.mauvaises = 0
         self.start_ts = None
         self.end_ts = None
+        # position de la question courante
+        self.index = 0
+        # instant où la question courante a été posée (perf_counter)
+        self.asked_at = None
+        # (id question, correct) de chaque réponse donnée
+        self.results: List[Tuple[int, Optional[bool]]] = []
 
-    def ask_question(self, q: Question, index: int, total: int):
-        from utils import clear, safe_input
-        clear()
-        print(q.format_for_display(index, total))
-        prompt = "Ta réponse (nombre) : "
-        ans = None
-        if self.timer_per_question and self.timer_per_question > 0:
-            print(f"(Tu as {self.timer_per_question} secondes pour répondre)")
-            ans = input_with_timeout(prompt, self.timer_per_question)
-            if ans is None:
-                print("Temps écoulé ! Question considérée comme non répondue / incorrecte.")
-                self.mauvaises += 1
-                time.sleep(1.2)
-                return
-        else:
-            ans = safe_input(prompt)
+    def start(self):
+        self.start_ts = time.time()
+        self.game_id = new_game_id(self.player_name, self.start_ts)
+        self.present()
+
+    def present(self):
+        """Marque l'affichage de la question courante : point de départ de la latence."""
+        self.asked_at = time.perf_counter()
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.questions)
+
+    def current(self) -> Optional[Question]:
+        return None if self.finished else self.questions[self.index]
+
+    def answer(self, ans: Optional[str]) -> Tuple[Optional[bool], str]:
+        """Répond à la question courante (None = temps écoulé) et passe à la suivante."""
+        q = self.current()
+        if q is None:
+            raise RuntimeError("partie terminée")
+        latency_ms = (time.perf_counter() - self.asked_at) * 1000 if self.asked_at else 0.0
+        self.index += 1
+        if self.finished:
+            self.end_ts = time.time()
+        correct, message = self.check_answer(q, ans)
+        self.results.append((q.id, correct))
+        if self.telemetry is not None:
+            self.telemetry.record(self.game_id, q.id, ans, correct, latency_ms, ans is None)
+        return correct, message
+
+    def check_answer(self, q: Question, ans: Optional[str]) -> Tuple[Optional[bool], str]:
+        """
+        Met à jour le score pour la réponse ans (None = temps écoulé).
+        Retourne (correct, message) ; correct vaut None si aucune réponse valide.
+        """
+        if ans is None:
+            self.mauvaises += 1
+            return None, "Temps écoulé ! Question considérée comme non répondue / incorrecte."
         try:
             choice = int(ans.strip()) - 1
         except Exception:
-            print("Réponse invalide — considérée comme incorrecte.")
             self.mauvaises += 1
-            time.sleep(1.2)
-            return
+            return None, "Réponse invalide — considérée comme incorrecte."
         if choice == q.bonne_option:
-            print("Bonne réponse !")
             self.bonnes += 1
             self.score += 1
-        else:
-            # protect against index error
-            correct = q.options[q.bonne_option] if 0 <= q.bonne_option < len(q.options) else "Inconnue"
-            print(f"Mauvaise réponse. La bonne était: {correct}")
-            self.mauvaises += 1
-        time.sleep(1.1)
+            return True, "Bonne réponse !"
+        # protect against index error
+        correct = q.options[q.bonne_option] if 0 <= q.bonne_option < len(q.options) else "Inconnue"
+        self.mauvaises += 1
+        return False, f"Mauvaise réponse. La bonne était: {correct}"
 
-    def play(self):
-        from utils import clear
-        self.start_ts = time.time()
+    def result_entry(self) -> dict:
+        """Construit l'entrée de score de la partie terminée."""
         total = len(self.questions)
-        clear()
-        print(f"Début de la partie — joueur : {self.player_name} — {total} questions")
-        time.sleep(0.8)
-        for i, q in enumerate(self.questions, start=1):
-            self.ask_question(q, i, total)
-        self.end_ts = time.time()
-        duration = int(self.end_ts - self.start_ts) if self.start_ts else 0
+        duration = int(self.end_ts - self.start_ts) if self.start_ts and self.end_ts else 0
         # pourcentage de bonnes réponses
         pourcentage = round((self.bonnes / total) * 100, 1) if total > 0 else 0.0
-        clear()
-        print("=== Résumé de la partie ===")
-        print(f"Joueur : {self.player_name}")
-        print(f"Bonnes réponses : {self.bonnes}/{total} ({pourcentage}%)")
-        print(f"Mauvaises réponses : {self.mauvaises}/{total}")
-        print(f"Score total : {self.score}")
-        print(f"Durée : {duration} s")
-        # sauvegarde
-        entry = {
-            "id_partie": f"{self.player_name}_{int(time.time())}",
+        return {
+            "id_partie": self.game_id or new_game_id(self.player_name, time.time()),
             "joueur_nom": self.player_name,
             "date_heure": datetime.utcnow().isoformat(),
             "theme": self.questions[0].theme if len(set(q.theme for q in self.questions)) == 1 else "mix",
@@ -112,10 +124,85 @@ class QuizGame:
             "pourcentage": pourcentage,
             "duree_seconds": duration
         }
+
+
+class QuizGame(QuizState):
+    """
+    Partie jouée dans le terminal. renderer (TerminalRenderer par défaut) gère
+    l'affichage, pacing les pauses (voir render.default_pacing).
+    """
+    def __init__(self, questions: List[Question], player_name: str, storage: Storage, timer_per_question: Optional[int] = None,
+                 renderer=None, pacing: Optional[Pacing] = None, telemetry=None):
+        super().__init__(questions, player_name, timer_per_question, telemetry)
+        self.storage = storage
+        self.renderer = renderer or TerminalRenderer()
+        self.pacing = pacing or default_pacing()
+
+    async def ask_question(self, q: Question, index: int, total: int, reader: StdinLines):
+        out = self.renderer
+        timed = bool(self.timer_per_question and self.timer_per_question > 0)
+        with metrics.timer("render_ms"):
+            out.clear()
+            out.show(q.format_for_display(index, total))
+            prompt = "Ta réponse (nombre) : "
+            if timed:
+                out.show(f"(Tu as {self.timer_per_question} secondes pour répondre)")
+            out.prompt(prompt)
+        reader.discard_stale()
+        self.present()
         try:
-            self.storage.save_score(entry)
-            print("Score enregistré.")
-        except Exception as e:
-            print(f"[Error] impossible de sauvegarder le score: {e}")
-        input("Appuie sur Entrée pour revenir au menu principal...")
-        return entry
+            if timed:
+                ans = await asyncio.wait_for(reader.readline(), self.timer_per_question)
+            else:
+                ans = await reader.readline()
+            if ans is None:
+                # fin de l'entrée : réponse vide
+                out.show("")
+                ans = ""
+        except asyncio.TimeoutError:
+            out.show("")
+            ans = None
+        metrics.observe("input_wait_ms", (time.perf_counter() - self.asked_at) * 1000)
+        correct, message = self.answer(ans)
+        out.show(message)
+        await self.pacing.pause(self.pacing.after_invalid if correct is None else self.pacing.after_answer)
+
+    async def play_async(self, reader: Optional[StdinLines] = None) -> dict:
+        """Déroule la partie dans la boucle asyncio courante, avec un seul lecteur de stdin."""
+        reader = reader or StdinLines()
+        reader.attach()
+        out = self.renderer
+        try:
+            self.start()
+            total = len(self.questions)
+            out.clear()
+            out.show(f"Début de la partie — joueur : {self.player_name} — {total} questions")
+            await self.pacing.pause(self.pacing.before_start)
+            while not self.finished:
+                await self.ask_question(self.current(), self.index + 1, total, reader)
+            entry = self.result_entry()
+            metrics.inc("games_played")
+            out.clear()
+            out.show("=== Résumé de la partie ===")
+            out.show(f"Joueur : {self.player_name}")
+            out.show(f"Bonnes réponses : {self.bonnes}/{total} ({entry['pourcentage']}%)")
+            out.show(f"Mauvaises réponses : {self.mauvaises}/{total}")
+            out.show(f"Score total : {self.score}")
+            out.show(f"Durée : {entry['duree_seconds']} s")
+            # sauvegarde
+            try:
+                with metrics.timer("save_ms"):
+                    self.storage.save_score(entry)
+                out.show("Score enregistré.")
+            except Exception as e:
+                out.show(f"[Error] impossible de sauvegarder le score: {e}")
+            if self.pacing.wait_end:
+                out.prompt("Appuie sur Entrée pour revenir au menu principal...")
+                reader.discard_stale()
+                await reader.readline()
+            return entry
+        finally:
+            reader.detach()
+
+    def play(self) -> dict:
+        return asyncio.run(self.play_async())
@@ -0,0 +1,104 @@
+# quiz_loadgen.py - Générateur de charge pour quiz_server.py
+# Usage : python quiz_loadgen.py [--clients 200] [--games 5] [--port 8765] [--local]
+# --local démarre un serveur (scores dans une base SQLite temporaire) dans le même processus.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from quiz_server import DEFAULT_PORT, QuizServer
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+async def _client(n: int, host: str, port: int, games: int, think: float, timer: int, latencies: List[float], rng: random.Random):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def recv() -> dict:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connexion fermée par le serveur")
+        return json.loads(line)
+
+    await recv()  # hello
+    done = 0
+    for _ in range(games):
+        writer.write((json.dumps({"cmd": "start", "player": f"bot{n}", "timer": timer}) + "\n").encode())
+        msg = await recv()
+        if msg["type"] != "question":
+            break
+        while True:
+            if think:
+                await asyncio.sleep(rng.uniform(0, think))
+            choice = rng.randint(1, len(msg["options"]))
+            t0 = time.perf_counter()
+            writer.write((json.dumps({"cmd": "answer", "choice": choice}) + "\n").encode())
+            msg = await recv()
+            while msg["type"] != "result":
+                msg = await recv()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            msg = await recv()
+            if msg["type"] == "summary":
+                done += 1
+                break
+    writer.write(b'{"cmd": "quit"}\n')
+    await writer.drain()
+    writer.close()
+    return done
+
+
+async def run(host: str, port: int, clients: int, games: int, think: float, timer: int, seed: int, local: bool):
+    server = None
+    tmp = None
+    if local:
+        from question_bank import QuestionBank
+        from sqlite_storage import SQLiteStorage
+        tmp = tempfile.TemporaryDirectory()
+        server = QuizServer(QuestionBank(folder="questions"), SQLiteStorage(os.path.join(tmp.name, "scores.db"), legacy_path=None, batch_size=64))
+        await server.start(host, port)
+    latencies: List[float] = []
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    done = await asyncio.gather(*[
+        _client(n, host, port, games, think, timer, latencies, random.Random(rng.random()))
+        for n in range(clients)
+    ])
+    elapsed = time.perf_counter() - t0
+    if server:
+        await server.drain()
+        server.close()
+        server.storage.close()
+        tmp.cleanup()
+    total = sum(done)
+    print(f"clients: {clients}, parties terminées: {total} en {elapsed:.2f} s")
+    print(f"parties/s : {total / elapsed:.1f}")
+    print(f"latence réponse p50 : {percentile(latencies, 50):.2f} ms   p99 : {percentile(latencies, 99):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de charge pour le serveur de quiz")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--games", type=int, default=5, help="parties par client")
+    parser.add_argument("--think", type=float, default=0.0, help="temps de réflexion max (s) avant chaque réponse")
+    parser.add_argument("--timer", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="démarre un serveur dans le même processus")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.clients, args.games, args.think, args.timer, args.seed, args.local))
+
+
+if __name__ == "__main__":
+    main()
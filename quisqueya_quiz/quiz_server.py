@@ -0,0 +1,341 @@
+# quiz_server.py - Serveur de quiz multi-sessions (TCP, une ligne JSON par message)
+# Usage : python quiz_server.py [--host 127.0.0.1] [--port 8765] [--storage sqlite]
+#
+# Protocole (client -> serveur), en JSON ou en texte :
+#   {"cmd": "start", "player": "Ana", "theme": "Histoire", "timer": 15}   |  start Ana [thème]
+#   {"cmd": "answer", "choice": 2}                                       |  2
+#   {"cmd": "themes"}                                                    |  themes
+#   {"cmd": "top", "n": 10, "theme": null}                               |  top [n] [thème]
+#   {"cmd": "quit"}                                                      |  quit
+# Réponses du serveur : {"type": "hello" | "question" | "result" | "summary" | "themes" | "top" | "error", ...}
+
+import argparse
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from question_bank import QuestionBank
+from quiz import QuizState
+from storage import open_storage
+from telemetry import TELEMETRY_FILE, AnswerLog
+import metrics
+
+DEFAULT_PORT = 8765
+DEFAULT_TIMER = 15
+
+
+class CommandError(ValueError):
+    """Champ de commande invalide : renvoyé au client en {"type": "error"}."""
+
+
+def _text_field(cmd: Dict[str, Any], key: str, default: Optional[str] = None) -> Optional[str]:
+    value = cmd.get(key)
+    if value is None or value == "":
+        return default
+    if not isinstance(value, str):
+        raise CommandError(f"{key} doit être un texte")
+    return value
+
+
+def _number_field(cmd: Dict[str, Any], key: str, default: float) -> float:
+    value = cmd.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise CommandError(f"{key} doit être un nombre")
+    try:
+        number = float(value)
+    except ValueError:
+        raise CommandError(f"{key} doit être un nombre") from None
+    if not math.isfinite(number) or number < 0:
+        raise CommandError(f"{key} doit être un nombre positif ou nul")
+    return number
+
+
+class TimerWheel:
+    """
+    Roue de minuteries : les échéances de toutes les sessions sont gérées par une
+    seule tâche qui avance d'un cran toutes les tick secondes. Une échéance est
+    rangée dans la case (deadline / tick) % slots ; la case est traitée une fois
+    son intervalle écoulé et les échéances des tours suivants y restent.
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 1024):
+        self.tick = tick
+        self.slots: List[List[list]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._cursor = int(self._loop.time() / self.tick)
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> list:
+        deadline = self._loop.time() + delay
+        # jamais avant le curseur, sinon la case ne serait relue qu'au tour suivant
+        slot = max(int(deadline / self.tick), self._cursor)
+        handle = [deadline, callback]
+        self.slots[slot % len(self.slots)].append(handle)
+        return handle
+
+    @staticmethod
+    def cancel(handle: Optional[list]):
+        if handle:
+            handle[1] = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            now = self._loop.time()
+            while (self._cursor + 1) * self.tick <= now:
+                bucket = self.slots[self._cursor % len(self.slots)]
+                self._cursor += 1
+                if not bucket:
+                    continue
+                keep = []
+                for handle in bucket:
+                    if handle[1] is None:
+                        continue
+                    if handle[0] <= now:
+                        callback, handle[1] = handle[1], None
+                        try:
+                            callback()
+                        except Exception as e:
+                            print(f"[Error] minuterie: {e}")
+                    else:
+                        # échéance d'un tour ultérieur de la roue
+                        keep.append(handle)
+                bucket[:] = keep
+
+
+class QuizSession:
+    """Une connexion client : commandes, partie en cours et minuterie de la question."""
+
+    def __init__(self, server: "QuizServer", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.game: Optional[QuizState] = None
+        self._timer: Optional[list] = None
+
+    def send(self, msg: Dict[str, Any]):
+        if not self.writer.is_closing():
+            self.writer.write((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    async def run(self):
+        self.send({"type": "hello", "message": "Bienvenue dans Quisqueya Système Quiz"})
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                cmd = self._parse(line.decode("utf-8", errors="replace").strip())
+                if cmd is None:
+                    continue
+                if cmd.get("cmd") == "quit":
+                    break
+                try:
+                    await self.handle(cmd)
+                except CommandError as e:
+                    self.send({"type": "error", "message": str(e)})
+                except Exception as e:
+                    # une commande en échec ne coupe pas la connexion
+                    print(f"[Error] commande {cmd.get('cmd')!r}: {e}")
+                    self.send({"type": "error", "message": "erreur interne"})
+                await self.writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            TimerWheel.cancel(self._timer)
+            self.writer.close()
+
+    @staticmethod
+    def _parse(line: str) -> Optional[Dict[str, Any]]:
+        if not line:
+            return None
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                return {"cmd": "invalid"}
+        parts = line.split()
+        word = parts[0].lower()
+        if word.isdigit():
+            return {"cmd": "answer", "choice": word}
+        if word == "start":
+            return {"cmd": "start", "player": parts[1] if len(parts) > 1 else "Joueur",
+                    "theme": " ".join(parts[2:]) or None}
+        if word == "top":
+            n = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 10
+            return {"cmd": "top", "n": n, "theme": " ".join(parts[2:]) or None}
+        return {"cmd": word}
+
+    async def handle(self, cmd: Dict[str, Any]):
+        name = cmd.get("cmd")
+        if name == "start":
+            self.start_game(cmd)
+        elif name == "answer":
+            if self.game is None or self.game.finished:
+                self.send({"type": "error", "message": "aucune question en cours"})
+            else:
+                self.resolve(str(cmd.get("choice", "")))
+        elif name == "themes":
+            self.send({"type": "themes", "themes": self.server.bank.list_themes()})
+        elif name == "top":
+            n = _number_field(cmd, "n", 10)
+            if n != int(n):
+                raise CommandError("n doit être un entier")
+            n = max(1, min(int(n), 50))
+            top = await self.server.run_storage(self.server.storage.top_n, n, _text_field(cmd, "theme"))
+            self.send({"type": "top", "scores": top})
+        else:
+            self.send({"type": "error", "message": f"commande inconnue: {name}"})
+
+    def start_game(self, cmd: Dict[str, Any]):
+        theme = _text_field(cmd, "theme")
+        player = _text_field(cmd, "player", "Joueur")
+        timer = _number_field(cmd, "timer", self.server.timer)
+        timer = int(timer) if timer == int(timer) else timer
+        TimerWheel.cancel(self._timer)
+        qlist = self.server.bank.sample_questions(count=10, themes=[theme] if theme else None, player=player)
+        if not qlist:
+            self.send({"type": "error", "message": "aucune question disponible"})
+            return
+        self.game = QuizState(qlist, player, timer_per_question=timer, telemetry=self.server.telemetry)
+        self.game.start()
+        self.ask()
+
+    def ask(self):
+        game = self.game
+        q = game.current()
+        game.present()
+        self.send({
+            "type": "question", "index": game.index + 1, "total": len(game.questions),
+            "id": q.id, "theme": q.theme, "niveau": q.niveau, "texte": q.texte,
+            "options": q.options, "timer": game.timer_per_question,
+        })
+        if game.timer_per_question and game.timer_per_question > 0:
+            self._timer = self.server.wheel.schedule(game.timer_per_question, lambda g=game: self._timeout(g))
+
+    def _timeout(self, game: QuizState):
+        # la partie a pu être remplacée entre-temps
+        if game is self.game and not game.finished:
+            self.resolve(None)
+
+    def resolve(self, ans: Optional[str]):
+        TimerWheel.cancel(self._timer)
+        self._timer = None
+        game = self.game
+        correct, message = game.answer(ans)
+        self.send({"type": "result", "correct": correct, "timed_out": ans is None, "message": message})
+        if not game.finished:
+            self.ask()
+            return
+        entry = game.result_entry()
+        self.send({"type": "summary", "entry": entry})
+        self.server.games_finished += 1
+        metrics.inc("games_played")
+        self.server.save_later(entry)
+
+
+class QuizServer:
+    """
+    Serveur asyncio : toutes les sessions partagent une QuestionBank, un stockage
+    et une roue de minuteries. Les écritures de scores passent par un unique
+    thread, le stockage n'étant pas prévu pour des écrivains concurrents.
+    """
+
+    def __init__(self, bank: QuestionBank, storage, timer: int = DEFAULT_TIMER, telemetry=None):
+        self.bank = bank
+        self.storage = storage
+        self.timer = timer
+        self.telemetry = telemetry
+        self.wheel = TimerWheel()
+        self.games_finished = 0
+        self._storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._server: Optional[asyncio.AbstractServer] = None
+        # sauvegardes en cours : référencées jusqu'à leur fin, attendues par drain()
+        self._saves: Set[asyncio.Task] = set()
+
+    async def run_storage(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._storage_executor, fn, *args)
+
+    async def save(self, entry: Dict[str, Any]):
+        try:
+            with metrics.timer("save_ms"):
+                await self.run_storage(self.storage.save_score, entry)
+        except Exception as e:
+            print(f"[Error] impossible de sauvegarder le score: {e}")
+
+    def save_later(self, entry: Dict[str, Any]):
+        task = asyncio.get_running_loop().create_task(self.save(entry))
+        self._saves.add(task)
+        task.add_done_callback(self._saves.discard)
+
+    async def drain(self):
+        """Attend les sauvegardes de scores encore en cours."""
+        while self._saves:
+            await asyncio.gather(*list(self._saves), return_exceptions=True)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await QuizSession(self, reader, writer).run()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.wheel.start()
+        self._server = await asyncio.start_server(self._client, host, port, limit=1 << 16, backlog=4096)
+        return self._server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
+        print(f"Serveur de quiz en écoute sur {addrs}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.drain()
+
+    def close(self):
+        self.wheel.stop()
+        if self._server:
+            self._server.close()
+        self._storage_executor.shutdown(wait=True)
+        if self.telemetry:
+            self.telemetry.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de quiz multi-sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--folder", default="questions")
+    parser.add_argument("--storage", default=None, help="json, log, sqlite ou sharded (défaut : QUISQUEYA_STORAGE ou json)")
+    parser.add_argument("--timer", type=int, default=DEFAULT_TIMER, help="secondes par question")
+    parser.add_argument("--telemetry", default=TELEMETRY_FILE, help="journal des réponses ('' pour désactiver)")
+    parser.add_argument("--near-dups", action="store_true",
+                        help="jamais deux questions quasi identiques dans une partie (voir neardup.py)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup(args.metrics, args.profile)
+
+    telemetry = AnswerLog(args.telemetry) if args.telemetry else None
+    server = QuizServer(QuestionBank(folder=args.folder, near_dups=args.near_dups), open_storage(args.storage, stats=True), timer=args.timer,
+                        telemetry=telemetry)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# render.py - Affichage (terminal ou sans terminal) et rythme des parties
+import asyncio
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+from utils import clear
+
+PACING_ENV = "QUISQUEYA_PACING"
+
+
+class TerminalRenderer:
+    """Affiche dans le terminal (effacement par séquence ANSI, voir utils.clear)."""
+
+    def clear(self):
+        clear()
+
+    def show(self, text: str = ""):
+        print(text)
+
+    def prompt(self, text: str):
+        print(text, end="", flush=True)
+
+
+class HeadlessRenderer:
+    """N'affiche rien ; garde éventuellement le texte produit (keep=True) pour inspection."""
+
+    def __init__(self, keep: bool = False):
+        self.lines: Optional[List[str]] = [] if keep else None
+
+    def clear(self):
+        pass
+
+    def show(self, text: str = ""):
+        if self.lines is not None:
+            self.lines.append(text)
+
+    def prompt(self, text: str):
+        self.show(text)
+
+
+@dataclass(frozen=True)
+class Pacing:
+    """Pauses d'une partie, en secondes ; wait_end attend [ENTRÉE] après le résumé."""
+    before_start: float = 0.8
+    after_answer: float = 1.1
+    after_invalid: float = 1.2
+    wait_end: bool = True
+
+    async def pause(self, seconds: float):
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+INTERACTIVE = Pacing()
+FAST = Pacing(before_start=0.0, after_answer=0.0, after_invalid=0.0, wait_end=False)
+
+
+def default_pacing() -> Pacing:
+    """
+    Rythme choisi par la variable QUISQUEYA_PACING (interactive / fast) ;
+    par défaut interactif si stdin est un terminal, rapide sinon.
+    """
+    mode = os.environ.get(PACING_ENV, "").lower()
+    if mode == "fast":
+        return FAST
+    if mode == "interactive":
+        return INTERACTIVE
+    try:
+        return INTERACTIVE if sys.stdin.isatty() else FAST
+    except (AttributeError, ValueError):
+        return FAST
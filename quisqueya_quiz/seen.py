@@ -0,0 +1,105 @@
+# seen.py - Questions vues récemment par chaque joueur (filtres de Bloom tournants)
+import math
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+# questions récentes mémorisées par joueur (plafonné à la moitié de la banque)
+WINDOW = 200
+FP_RATE = 0.01
+# joueurs suivis au plus ; les moins récents sont oubliés
+MAX_PLAYERS = 50_000
+
+_M1 = 0x9E3779B97F4A7C15
+_M2 = 0xC2B2AE3D27D4EB4F
+_MASK = (1 << 64) - 1
+
+
+class RollingBloom:
+    """
+    Deux générations de filtre de Bloom : les ajouts vont dans la courante ;
+    quand elle atteint capacity éléments, elle devient la précédente et l'ancienne
+    précédente est oubliée. Retient donc entre capacity et 2 x capacity éléments récents.
+    """
+    __slots__ = ("bits", "hashes", "capacity", "count", "current", "previous")
+
+    def __init__(self, capacity: int, fp_rate: float = FP_RATE):
+        self.capacity = max(1, capacity)
+        self.bits = max(64, int(math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.count = 0
+        self.current = bytearray((self.bits + 7) // 8)
+        self.previous = bytearray(len(self.current))
+
+    def _positions(self, key: int):
+        # double hachage : h1 + i * h2
+        h1 = (key * _M1) & _MASK
+        h2 = ((key ^ (key >> 29)) * _M2 & _MASK) | 1
+        m = self.bits
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % m
+
+    def add(self, key: int):
+        if self.count >= self.capacity:
+            self.previous, self.current = self.current, bytearray(len(self.current))
+            self.count = 0
+        cur = self.current
+        for b in self._positions(key):
+            cur[b >> 3] |= 1 << (b & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        cur, prev = self.current, self.previous
+        in_cur = in_prev = True
+        for b in self._positions(key):
+            byte, bit = b >> 3, 1 << (b & 7)
+            in_cur = in_cur and bool(cur[byte] & bit)
+            in_prev = in_prev and bool(prev[byte] & bit)
+            if not (in_cur or in_prev):
+                return False
+        return True
+
+
+class SeenSets:
+    """
+    Ids des questions vues récemment, par joueur. Chaque joueur a un RollingBloom
+    de taille fixe (dimensionné sur la banque au premier tirage) ; au-delà de
+    max_players joueurs, le moins récemment actif est oublié.
+    """
+
+    def __init__(self, window: int = WINDOW, fp_rate: float = FP_RATE, max_players: int = MAX_PLAYERS):
+        self.window = window
+        self.fp_rate = fp_rate
+        self.max_players = max_players
+        self._players: "OrderedDict[str, RollingBloom]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def _get(self, player: str, bank_size: int, create: bool) -> Optional[RollingBloom]:
+        f = self._players.get(player)
+        if f is not None:
+            self._players.move_to_end(player)
+            return f
+        if not create:
+            return None
+        # ne jamais exclure plus de la moitié de la banque
+        window = max(1, min(self.window, bank_size // 2))
+        f = self._players[player] = RollingBloom((window + 1) // 2, self.fp_rate)
+        if len(self._players) > self.max_players:
+            self._players.popitem(last=False)
+        return f
+
+    def add(self, player: str, ids: Iterable[int], bank_size: int):
+        f = self._get(player, bank_size, create=True)
+        for qid in ids:
+            f.add(qid)
+
+    def excluder(self, player: Optional[str]) -> Optional[Callable[[int], bool]]:
+        """Prédicat « déjà vue récemment » sur un id de question, ou None si rien à exclure."""
+        if not player:
+            return None
+        f = self._get(player, 0, create=False)
+        return f.__contains__ if f is not None else None
+
+    def forget(self, player: str):
+        self._players.pop(player, None)
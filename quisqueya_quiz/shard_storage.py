@@ -0,0 +1,381 @@
+# shard_storage.py - Scores partitionnés par thème et par mois : scores/<thème>/<AAAA-MM>.jsonl
+# Usage : python shard_storage.py migrate scores.json [--root scores] [--no-compact]   (aussi .jsonl, .db)
+#         python shard_storage.py compact [--root scores] [--before 2025-12]
+#         python shard_storage.py info [--root scores]
+#
+# Un mois clos est compacté en segment <AAAA-MM>.seg, jamais modifié en place :
+#   lignes JSON triées par clé de classement (score_key), puis l'index (une ligne JSON),
+#   puis la fin <4sQ (magie, position de l'index).
+
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import metrics
+from journal import file_lock, read_journal
+from storage import SCORES_FILE, iter_json_array, score_filter, score_key, top_n_stream
+
+SHARD_ROOT = "scores"
+LIVE_SUFFIX = ".jsonl"
+SEGMENT_SUFFIX = ".seg"
+COMPACTING_SUFFIX = ".compacting"
+SEGMENT_MAGIC = b"QQS1"
+_TRAILER = struct.Struct("<4sQ")
+# partition des entrées sans date exploitable
+UNKNOWN_MONTH = "0000-00"
+_MONTH = re.compile(r"\d{4}-\d{2}$")
+# entrées par écriture lors d'une migration
+MIGRATE_BATCH = 50_000
+
+
+def theme_dir(theme: Optional[str]) -> str:
+    """Nom de répertoire (réversible) d'un thème."""
+    name = quote(theme or "", safe=" ")
+    if not name or name[0] in "._":
+        name = "%{:02X}".format(ord(name[0])) + name[1:] if name else "_"
+    return name
+
+
+def dir_theme(name: str) -> Optional[str]:
+    return None if name == "_" else unquote(name)
+
+
+def month_of(entry: Dict[str, Any]) -> str:
+    month = str(entry.get("date_heure") or "")[:7]
+    return month if _MONTH.match(month) else UNKNOWN_MONTH
+
+
+def month_selected(month: str, since: Optional[str] = None, until: Optional[str] = None) -> bool:
+    """Le mois peut-il contenir des dates entre les préfixes since et until (inclus) ?"""
+    if since:
+        s = since[:7]
+        if month[:len(s)] < s:
+            return False
+    if until:
+        u = until[:7]
+        if month[:len(u)] > u:
+            return False
+    return True
+
+
+def write_segment(path: str, entries: Iterable[Dict[str, Any]], token: str) -> Dict[str, Any]:
+    """
+    Écrit un segment trié, suivi de son index. Pas de chmod en lecture seule :
+    sous Windows, os.replace échoue sur une cible en lecture seule (recompactage).
+    """
+    rows = sorted((e for e in entries if isinstance(e, dict)), key=score_key)
+    dates = [e.get("date_heure", "") for e in rows]
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for e in rows:
+            f.write((json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8"))
+        footer = {
+            "rows": len(rows),
+            "data_end": f.tell(),
+            "token": token,
+            "date_min": min(dates, default=""),
+            "date_max": max(dates, default=""),
+            "niveaux": dict(Counter(str(e.get("niveau")) for e in rows)),
+        }
+        f.write((json.dumps(footer, ensure_ascii=False) + "\n").encode("utf-8"))
+        f.write(_TRAILER.pack(SEGMENT_MAGIC, footer["data_end"]))
+        metrics.inc("storage_bytes_written", f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return footer
+
+
+def read_footer(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        f.seek(-_TRAILER.size, os.SEEK_END)
+        magic, offset = _TRAILER.unpack(f.read(_TRAILER.size))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path}: segment invalide")
+        f.seek(offset)
+        return json.loads(f.readline())
+
+
+def iter_segment(path: str, footer: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Entrées d'un segment, dans l'ordre du classement."""
+    footer = footer or read_footer(path)
+    with open(path, "rb") as f:
+        while f.tell() < footer["data_end"]:
+            yield json.loads(f.readline())
+
+
+def _compacting_token(name: str) -> str:
+    # <mois>.<jeton>.<n>.compacting
+    return name.split(".")[1]
+
+
+class _Month:
+    """Fichiers d'un mois d'un thème : journal vivant, segment, restes de compactage."""
+    __slots__ = ("dir", "month", "live", "segment", "compacting")
+
+    def __init__(self, dirpath: str, month: str):
+        self.dir = dirpath
+        self.month = month
+        self.live: Optional[str] = None
+        self.segment: Optional[str] = None
+        self.compacting: List[str] = []
+
+    def pending(self, footer: Optional[Dict[str, Any]]) -> List[str]:
+        """Restes d'un compactage interrompu pas encore intégrés au segment."""
+        token = footer["token"] if footer else None
+        return [p for p in self.compacting if _compacting_token(os.path.basename(p)) != token]
+
+
+class ShardedStorage:
+    """
+    Scores répartis en partitions <root>/<thème>/<AAAA-MM>.jsonl selon le thème
+    et la date_heure de l'entrée. Le classement ne lit que les partitions du
+    thème et des mois demandés ; dans un segment compacté (trié), la lecture
+    s'arrête dès que n entrées correspondent aux filtres.
+    Les écritures prennent le verrou partagé de <root>/.lock, le compactage le
+    verrou exclusif.
+    """
+
+    def __init__(self, root: str = SHARD_ROOT, legacy_path: Optional[str] = SCORES_FILE):
+        self.root = root
+        self.path = root
+        fresh = not os.path.isdir(root)
+        os.makedirs(root, exist_ok=True)
+        self.lock_path = os.path.join(root, ".lock")
+        if fresh and legacy_path and os.path.isfile(legacy_path):
+            try:
+                n = self.import_from(legacy_path)
+                print(f"[Info] {n} score(s) migré(s) de {legacy_path} vers {root}/")
+            except Exception as e:
+                print(f"[Warning] migration de {legacy_path} impossible: {e}")
+
+    # -----------------------------
+    # Écriture
+    # -----------------------------
+
+    def save_score(self, entry: Dict[str, Any]):
+        self.save_many([entry])
+
+    def save_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute les entrées à leurs partitions : une écriture et un fsync par partition."""
+        parts: Dict[Tuple[str, str], List[str]] = {}
+        n = 0
+        for e in entries:
+            parts.setdefault((theme_dir(e.get("theme")), month_of(e)), []).append(json.dumps(e, ensure_ascii=False) + "\n")
+            n += 1
+        with file_lock(self.lock_path, exclusive=False):
+            for (tdir, month), lines in parts.items():
+                dirpath = os.path.join(self.root, tdir)
+                os.makedirs(dirpath, exist_ok=True)
+                data = "".join(lines).encode("utf-8")
+                # fichier rouvert à chaque lot : le compactage a pu le renommer entre-temps
+                fd = os.open(os.path.join(dirpath, month + LIVE_SUFFIX), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                metrics.inc("storage_bytes_written", len(data))
+        return n
+
+    def import_from(self, src: str) -> int:
+        """Ajoute les scores d'un scores.json, d'un journal .jsonl ou d'une base SQLite."""
+        n = 0
+        batch = []
+        for e in iter_source(src):
+            batch.append(e)
+            if len(batch) >= MIGRATE_BATCH:
+                n += self.save_many(batch)
+                batch = []
+        return n + self.save_many(batch)
+
+    def close(self):
+        pass
+
+    # -----------------------------
+    # Partitions
+    # -----------------------------
+
+    def _theme_dirs(self, theme: Optional[str]) -> List[str]:
+        if theme is not None:
+            path = os.path.join(self.root, theme_dir(theme))
+            return [path] if os.path.isdir(path) else []
+        return sorted(e.path for e in os.scandir(self.root) if e.is_dir())
+
+    def _months(self, dirpath: str, since: Optional[str] = None, until: Optional[str] = None) -> List[_Month]:
+        months: Dict[str, _Month] = {}
+        for e in os.scandir(dirpath):
+            name = e.name
+            month = name[:7]
+            if not (_MONTH.match(month) and month_selected(month, since, until)):
+                continue
+            m = months.get(month)
+            if m is None:
+                m = months[month] = _Month(dirpath, month)
+            if name == month + LIVE_SUFFIX:
+                m.live = e.path
+            elif name == month + SEGMENT_SUFFIX:
+                m.segment = e.path
+            elif name.endswith(COMPACTING_SUFFIX):
+                m.compacting.append(e.path)
+        return [months[k] for k in sorted(months)]
+
+    def partitions(self, theme: Optional[str] = None, since: Optional[str] = None,
+                   until: Optional[str] = None) -> Iterator[Tuple[Optional[str], _Month]]:
+        """Partitions (thème, mois) pouvant contenir des entrées pour ces filtres."""
+        for dirpath in self._theme_dirs(theme):
+            name = dir_theme(os.path.basename(dirpath))
+            for m in self._months(dirpath, since, until):
+                yield name, m
+
+    def _unsorted(self, m: _Month, footer: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for p in m.pending(footer):
+            yield from read_journal(p)
+        if m.live:
+            yield from read_journal(m.live)
+
+    # -----------------------------
+    # Lecture
+    # -----------------------------
+
+    def iter_scores(self) -> Iterator[Dict[str, Any]]:
+        with file_lock(self.lock_path, exclusive=False):
+            for _, m in self.partitions():
+                footer = read_footer(m.segment) if m.segment else None
+                if footer:
+                    yield from iter_segment(m.segment, footer)
+                yield from self._unsorted(m, footer)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        return list(self.iter_scores())
+
+    def top_n(self, n: int = 10, theme: Optional[str] = None, niveau: Optional[str] = None,
+              player: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Les n meilleurs scores (voir Storage.top_n). Seules les partitions du thème
+        et des mois demandés sont lues ; un segment n'est lu que jusqu'à ses n
+        premières entrées retenues, déjà dans l'ordre du classement.
+        """
+        keep = score_filter(theme, niveau, player, since, until)
+        candidates: List[Dict[str, Any]] = []
+        with file_lock(self.lock_path, exclusive=False):
+            for _, m in self.partitions(theme, since, until):
+                footer = read_footer(m.segment) if m.segment else None
+                if footer and not (niveau is not None and str(niveau) not in footer["niveaux"]):
+                    taken = 0
+                    for e in iter_segment(m.segment, footer):
+                        if keep is None or keep(e):
+                            candidates.append(e)
+                            taken += 1
+                            if taken >= n:
+                                break
+                candidates.extend(self._unsorted(m, footer))
+        return top_n_stream(candidates, n, keep)
+
+    # -----------------------------
+    # Compactage
+    # -----------------------------
+
+    def compact(self, before: Optional[str] = None) -> int:
+        """
+        Compacte les mois antérieurs à before (AAAA-MM, défaut : mois courant) en
+        segments triés. Retourne le nombre de partitions compactées.
+        """
+        before = before or datetime.now().strftime("%Y-%m")
+        done = 0
+        with file_lock(self.lock_path, exclusive=True):
+            for _, m in self.partitions():
+                if m.month < before and (m.live or m.compacting):
+                    self._compact_month(m)
+                    done += 1
+        return done
+
+    def _compact_month(self, m: _Month):
+        footer = read_footer(m.segment) if m.segment else None
+        pending = m.pending(footer)
+        # restes déjà intégrés au segment : arrêt juste avant leur suppression
+        for p in m.compacting:
+            if p not in pending:
+                os.remove(p)
+        # les fichiers à intégrer prennent le jeton du futur segment ; après un arrêt
+        # brutal, ils sont ignorés si ce segment a été écrit, réintégrés sinon
+        token = uuid.uuid4().hex[:8]
+        sources = pending + ([m.live] if m.live else [])
+        renamed = []
+        for i, p in enumerate(sources):
+            dst = os.path.join(m.dir, f"{m.month}.{token}.{i}{COMPACTING_SUFFIX}")
+            os.replace(p, dst)
+            renamed.append(dst)
+        entries = list(iter_segment(m.segment, footer)) if footer else []
+        for p in renamed:
+            entries.extend(read_journal(p))
+        write_segment(os.path.join(m.dir, m.month + SEGMENT_SUFFIX), entries, token)
+        for p in renamed:
+            os.remove(p)
+
+
+def iter_source(src: str) -> Iterator[Dict[str, Any]]:
+    """Scores d'un fichier existant : liste JSON, JSON Lines ou base SQLite (selon l'extension)."""
+    ext = os.path.splitext(src)[1].lower()
+    if ext == ".jsonl":
+        yield from read_journal(src)
+    elif ext in (".db", ".sqlite", ".sqlite3"):
+        from sqlite_storage import SQLiteStorage
+        storage = SQLiteStorage(src, legacy_path=None)
+        try:
+            yield from storage.iter_scores()
+        finally:
+            storage.close()
+    else:
+        yield from iter_json_array(src)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scores partitionnés par thème et par mois")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("migrate", help="importe un stockage existant dans les partitions")
+    p.add_argument("src", help="scores.json, scores.jsonl ou scores.db")
+    p.add_argument("--root", default=SHARD_ROOT)
+    p.add_argument("--no-compact", action="store_true", help="ne compacte pas les mois clos")
+    p.add_argument("--force", action="store_true", help="ajoute même si la destination contient déjà des scores")
+    p = sub.add_parser("compact", help="compacte les mois clos en segments triés")
+    p.add_argument("--root", default=SHARD_ROOT)
+    p.add_argument("--before", default=None, help="compacte les mois antérieurs (AAAA-MM, défaut : mois courant)")
+    p = sub.add_parser("info", help="liste les partitions")
+    p.add_argument("--root", default=SHARD_ROOT)
+    args = parser.parse_args()
+
+    if args.cmd == "migrate":
+        if not os.path.isfile(args.src):
+            print(f"[Error] fichier introuvable: {args.src}")
+            sys.exit(1)
+        storage = ShardedStorage(args.root, legacy_path=None)
+        if not args.force and any(True for _ in storage.partitions()):
+            print(f"[Error] {args.root}/ contient déjà des scores (--force pour ajouter quand même)")
+            sys.exit(1)
+        n = storage.import_from(args.src)
+        print(f"[Info] {n} score(s) migré(s) de {args.src} vers {args.root}/")
+        if not args.no_compact:
+            print(f"[Info] {storage.compact()} partition(s) compactée(s)")
+    elif args.cmd == "compact":
+        storage = ShardedStorage(args.root, legacy_path=None)
+        print(f"[Info] {storage.compact(args.before)} partition(s) compactée(s)")
+    else:
+        storage = ShardedStorage(args.root, legacy_path=None)
+        print(f"{'thème':<28} {'mois':<8} {'segment':>9} {'journal':>9}")
+        for theme, m in storage.partitions():
+            seg = read_footer(m.segment)["rows"] if m.segment else 0
+            live = sum(1 for _ in read_journal(m.live)) if m.live else 0
+            print(f"{str(theme)[:28]:<28} {m.month:<8} {seg:>9} {live:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# simulate.py - Simulation de parties sans terminal (tests de régression, dimensionnement)
+# Usage : python simulate.py --players 1000 --games 10 --strategy levels --accuracy Facile=0.9,Moyen=0.6,Difficile=0.3
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from models import Question
+from question_bank import QuestionBank
+from quiz import QuizState
+from seen import SeenSets
+from storage import open_storage
+from telemetry import AnswerLog
+import metrics
+
+STRATEGIES = ("random", "correct", "levels")
+CHUNK_GAMES = 500
+OUTPUT_EXT = {"json": ".json", "log": ".jsonl", "sqlite": ".db", "sharded": ""}
+
+# banque chargée une fois par processus de simulation
+_bank: Optional[QuestionBank] = None
+_telemetry: Optional[AnswerLog] = None
+
+
+def parse_accuracy(spec: str) -> Dict[str, float]:
+    """'Facile=0.9,Moyen=0.6' -> {'facile': 0.9, 'moyen': 0.6} ; '0.7' -> {'*': 0.7}."""
+    acc = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        if "=" in part:
+            lvl, val = part.split("=", 1)
+            acc[lvl.strip().lower()] = float(val)
+        else:
+            acc["*"] = float(part)
+    return acc
+
+
+def make_strategy(name: str, accuracy: Optional[Dict[str, float]] = None) -> Callable[[Question, random.Random], str]:
+    """
+    Modèle de réponse d'un joueur simulé : retourne la réponse tapée (numéro 1..n).
+      random  : option au hasard
+      correct : toujours la bonne option
+      levels  : bonne option avec la probabilité du niveau (accuracy), sinon une mauvaise
+    """
+    if name == "random":
+        return lambda q, rng: str(rng.randint(1, len(q.options)))
+    if name == "correct":
+        return lambda q, rng: str(q.bonne_option + 1)
+    if name == "levels":
+        accuracy = accuracy or {}
+        default = accuracy.get("*", 0.5)
+
+        def answer(q: Question, rng: random.Random) -> str:
+            if rng.random() < accuracy.get(q.niveau.lower(), default) or len(q.options) < 2:
+                return str(q.bonne_option + 1)
+            wrong = rng.randrange(len(q.options) - 1)
+            return str(wrong + 1 if wrong < q.bonne_option else wrong + 2)
+        return answer
+    raise ValueError(f"stratégie inconnue: {name}")
+
+
+def _init_worker(folder: str, telemetry_path: Optional[str] = None):
+    global _bank, _telemetry
+    _bank = QuestionBank(folder=folder)
+    # notes repartant de zéro : la simulation ne lit ni n'écrit ratings.json
+    from adaptive import AdaptiveSampler
+    _bank._adaptive = AdaptiveSampler(_bank, path=None)
+    _telemetry = AnswerLog(telemetry_path) if telemetry_path else None
+
+
+def simulate_chunk(args: Tuple[int, int, int, int, str, Dict[str, float], bool, bool]) -> Tuple[List[Dict[str, Any]], float, float]:
+    """
+    Joue les parties [start, end) ; le joueur de la partie g est sim{g % players}.
+    Chaque bloc a sa propre graine et repart de questions vues vides : le résultat
+    ne dépend pas de l'ordonnancement.
+    En mode adaptatif, les notes évoluent par processus (non sauvegardées).
+    Retourne (entrées, temps d'échantillonnage, temps de jeu).
+    """
+    start, end, players, seed, strategy, accuracy, balanced, adaptive = args
+    _bank.decks.reseed(seed * 1_000_003 + start)
+    _bank.seen = SeenSets()
+    rng = random.Random(seed * 1_000_033 + start)
+    answer = make_strategy(strategy, accuracy)
+    entries = []
+    t_sample = t_play = 0.0
+    for g in range(start, end):
+        player = f"sim{g % players}"
+        t0 = time.perf_counter()
+        if adaptive:
+            qlist = _bank.sample_adaptive(player, count=10)
+        else:
+            qlist = _bank.sample_questions(count=10, balanced=balanced, player=player)
+        t1 = time.perf_counter()
+        if not qlist:
+            continue
+        game = QuizState(qlist, player, telemetry=_telemetry)
+        game.start()
+        while not game.finished:
+            game.answer(answer(game.current(), rng))
+        if adaptive:
+            _bank.record_results(player, game.results)
+        entries.append(game.result_entry())
+        t2 = time.perf_counter()
+        t_sample += t1 - t0
+        t_play += t2 - t1
+    if _telemetry:
+        # les processus du pool se terminent sans passer par atexit
+        _telemetry.flush()
+    return entries, t_sample, t_play
+
+
+def run_simulation(folder: str, players: int, games: int, seed: int, strategy: str, accuracy: Dict[str, float],
+                   workers: int = 1, balanced: bool = False, chunk: int = CHUNK_GAMES,
+                   telemetry_path: Optional[str] = None, adaptive: bool = False) -> Iterator[Tuple[List[Dict[str, Any]], float, float]]:
+    """Produit les résultats bloc par bloc, dans l'ordre, au fil de la simulation."""
+    total = players * games
+    tasks = [(s, min(s + chunk, total), players, seed, strategy, accuracy, balanced, adaptive) for s in range(0, total, chunk)]
+    if workers <= 1:
+        _init_worker(folder, telemetry_path)
+        for t in tasks:
+            yield simulate_chunk(t)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folder, telemetry_path)) as pool:
+        yield from pool.map(simulate_chunk, tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation de parties sans terminal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--games", type=int, default=10, help="parties par joueur")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="random")
+    parser.add_argument("--accuracy", default="Facile=0.9,Moyen=0.7,Difficile=0.4",
+                        help="taux de réussite par niveau pour --strategy levels")
+    parser.add_argument("--balanced", action="store_true", help="répartition 4/4/2 des niveaux")
+    parser.add_argument("--adaptive", action="store_true", help="tirage adaptatif (voir adaptive.py)")
+    parser.add_argument("--folder", default="questions")
+    parser.add_argument("--workers", type=int, default=1, help="processus de simulation")
+    parser.add_argument("--batch", type=int, default=CHUNK_GAMES, help="parties par lot (simulation et sauvegarde)")
+    parser.add_argument("--storage", default="log", help="json, log, sqlite ou sharded")
+    parser.add_argument("--output", default=None, help="fichier de scores (défaut : simulation_scores.json/.jsonl/.db)")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--telemetry", default=None, help="journal des réponses à remplir (voir telemetry.py)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.setup(args.metrics, args.profile)
+
+    output = args.output or "simulation_scores" + OUTPUT_EXT.get(args.storage, "")
+    storage = None if args.no_save else open_storage(args.storage, output)
+    accuracy = parse_accuracy(args.accuracy)
+    played = bonnes = questions = 0
+    t_sample = t_play = t_save = 0.0
+    t0 = time.perf_counter()
+    for entries, ts, tp in run_simulation(args.folder, args.players, args.games, args.seed, args.strategy,
+                                          accuracy, args.workers, args.balanced, args.batch, args.telemetry,
+                                          args.adaptive):
+        t_sample += ts
+        t_play += tp
+        if storage and entries:
+            t1 = time.perf_counter()
+            storage.save_many(entries)
+            t_save += time.perf_counter() - t1
+            metrics.observe("save_batch_ms", (time.perf_counter() - t1) * 1000)
+        played += len(entries)
+        bonnes += sum(e["bonnes"] for e in entries)
+        questions += sum(e["nombre_questions"] for e in entries)
+    elapsed = time.perf_counter() - t0
+    if storage and hasattr(storage, "close"):
+        storage.close()
+
+    def per_game(secs: float) -> float:
+        return secs / played * 1e6 if played else 0.0
+
+    print(f"parties jouées : {played}  ({args.players} joueurs x {args.games}, stratégie {args.strategy}, graine {args.seed})")
+    print(f"réussite moyenne : {bonnes / questions * 100 if questions else 0:.1f}%")
+    print(f"durée : {elapsed:.2f} s  —  {played / elapsed if elapsed else 0:.0f} parties/s")
+    print(f"par partie : tirage {per_game(t_sample):.1f} µs, jeu {per_game(t_play):.1f} µs, sauvegarde {per_game(t_save):.1f} µs")
+    if args.workers > 1:
+        print("  (tirage et jeu : temps cumulés des processus)")
+
+
+if __name__ == "__main__":
+    main()
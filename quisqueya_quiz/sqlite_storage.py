@@ -0,0 +1,169 @@
+# sqlite_storage.py
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+from storage import SCORES_FILE
+import metrics
+
+DB_FILE = "scores.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    rowid INTEGER PRIMARY KEY,
+    id_partie TEXT,
+    joueur_nom TEXT,
+    date_heure TEXT NOT NULL DEFAULT '',
+    theme TEXT,
+    score_total INTEGER NOT NULL DEFAULT 0,
+    pourcentage REAL NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_theme_rank
+    ON scores (theme, score_total DESC, pourcentage DESC, date_heure);
+CREATE INDEX IF NOT EXISTS idx_scores_rank
+    ON scores (score_total DESC, pourcentage DESC, date_heure);
+"""
+
+_INSERT = (
+    "INSERT INTO scores (id_partie, joueur_nom, date_heure, theme, score_total, pourcentage, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _row(entry: Dict[str, Any]) -> tuple:
+    return (
+        entry.get("id_partie"),
+        entry.get("joueur_nom"),
+        entry.get("date_heure", "") or "",
+        entry.get("theme"),
+        entry.get("score_total", 0) or 0,
+        entry.get("pourcentage", 0) or 0,
+        json.dumps(entry, ensure_ascii=False),
+    )
+
+
+class SQLiteStorage:
+    """
+    Stockage des scores dans une base SQLite (mode WAL).
+
+    Même API que Storage (save_score / load_all / top_n). Le classement est
+    servi par l'index (theme, score_total DESC, pourcentage DESC, date_heure),
+    sans charger l'historique. Chaque thread utilise sa propre connexion ;
+    les insertions sont regroupées par lots de batch_size dans une transaction.
+    """
+
+    def __init__(self, path: str = DB_FILE, legacy_path: Optional[str] = SCORES_FILE, batch_size: int = 1):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        is_new = not os.path.isfile(self.path)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        if is_new and legacy_path and os.path.isfile(legacy_path):
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                n = self.save_many(data)
+                print(f"[Info] {n} score(s) importé(s) de {legacy_path} vers {self.path}")
+            except Exception as e:
+                print(f"[Warning] import de {legacy_path} impossible: {e}")
+        atexit.register(self.close)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def save_score(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._pending.append(_row(entry))
+            if len(self._pending) < self.batch_size:
+                return
+            rows, self._pending = self._pending, []
+        self._insert(rows)
+
+    def save_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Insère un lot d'entrées dans une seule transaction."""
+        rows = [_row(e) for e in entries if isinstance(e, dict)]
+        self._insert(rows)
+        return len(rows)
+
+    def _insert(self, rows: List[tuple]):
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT, rows)
+        if metrics.enabled():
+            # taille des entrées JSON insérées (hors index et journal WAL)
+            metrics.inc("storage_bytes_written", sum(len(r[-1]) for r in rows))
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        self._insert(rows)
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[Error] impossible de sauvegarder les scores en attente: {e}")
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        self.flush()
+        cur = self._conn().execute("SELECT data FROM scores ORDER BY rowid")
+        return [json.loads(d) for (d,) in cur]
+
+    def iter_scores(self):
+        """Parcourt les scores un par un, dans l'ordre d'insertion."""
+        self.flush()
+        cur = self._conn().execute("SELECT data FROM scores ORDER BY rowid")
+        for (d,) in cur:
+            yield json.loads(d)
+
+    def top_n(self, n: int = 10, theme: Optional[str] = None, niveau: Optional[str] = None, player: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Les n meilleurs scores ; le filtre par thème utilise l'index composite.
+        since / until sont des préfixes de date ISO inclusifs.
+        """
+        self.flush()
+        where, params = [], []
+        if theme:
+            where.append("theme = ?")
+            params.append(theme)
+        if niveau:
+            where.append("json_extract(data, '$.niveau') = ?")
+            params.append(niveau)
+        if player:
+            where.append("joueur_nom = ?")
+            params.append(player)
+        if since:
+            where.append("substr(date_heure, 1, ?) >= ?")
+            params += [len(since), since]
+        if until:
+            where.append("substr(date_heure, 1, ?) <= ?")
+            params += [len(until), until]
+        sql = "SELECT data FROM scores "
+        if where:
+            sql += "WHERE " + " AND ".join(where) + " "
+        sql += "ORDER BY score_total DESC, pourcentage DESC, date_heure LIMIT ?"
+        cur = self._conn().execute(sql, params + [int(n)])
+        return [json.loads(d) for (d,) in cur]
@@ -0,0 +1,235 @@
+# stats.py
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    joueur_nom TEXT PRIMARY KEY,
+    parties INTEGER NOT NULL,
+    somme_pourcentage REAL NOT NULL,
+    meilleur_pourcentage REAL NOT NULL,
+    duree_totale INTEGER NOT NULL,
+    bonnes INTEGER NOT NULL,
+    questions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS theme_stats (
+    theme TEXT PRIMARY KEY,
+    parties INTEGER NOT NULL,
+    somme_pourcentage REAL NOT NULL,
+    meilleur_pourcentage REAL NOT NULL,
+    duree_totale INTEGER NOT NULL,
+    bonnes INTEGER NOT NULL,
+    questions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_theme_stats (
+    joueur_nom TEXT NOT NULL,
+    theme TEXT NOT NULL,
+    parties INTEGER NOT NULL,
+    bonnes INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    PRIMARY KEY (joueur_nom, theme)
+);
+"""
+
+_UPSERT_TOTALS = """
+INSERT INTO {table} ({key}, parties, somme_pourcentage, meilleur_pourcentage, duree_totale, bonnes, questions)
+VALUES (?, 1, ?, ?, ?, ?, ?)
+ON CONFLICT({key}) DO UPDATE SET
+    parties = parties + 1,
+    somme_pourcentage = somme_pourcentage + excluded.somme_pourcentage,
+    meilleur_pourcentage = max(meilleur_pourcentage, excluded.meilleur_pourcentage),
+    duree_totale = duree_totale + excluded.duree_totale,
+    bonnes = bonnes + excluded.bonnes,
+    questions = questions + excluded.questions
+"""
+_UPSERT_PLAYER = _UPSERT_TOTALS.format(table="player_stats", key="joueur_nom")
+_UPSERT_THEME = _UPSERT_TOTALS.format(table="theme_stats", key="theme")
+_UPSERT_PLAYER_THEME = """
+INSERT INTO player_theme_stats (joueur_nom, theme, parties, bonnes, questions) VALUES (?, ?, 1, ?, ?)
+ON CONFLICT(joueur_nom, theme) DO UPDATE SET
+    parties = parties + 1,
+    bonnes = bonnes + excluded.bonnes,
+    questions = questions + excluded.questions
+"""
+
+
+def _pourcentage(entry: Dict[str, Any]) -> float:
+    # les anciennes entrées n'ont pas toujours le champ pourcentage
+    if "pourcentage" in entry:
+        return float(entry["pourcentage"] or 0)
+    total = entry.get("nombre_questions") or 0
+    return round(entry.get("bonnes", 0) / total * 100, 1) if total else 0.0
+
+
+def _summary(row) -> Dict[str, Any]:
+    parties, somme, meilleur, duree, bonnes, questions = row
+    return {
+        "parties": parties,
+        "pourcentage_moyen": round(somme / parties, 1) if parties else 0.0,
+        "meilleur_pourcentage": meilleur,
+        "duree_totale_seconds": duree,
+        "bonnes": bonnes,
+        "questions": questions,
+        "reussite": round(bonnes / questions * 100, 1) if questions else 0.0,
+    }
+
+
+class ScoreStats:
+    """
+    Agrégats des scores tenus à jour à chaque partie, dans une petite base SQLite :
+    par joueur, par joueur et thème, et par thème. Chaque mise à jour et chaque
+    requête touche une ligne indexée, quelle que soit la taille de l'historique.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, entries: Iterable[Dict[str, Any]]):
+        rows_player, rows_theme, rows_pt = [], [], []
+        for e in entries:
+            if not isinstance(e, dict):
+                continue
+            player = e.get("joueur_nom") or "?"
+            theme = e.get("theme") or "?"
+            totals = (_pourcentage(e), _pourcentage(e), int(e.get("duree_seconds") or 0),
+                      int(e.get("bonnes") or 0), int(e.get("nombre_questions") or 0))
+            rows_player.append((player,) + totals)
+            rows_theme.append((theme,) + totals)
+            rows_pt.append((player, theme, totals[3], totals[4]))
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT_PLAYER, rows_player)
+            self._conn.executemany(_UPSERT_THEME, rows_theme)
+            self._conn.executemany(_UPSERT_PLAYER_THEME, rows_pt)
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]], batch: int = 5000) -> int:
+        """Recalcule tous les agrégats depuis l'historique complet."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM player_stats")
+            self._conn.execute("DELETE FROM theme_stats")
+            self._conn.execute("DELETE FROM player_theme_stats")
+        n = 0
+        buf = []
+        for e in entries:
+            buf.append(e)
+            if len(buf) >= batch:
+                self.record(buf)
+                n += len(buf)
+                buf = []
+        self.record(buf)
+        return n + len(buf)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM theme_stats LIMIT 1").fetchone() is None
+
+    def player(self, name: str) -> Optional[Dict[str, Any]]:
+        """Statistiques d'un joueur (None s'il n'a jamais joué), avec la réussite par thème."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parties, somme_pourcentage, meilleur_pourcentage, duree_totale, bonnes, questions "
+                "FROM player_stats WHERE joueur_nom = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            themes = self._conn.execute(
+                "SELECT theme, parties, bonnes, questions FROM player_theme_stats "
+                "WHERE joueur_nom = ? ORDER BY theme", (name,)).fetchall()
+        res = _summary(row)
+        res["joueur_nom"] = name
+        res["themes"] = {
+            t: {"parties": p, "bonnes": b, "questions": q, "reussite": round(b / q * 100, 1) if q else 0.0}
+            for t, p, b, q in themes
+        }
+        return res
+
+    def theme(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parties, somme_pourcentage, meilleur_pourcentage, duree_totale, bonnes, questions "
+                "FROM theme_stats WHERE theme = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        res = _summary(row)
+        res["theme"] = name
+        return res
+
+    def themes(self) -> List[Dict[str, Any]]:
+        """Statistiques globales de chaque thème (une ligne par thème joué)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT theme, parties, somme_pourcentage, meilleur_pourcentage, duree_totale, bonnes, questions "
+                "FROM theme_stats ORDER BY theme").fetchall()
+        out = []
+        for r in rows:
+            res = _summary(r[1:])
+            res["theme"] = r[0]
+            out.append(res)
+        return out
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_history(storage) -> Iterable[Dict[str, Any]]:
+    """Parcourt tout l'historique d'un backend de stockage, en flux si possible."""
+    if hasattr(storage, "iter_scores"):
+        return storage.iter_scores()
+    return storage.load_all()
+
+
+class StatsStorage:
+    """
+    Enveloppe un backend de stockage (Storage, LogStorage, SQLiteStorage) et tient
+    les agrégats à jour à chaque save_score / save_many. Les agrégats sont dans
+    <chemin du stockage>.stats ; ils sont reconstruits depuis l'historique si ce
+    fichier n'existe pas encore, ou à la demande avec rebuild_stats().
+    """
+
+    def __init__(self, storage, stats_path: Optional[str] = None):
+        self.storage = storage
+        stats_path = stats_path or f"{storage.path}.stats"
+        is_new = not os.path.isfile(stats_path)
+        self.stats = ScoreStats(stats_path)
+        if is_new:
+            self.rebuild_stats()
+
+    def __getattr__(self, name):
+        # tout le reste (top_n, load_all, iter_scores, flush, path...) va au backend
+        return getattr(self.storage, name)
+
+    def save_score(self, entry: Dict[str, Any]):
+        self.storage.save_score(entry)
+        try:
+            self.stats.record([entry])
+        except Exception as e:
+            print(f"[Warning] statistiques non mises à jour: {e}")
+
+    def save_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        entries = list(entries)
+        n = self.storage.save_many(entries)
+        try:
+            self.stats.record(entries)
+        except Exception as e:
+            print(f"[Warning] statistiques non mises à jour: {e}")
+        return n
+
+    def rebuild_stats(self) -> int:
+        return self.stats.rebuild(iter_history(self.storage))
+
+    def player_stats(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.stats.player(name)
+
+    def theme_stats(self, theme: Optional[str] = None):
+        """Statistiques d'un thème, ou de tous les thèmes si theme est None."""
+        return self.stats.theme(theme) if theme else self.stats.themes()
+
+    def close(self):
+        if hasattr(self.storage, "close"):
+            self.storage.close()
+        self.stats.close()
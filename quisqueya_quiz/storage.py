@@ -1,47 +1,276 @@
 # storage.py
+import atexit
+import heapq
 import json
 import os
+import threading
 import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional
+import metrics
+from journal import ScoreJournal, journal_paths, read_journal
 
 SCORES_FILE = "scores.json"
+# entrées journalisées avant intégration au fichier de scores
+CHECKPOINT_EVERY = 64
+
+# backend choisi par défaut par open_storage() (json, log, sqlite)
+STORAGE_ENV = "QUISQUEYA_STORAGE"
+
+
+def score_key(s: Dict[str, Any]):
+    """
+    Clé de tri du classement : score_total desc, puis pourcentage desc, puis date.
+    """
+    return (-s.get("score_total", 0), -s.get("pourcentage", 0), s.get("date_heure", ""))
+
+
+def score_filter(theme: Optional[str] = None, niveau: Optional[str] = None, player: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Prédicat de filtrage des scores (None si aucun filtre).
+    since / until sont des préfixes de date ISO inclusifs ("2025-12", "2025-12-06").
+    """
+    if not (theme or niveau or player or since or until):
+        return None
+
+    def keep(s: Dict[str, Any]) -> bool:
+        if theme and s.get("theme") != theme:
+            return False
+        if niveau and s.get("niveau") != niveau:
+            return False
+        if player and s.get("joueur_nom") != player:
+            return False
+        date = s.get("date_heure", "")
+        if since and date[:len(since)] < since:
+            return False
+        if until and date[:len(until)] > until:
+            return False
+        return True
+    return keep
+
+
+def top_n_stream(entries: Iterable[Dict[str, Any]], n: int, keep: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+    """Les n meilleurs scores d'un flux, avec un tas de taille n (mémoire O(n), temps O(N log n))."""
+    if keep is not None:
+        entries = filter(keep, entries)
+    return heapq.nsmallest(n, (e for e in entries if isinstance(e, dict)), key=score_key)
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Parcourt les éléments d'un fichier contenant une liste JSON sans charger
+    tout le fichier : lecture par blocs et décodage élément par élément.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        started = False
+        while True:
+            # saute espaces et séparateurs
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf) or (not eof and len(buf) - pos < chunk_size // 2):
+                if not eof:
+                    more = f.read(chunk_size)
+                    eof = not more
+                    buf = buf[pos:] + more
+                    pos = 0
+                    continue
+                if pos >= len(buf):
+                    if started:
+                        raise ValueError(f"{path}: liste JSON non terminée")
+                    return
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path} ne contient pas une liste JSON")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield obj
+            pos = end
+
+
+def _write_json_atomic(path: str, data: Any) -> int:
+    """Écrit data dans path via un fichier temporaire propre à l'écrivain, fsync compris."""
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    # rend le renommage lui-même durable
+    try:
+        dfd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+    except OSError:
+        pass
+    return size
+
 
 class Storage:
-    def __init__(self, path: str = SCORES_FILE):
+    """
+    Scores dans une liste JSON (scores.json).
+
+    Une sauvegarde n'écrit qu'une ligne dans le journal du processus
+    (journal.ScoreJournal, fsync groupé) ; les journaux sont intégrés au fichier
+    toutes les checkpoint_every entrées, à la fermeture, et au démarrage suivant
+    après un arrêt brutal. Les lectures voient le fichier et les journaux.
+    """
+
+    def __init__(self, path: str = SCORES_FILE, checkpoint_every: int = CHECKPOINT_EVERY):
         self.path = path
+        self.checkpoint_every = max(1, int(checkpoint_every))
         if not os.path.isfile(self.path):
             try:
                 with open(self.path, "w", encoding="utf-8") as f:
                     json.dump([], f, ensure_ascii=False, indent=2)
             except Exception as e:
                 print(f"[Error] impossible de créer {self.path}: {e}")
+        self.journal = ScoreJournal(self.path)
+        # reprise : entrées journalisées par un processus arrêté avant leur intégration
+        if journal_paths(self.path):
+            n = self.checkpoint()
+            if n:
+                print(f"[Info] {n} score(s) récupéré(s) depuis le journal de {self.path}")
+        atexit.register(self.close)
+
+    def _load_file(self) -> List[Dict[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"{self.path} ne contient pas une liste de scores")
+        return data
 
     def load_all(self) -> List[Dict[str, Any]]:
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
+        with self.journal.locked(exclusive=False):
+            try:
+                scores = self._load_file()
+            except Exception:
+                scores = []
+            scores.extend(self.journal.entries())
+        return scores
 
     def save_score(self, entry: Dict[str, Any]):
-        all_scores = self.load_all()
-        all_scores.append(entry)
-        # write atomically: write to temp then rename
-        tmp = f"{self.path}.tmp"
+        """Sauvegarde durable : l'entrée est sur disque (journal) au retour ; OSError sinon."""
+        self.save_many([entry])
+
+    def save_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Ajoute un lot d'entrées au journal, en une seule écriture synchronisée."""
+        lines = [(json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8") for e in entries]
+        if not lines:
+            return 0
+        self.journal.append(lines)
+        metrics.inc("storage_bytes_written", sum(len(l) for l in lines))
+        if self.journal.unchecked >= self.checkpoint_every:
+            try:
+                # un autre processus intègre déjà : pas d'attente
+                self.checkpoint(blocking=False)
+            except Exception as e:
+                print(f"[Warning] intégration du journal reportée: {e}")
+        return len(lines)
+
+    def checkpoint(self, blocking: bool = True) -> int:
+        """
+        Intègre les journaux de tous les écrivains à scores.json, sous verrou
+        exclusif, puis les vide. Retourne le nombre d'entrées intégrées.
+        """
+        with self.journal.locked(exclusive=True, blocking=blocking) as ok:
+            if not ok:
+                return 0
+            paths = journal_paths(self.path)
+            entries = [e for p in paths for e in read_journal(p)]
+            if entries:
+                try:
+                    scores = self._load_file()
+                except (OSError, ValueError) as e:
+                    # fichier illisible : on garde les journaux plutôt que de l'écraser
+                    print(f"[Error] {self.path} illisible, journal conservé: {e}")
+                    return 0
+                # arrêt entre le remplacement du fichier et la vidange des journaux :
+                # ces entrées sont déjà à la fin du fichier
+                tail = {(s.get("id_partie"), s.get("date_heure")) for s in scores[-len(entries):] if isinstance(s, dict)}
+                entries = [e for e in entries if (e.get("id_partie"), e.get("date_heure")) not in tail]
+                if entries:
+                    scores.extend(entries)
+                    metrics.inc("storage_bytes_written", _write_json_atomic(self.path, scores))
+            self.journal.reset_all(paths)
+            return len(entries)
+
+    def close(self):
+        atexit.unregister(self.close)
         try:
-            with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(all_scores, f, ensure_ascii=False, indent=2)
-            os.replace(tmp, self.path)
+            self.checkpoint()
         except Exception as e:
-            print(f"[Error] impossible de sauvegarder le score: {e}")
-
-    def top_n(self, n: int = 10, theme: Optional[str] = None) -> List[Dict[str, Any]]:
-        all_scores = self.load_all()
-        if theme:
-            all_scores = [s for s in all_scores if s.get("theme") == theme]
-        # sort primarily by score_total desc, secondarily by pourcentage desc then date
-        def keyfn(s):
-            return (-s.get("score_total", 0), -s.get("pourcentage", 0), s.get("date_heure", ""))
-        all_scores.sort(key=keyfn)
-        return all_scores[:n]
+            print(f"[Warning] intégration du journal impossible, reprise au prochain démarrage: {e}")
+        self.journal.close()
+
+    def iter_scores(self) -> Iterator[Dict[str, Any]]:
+        """Parcourt les scores un par un (fichier puis journaux), sans charger tout le fichier."""
+        with self.journal.locked(exclusive=False):
+            try:
+                yield from iter_json_array(self.path)
+            except (OSError, ValueError):
+                pass
+            yield from self.journal.entries()
+
+    def top_n(self, n: int = 10, theme: Optional[str] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Les n meilleurs scores (score_total desc, pourcentage desc, puis date).
+        Filtres optionnels : theme, niveau, player, since, until (voir score_filter).
+        """
+        return top_n_stream(self.iter_scores(), n, score_filter(theme, **filters))
+
+
+def open_storage(backend: Optional[str] = None, path: Optional[str] = None, stats: bool = False):
+    """
+    Construit le stockage des scores demandé (ou celui de la variable
+    d'environnement QUISQUEYA_STORAGE). Backends : "json" (défaut), "log", "sqlite",
+    "sharded" (partitions par thème et par mois, voir shard_storage.py).
+    Les anciens scores de scores.json ne sont importés que pour le chemin par défaut.
+    Avec stats=True, le stockage tient aussi à jour les statistiques (voir stats.py).
+    """
+    backend = (backend or os.environ.get(STORAGE_ENV) or "json").lower()
+    legacy = SCORES_FILE if path is None else None
+    if backend == "json":
+        storage = Storage(path or SCORES_FILE)
+    elif backend == "log":
+        from log_storage import LogStorage, LOG_FILE
+        storage = LogStorage(path or LOG_FILE, legacy_path=legacy)
+    elif backend == "sqlite":
+        from sqlite_storage import SQLiteStorage, DB_FILE
+        storage = SQLiteStorage(path or DB_FILE, legacy_path=legacy)
+    elif backend == "sharded":
+        from shard_storage import ShardedStorage, SHARD_ROOT
+        storage = ShardedStorage(path or SHARD_ROOT, legacy_path=legacy)
+    else:
+        raise ValueError(f"backend de stockage inconnu: {backend}")
+    if stats:
+        from stats import StatsStorage
+        storage = StatsStorage(storage)
+    return storage
@@ -0,0 +1,271 @@
+# telemetry.py - Journal des réponses question par question (format en colonnes)
+# Usage : python telemetry.py [--log answers.qqa] [--top 20] [--no-numpy]
+#
+# Le journal est une suite de blocs ajoutés en fin de fichier :
+#   en-tête <4sII (magie, lignes, taille de la table des parties)
+#   table des ids de partie (liste JSON), puis une colonne après l'autre (little-endian) :
+#   partie (I, indice dans la table), question (q), choix (h, 0 = aucun), correct (b, -1 = sans réponse valide),
+#   timed_out (B), latence_ms (f)
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+TELEMETRY_FILE = "answers.qqa"
+BLOCK_ROWS = 4096
+MAGIC = b"QQA1"
+_HEADER = struct.Struct("<4sII")
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("partie", "I"),
+    ("question", "q"),
+    ("choix", "h"),
+    ("correct", "b"),
+    ("timed_out", "B"),
+    ("latence_ms", "f"),
+)
+_STOP = object()
+
+
+def _choice_number(ans: Optional[str]) -> int:
+    try:
+        return max(0, int(ans.strip()))
+    except Exception:
+        return 0
+
+
+class AnswerLog:
+    """
+    Journal append-only des réponses : (partie, question, choix, correct, latence, temps écoulé).
+
+    record() ne fait qu'ajouter aux colonnes en mémoire ; les blocs pleins (block_rows
+    lignes) ou en attente depuis flush_interval secondes sont passés tels quels à un
+    thread dédié qui les encode et les écrit, jamais pendant la saisie d'une réponse. Chaque bloc est écrit en une seule
+    écriture O_APPEND : plusieurs processus peuvent partager le même fichier.
+    """
+
+    def __init__(self, path: str = TELEMETRY_FILE, block_rows: int = BLOCK_ROWS, flush_interval: float = 2.0):
+        self.path = path
+        self.block_rows = max(1, int(block_rows))
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, name="telemetry", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _reset(self):
+        self._cols = {name: array(code) for name, code in COLUMNS}
+        self._games: Dict[str, int] = {}
+
+    def record(self, game_id: str, question_id: int, ans: Optional[str], correct: Optional[bool],
+               latency_ms: float, timed_out: bool):
+        """Ajoute une réponse ; ans est la saisie brute (None = temps écoulé)."""
+        with self._lock:
+            cols = self._cols
+            cols["partie"].append(self._games.setdefault(game_id, len(self._games)))
+            cols["question"].append(int(question_id))
+            cols["choix"].append(min(_choice_number(ans), 32767))
+            cols["correct"].append(-1 if correct is None else int(correct))
+            cols["timed_out"].append(1 if timed_out else 0)
+            cols["latence_ms"].append(latency_ms)
+            if len(cols["partie"]) >= self.block_rows:
+                self._queue.put(self._take())
+
+    def _take(self) -> Optional[Tuple[Dict[str, int], Dict[str, array]]]:
+        # appelé sous self._lock : détache le bloc courant (encodé par le thread d'écriture) et repart de zéro
+        if not self._cols["partie"]:
+            return None
+        block = (self._games, self._cols)
+        self._reset()
+        return block
+
+    @staticmethod
+    def _encode(block: Tuple[Dict[str, int], Dict[str, array]]) -> bytes:
+        games_map, cols = block
+        games = json.dumps(list(games_map), ensure_ascii=False).encode("utf-8")
+        parts = [_HEADER.pack(MAGIC, len(cols["partie"]), len(games)), games]
+        for name, _ in COLUMNS:
+            col = cols[name]
+            if sys.byteorder != "little":
+                col.byteswap()
+            parts.append(col.tobytes())
+        return b"".join(parts)
+
+    def _writer(self):
+        while True:
+            try:
+                block = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # bloc incomplet en attente depuis trop longtemps : repasse par la file
+                with self._lock:
+                    block = self._take()
+                if block is not None:
+                    self._queue.put(block)
+                continue
+            try:
+                if block is _STOP:
+                    return
+                if block is not None:
+                    self._write(self._encode(block))
+            finally:
+                self._queue.task_done()
+
+    def _write(self, block: bytes):
+        try:
+            os.write(self._fd, block)
+        except OSError as e:
+            print(f"[Warning] journal des réponses non écrit: {e}")
+
+    def flush(self):
+        """Écrit tout ce qui est en attente et attend la fin de l'écriture."""
+        with self._lock:
+            block = self._take()
+        if block is not None:
+            self._queue.put(block)
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+        os.close(self._fd)
+
+
+def iter_blocks(path: str = TELEMETRY_FILE) -> Iterator[Tuple[List[str], Dict[str, array]]]:
+    """
+    Parcourt les blocs du journal : (ids de partie, colonnes). Un dernier bloc
+    incomplet (arrêt brutal pendant l'écriture) est ignoré.
+    """
+    sizes = [(name, code, array(code).itemsize) for name, code in COLUMNS]
+    row_size = sum(s for _, _, s in sizes)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        while True:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                return
+            magic, rows, games_len = _HEADER.unpack(head)
+            if magic != MAGIC:
+                print(f"[Warning] {path}: bloc invalide, lecture interrompue")
+                return
+            body = f.read(games_len + rows * row_size)
+            if len(body) < games_len + rows * row_size:
+                return
+            games = json.loads(body[:games_len])
+            pos = games_len
+            cols = {}
+            for name, code, size in sizes:
+                col = array(code)
+                col.frombytes(body[pos:pos + rows * size])
+                if sys.byteorder != "little":
+                    col.byteswap()
+                cols[name] = col
+                pos += rows * size
+            yield games, cols
+
+
+def _summary(n: int, bonnes: int, timeouts: int, lat_sum: float, lat_n: int) -> Dict[str, Any]:
+    return {
+        "reponses": n,
+        "bonnes": bonnes,
+        "timeouts": timeouts,
+        "difficulte": round(1 - bonnes / n, 4) if n else 0.0,
+        "latence_moyenne_ms": round(lat_sum / lat_n, 1) if lat_n else 0.0,
+    }
+
+
+def _aggregate_numpy(np, path: str) -> Dict[int, Dict[str, Any]]:
+    q, correct, timed, lat = [], [], [], []
+    for _, cols in iter_blocks(path):
+        q.append(np.frombuffer(cols["question"], dtype=np.int64))
+        correct.append(np.frombuffer(cols["correct"], dtype=np.int8))
+        timed.append(np.frombuffer(cols["timed_out"], dtype=np.uint8))
+        lat.append(np.frombuffer(cols["latence_ms"], dtype=np.float32))
+    if not q:
+        return {}
+    q, correct, timed, lat = (np.concatenate(c) for c in (q, correct, timed, lat))
+    ids, inv = np.unique(q, return_inverse=True)
+    answered = timed == 0
+    n = np.bincount(inv, minlength=len(ids))
+    bonnes = np.bincount(inv, weights=correct == 1, minlength=len(ids))
+    timeouts = np.bincount(inv, weights=~answered, minlength=len(ids))
+    # la latence moyenne ne compte que les réponses données avant la fin du temps
+    lat_sum = np.bincount(inv, weights=np.where(answered, lat, 0.0), minlength=len(ids))
+    lat_n = np.bincount(inv, weights=answered, minlength=len(ids))
+    return {
+        int(qid): _summary(int(n[i]), int(bonnes[i]), int(timeouts[i]), float(lat_sum[i]), int(lat_n[i]))
+        for i, qid in enumerate(ids)
+    }
+
+
+def _aggregate_python(path: str) -> Dict[int, Dict[str, Any]]:
+    acc: Dict[int, list] = {}
+    for _, cols in iter_blocks(path):
+        for qid, ok, timed, lat in zip(cols["question"], cols["correct"], cols["timed_out"], cols["latence_ms"]):
+            a = acc.get(qid)
+            if a is None:
+                a = acc[qid] = [0, 0, 0, 0.0, 0]
+            a[0] += 1
+            if ok == 1:
+                a[1] += 1
+            if timed:
+                a[2] += 1
+            else:
+                a[3] += lat
+                a[4] += 1
+    return {qid: _summary(*a) for qid, a in sorted(acc.items())}
+
+
+def aggregate(path: str = TELEMETRY_FILE, use_numpy: Optional[bool] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Difficulté (part de réponses fausses ou absentes) et latence moyenne par question.
+    Utilise NumPy s'il est installé (use_numpy=None), sinon une boucle en pur Python.
+    """
+    if use_numpy is not False:
+        try:
+            import numpy as np
+        except ImportError:
+            if use_numpy:
+                raise
+        else:
+            return _aggregate_numpy(np, path)
+    return _aggregate_python(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Difficulté et latence par question (journal des réponses)")
+    parser.add_argument("--log", default=TELEMETRY_FILE)
+    parser.add_argument("--top", type=int, default=20, help="questions les plus difficiles à afficher")
+    parser.add_argument("--no-numpy", action="store_true")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    stats = aggregate(args.log, use_numpy=False if args.no_numpy else None)
+    elapsed = time.perf_counter() - t0
+    events = sum(s["reponses"] for s in stats.values())
+    print(f"{events} réponses, {len(stats)} questions, agrégées en {elapsed:.2f} s")
+    hardest = sorted(stats.items(), key=lambda kv: (-kv[1]["difficulte"], -kv[1]["reponses"]))[:args.top]
+    for qid, s in hardest:
+        print(f"  question {qid:>6} : difficulté {s['difficulte']:.2f}  "
+              f"({s['bonnes']}/{s['reponses']}, {s['timeouts']} temps écoulé)  latence {s['latence_moyenne_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
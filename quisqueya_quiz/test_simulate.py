@@ -0,0 +1,23 @@
+# test_simulate.py - La simulation ne dépend pas du nombre de processus
+# Usage : python -m pytest test_simulate.py
+import os
+
+from simulate import run_simulation
+
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions")
+# champs liés à l'horloge, différents d'une exécution à l'autre
+VOLATILE = ("date_heure", "duree_seconds", "id_partie")
+
+
+def _play(workers: int):
+    entries = []
+    for chunk, _, _ in run_simulation(FOLDER, players=5, games=40, seed=3, strategy="random", accuracy={},
+                                      workers=workers, chunk=20):
+        entries.extend({k: v for k, v in e.items() if k not in VOLATILE} for e in chunk)
+    return entries
+
+
+def test_workers_do_not_change_results():
+    serial = _play(1)
+    assert len(serial) == 200
+    assert _play(3) == serial
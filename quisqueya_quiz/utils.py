@@ -1,14 +1,37 @@
 # utils.py
+import codecs
 import os
-from typing import Optional
+import sys
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+# efface l'écran et replace le curseur en haut à gauche
+ANSI_CLEAR = "\033[2J\033[H"
 
 def clear():
-    """Efface la console (cls sous Windows, clear sous Unix)."""
-    os.system("cls" if os.name == "nt" else "clear")
+    """Efface la console (séquence ANSI, sans sous-processus ; cls sous Windows)."""
+    if os.name == "nt":
+        os.system("cls")
+    else:
+        sys.stdout.write(ANSI_CLEAR)
+        sys.stdout.flush()
 
 def safe_input(prompt: str = "") -> str:
     """Input simple, protège contre KeyboardInterrupt et retourne chaîne (vide si interruption)."""
+    global _pending_read
     try:
+        if _pending_read is not None:
+            # une lecture de StdinLines (délai expiré) attend encore stdin : c'est elle
+            # qui reçoit la ligne, sinon deux lecteurs se la disputeraient
+            print(prompt, end="", flush=True)
+            pending, _pending_read = _pending_read, None
+            line = pending.result()
+            if not line:
+                raise EOFError
+            return line.rstrip("\r\n")
         return input(prompt)
     except (KeyboardInterrupt, EOFError):
         print("")  # newline for neatness
@@ -64,3 +87,83 @@ def choose_from_list(items: list, prompt: str = "Choix (numéro) : ", allow_zero
             print("Choix hors limites. Réessaie.")
         except ValueError:
             print("Choix invalide — entrez le numéro correspondant.")
+
+
+# Un seul thread de lecture pour tout le processus (repli hors terminal / Windows)
+# (asyncio et concurrent.futures ne sont importés qu'au premier usage : menus plus rapides au démarrage)
+_read_executor: Optional["ThreadPoolExecutor"] = None
+# lecture bloquante en cours, reprise par le prompt suivant si un délai a expiré
+_pending_read: Optional["Future"] = None
+
+
+class StdinLines:
+    """
+    Lecteur unique de l'entrée standard pour une boucle asyncio.
+
+    Sur un terminal POSIX, stdin est surveillé par loop.add_reader (aucun thread).
+    Sinon, un seul thread de lecture est partagé par tout le processus et une
+    lecture expirée est reprise par le prompt suivant au lieu d'en lancer une autre.
+    readline() retourne None en fin de fichier.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._fd: Optional[int] = None
+        self._loop: Optional["asyncio.AbstractEventLoop"] = None
+        self._queue: Optional["asyncio.Queue"] = None
+        self._buf = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def attach(self):
+        import asyncio
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        try:
+            fd = self.stream.fileno()
+            if os.name != "nt" and os.isatty(fd):
+                self._loop.add_reader(fd, self._on_readable, fd)
+                self._fd = fd
+        except (AttributeError, OSError, ValueError, NotImplementedError):
+            self._fd = None
+
+    def detach(self):
+        if self._fd is not None and self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        self._fd = None
+
+    def _on_readable(self, fd: int):
+        data = os.read(fd, 4096)
+        if not data:
+            self.detach()
+            self._queue.put_nowait(None)
+            return
+        self._buf += self._decoder.decode(data)
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            self._queue.put_nowait(line.rstrip("\r"))
+
+    def discard_stale(self):
+        """Oublie les lignes tapées avant le prompt courant (ex. après un délai expiré)."""
+        global _pending_read
+        while self._queue is not None and not self._queue.empty():
+            if self._queue.get_nowait() is None:
+                # garde la fin de fichier
+                self._queue.put_nowait(None)
+                break
+        if _pending_read is not None and _pending_read.done():
+            _pending_read = None
+
+    async def readline(self) -> Optional[str]:
+        global _read_executor, _pending_read
+        if self._fd is not None or self._queue.qsize():
+            return await self._queue.get()
+        import asyncio
+        if _read_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stdin")
+        if _pending_read is None:
+            _pending_read = _read_executor.submit(self.stream.readline)
+        # shield : un délai expiré n'annule pas la lecture, elle sert au prompt suivant
+        line = await asyncio.shield(asyncio.wrap_future(_pending_read))
+        _pending_read = None
+        return line.rstrip("\r\n") if line else None